@@ -2,9 +2,23 @@
 from django.db.models import Q
 from django_filters import filters
 import django_filters
+from rest_framework.filters import DjangoObjectPermissionsFilter
 
-from vavilov.models import (Taxa, get_bottom_taxons, Accession, Cvterm, Cv,
-                            Db, Country, Assay, Plant)
+from vavilov.models import (Taxa, Accession, Cvterm, Cv,
+                            Db, Country, Assay, Plant, AccessionGroup,
+                            DUPLICATED_AND_EQUIVALENT_GROUP,
+                            get_visible_objects)
+
+
+class ViewPermissionsFilter(DjangoObjectPermissionsFilter):
+    '''DjangoObjectPermissionsFilter that follows the assay scoped
+    visibility'''
+
+    def filter_queryset(self, request, queryset, view):
+        model_meta = queryset.model._meta
+        perm = self.perm_format % {'app_label': model_meta.app_label,
+                                   'model_name': model_meta.model_name}
+        return get_visible_objects(request.user, perm, queryset)
 
 
 class AccessionFilter(django_filters.FilterSet):
@@ -25,24 +39,23 @@ class AccessionFilter(django_filters.FilterSet):
         # this is just the logic to get related accessions to value
         queryset2 = queryset.filter(Q(accession_number__icontains=value) |
                                     Q(accessionsynonym__synonym_code__icontains=value))
-        accessions = []
-        for accession in queryset2:
-            if accession.type and accession.type.name == 'internal':
-                accessions.append(accession)
-            else:
-                equivalents = accession.duplicated_accessions_and_equivalents
-                equivalents = [equi for equi in equivalents
-                               if equi.type.name == 'internal']
-                accessions.extend(equivalents)
+        internals = queryset2.filter(type__name='internal')
+        no_internals = queryset2.exclude(type__name='internal')
+
+        # internal accessions related to the not internal ones
+        groups = AccessionGroup.objects.filter(group_type=DUPLICATED_AND_EQUIVALENT_GROUP,
+                                               accession__in=no_internals.values('accession_id'))
+        equivalents = AccessionGroup.objects.filter(group_type=DUPLICATED_AND_EQUIVALENT_GROUP,
+                                                    group__in=groups.values('group'))
         # this is the real filtering of the query
-        list_ids = [accession.accession_id for accession in accessions]
-        return queryset.filter(pk__in=list_ids)
+        return queryset.filter(Q(pk__in=internals.values('accession_id')) |
+                               (Q(pk__in=equivalents.values('accession')) &
+                                Q(type__name='internal')))
 
     def accession_by_taxa(self, queryset, name, value):
         taxa = Taxa.objects.get(taxa_id=int(value))
-        bottom_taxas = get_bottom_taxons([taxa])
-        queryset = queryset.filter(accessiontaxa__taxa__in=bottom_taxas)
-        return queryset
+        queryset = queryset.filter(accessiontaxa__taxa__ancestor_closures__ancestor=taxa)
+        return queryset.distinct()
 
 
 class DbFilter(django_filters.FilterSet):
@@ -6,6 +6,8 @@ from rest_framework.permissions import SAFE_METHODS, BasePermission
 from guardian.utils import get_anonymous_user
 from guardian.compat import is_authenticated
 
+from vavilov.permissions import are_assay_scoped, can_view
+
 
 class UserPermission(permissions.BasePermission):
 
@@ -137,6 +139,11 @@ class CustomObjectPermissions(CustomModelPermissions):
         user = request.user if request.user.is_authenticated() else get_anonymous_user()
         perms = self.get_required_object_permissions(request.method, model_cls)
 
+        if request.method in SAFE_METHODS and are_assay_scoped(perms):
+            if can_view(user, perms, obj):
+                return True
+            raise Http404
+
         if not user.has_perms(perms, obj):
 
             # If the user does not have permissions we need to determine if
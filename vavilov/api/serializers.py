@@ -1,15 +1,18 @@
+import json
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 
 from rest_framework import serializers
 from rest_framework.permissions import IsAdminUser
+from rest_framework.reverse import reverse
 
 from vavilov.models import (Accession, Cvterm, AccessionRelationship,
                             AccessionSynonym, Passport, Location, Person,
                             PersonRelationship, Taxa, TaxaRelationship,
                             Country, Cv, Db, Pub, AccessionProp, AccessionTaxa,
                             Assay, Plant, AssayPlant, AssayProp,
-                            ObservationEntity)
+                            ObservationEntity, ExportJob)
 
 
 class PasswordSerializer(serializers.Serializer):
@@ -128,8 +131,7 @@ class AccessionSerializer(serializers.ModelSerializer):
                                                                 many=True,
                                                                 lookup_field='accession_number',
                                                                 view_name='api:accession-detail')
-    passport = serializers.HyperlinkedRelatedField(read_only=True,
-                                                   view_name='api:passport-detail')
+    passport = serializers.SerializerMethodField()
     collecting_province = serializers.StringRelatedField(read_only=True)
     collecting_country = serializers.StringRelatedField(read_only=True)
     collecting_region = serializers.StringRelatedField(read_only=True)
@@ -147,6 +149,18 @@ class AccessionSerializer(serializers.ModelSerializer):
                   'collecting_country', 'collecting_region', 'local_name',
                   'collecting_date', 'organism')  # , 'donor_accession')
 
+    def get_passport(self, accession):
+        # accessions annotated with_passport do not need to query the passport
+        if hasattr(accession, 'passport_pk'):
+            passport_id = accession.passport_pk
+        else:
+            passport = accession.passport
+            passport_id = passport.passport_id if passport else None
+        if passport_id is None:
+            return None
+        return reverse('api:passport-detail', kwargs={'pk': passport_id},
+                       request=self.context.get('request'))
+
 
 class LocationSerializer(serializers.ModelSerializer):
     class Meta:
@@ -220,3 +234,22 @@ class ObservationEntitySerializer(serializers.ModelSerializer):
     class Meta:
         model = ObservationEntity
         fields = '__all__'
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    criteria = serializers.SerializerMethodField()
+    download = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = ('export_job_id', 'kind', 'format', 'criteria', 'status',
+                  'progress', 'total', 'error', 'creation_time', 'end_time',
+                  'download')
+
+    def get_criteria(self, obj):
+        return json.loads(obj.criteria)
+
+    def get_download(self, obj):
+        return reverse('api:export_job-download',
+                       kwargs={'pk': obj.export_job_id},
+                       request=self.context.get('request'))
@@ -35,6 +35,12 @@ router.register(r'plants', phenotype.PlantViewSet)
 router.register(r'assayplants', phenotype.AssayPlantViewSet)
 router.register(r'fieldbook_observations', phenotype.FieldBookObservationViewSet,
                 base_name='fieldbook_observation')
+router.register(r'observation_matrix', phenotype.ObservationMatrixViewSet,
+                base_name='observation_matrix')
+router.register(r'trait_stats', phenotype.TraitStatsViewSet,
+                base_name='trait_stats')
+router.register(r'export_jobs', core.ExportJobViewSet,
+                base_name='export_job')
 
 schema_view = get_schema_view(title="Server Monitoring API")
 
@@ -15,7 +15,7 @@ from django_filters.rest_framework.backends import DjangoFilterBackend
 
 class AccessionViewSet(ModelViewSet):
     lookup_field = 'accession_number'
-    queryset = Accession.objects.all()
+    queryset = Accession.objects.with_passport()
     serializer_class = AccessionSerializer
     permission_classes = (CustomObjectPermissions,)
     filter_backends = (DjangoObjectPermissionsFilter, DjangoFilterBackend)
@@ -1,9 +1,10 @@
 from django.contrib.auth.models import User, Group
+from django.http.response import Http404
 from rest_framework import status
 from rest_framework.decorators import detail_route
-from rest_framework.permissions import IsAdminUser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
+from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet, ViewSet
 
 from vavilov.api.filters import CvtermFilter, CvFilter, DbFilter, CountryFilter
 from vavilov.api.permissions import UserPermission, IsStaffOrReadOnly
@@ -12,9 +13,13 @@ from vavilov.api.serializers import (PersonSerializer,
                                      TaxaRelationshipSerializer, TaxaSerializer,
                                      CvtermSerializer, GroupSerializer,
                                      UserSerializer, PasswordSerializer,
-                                     CountrySerializer, CvSerializer, DbSerializer)
+                                     CountrySerializer, CvSerializer, DbSerializer,
+                                     ExportJobSerializer)
+from vavilov.exports import (submit_export_job, can_download,
+                             return_export_response)
 from vavilov.models import (Person, PersonRelationship,
-                            TaxaRelationship, Taxa, Cvterm, Country, Cv, Db)
+                            TaxaRelationship, Taxa, Cvterm, Country, Cv, Db,
+                            ExportJob)
 from django_filters.rest_framework.backends import DjangoFilterBackend
 
 
@@ -100,3 +105,52 @@ class TaxaRelationsViewSet(ModelViewSet):
     queryset = TaxaRelationship.objects.all()
     serializer_class = TaxaRelationshipSerializer
     permission_classes = (IsStaffOrReadOnly,)
+
+
+class ExportJobViewSet(ViewSet):
+    permission_classes = (IsAuthenticated,)
+    base_name = 'export_job'
+
+    def _get_job(self, request, pk):
+        try:
+            job = ExportJob.objects.get(export_job_id=pk)
+        except (ExportJob.DoesNotExist, ValueError):
+            raise Http404
+        if not can_download(request.user, job):
+            raise Http404
+        return job
+
+    def list(self, request):
+        jobs = ExportJob.objects.filter(user=request.user)
+        jobs = jobs.order_by('-creation_time')
+        serializer = ExportJobSerializer(jobs, many=True,
+                                         context={'request': request})
+        return Response(serializer.data)
+
+    def create(self, request):
+        criteria = request.data.get('criteria') or {}
+        if not isinstance(criteria, dict):
+            return Response(data={'detail': 'criteria must be an object'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        # the search forms take a list of values for each field
+        criteria = dict([(key, [str(val) for val in value]
+                          if isinstance(value, list) else [str(value)])
+                         for key, value in criteria.items()])
+        try:
+            job = submit_export_job(request.user, request.data.get('kind', ''),
+                                    request.data.get('format', ''), criteria)
+        except ValueError as error:
+            return Response(data={'detail': str(error)},
+                            status=status.HTTP_400_BAD_REQUEST)
+        serializer = ExportJobSerializer(job, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        job = self._get_job(request, pk)
+        serializer = ExportJobSerializer(job, context={'request': request})
+        return Response(serializer.data)
+
+    @detail_route(methods=['get'])
+    def download(self, request, pk=None):
+        job = self._get_job(request, pk)
+        return return_export_response(job, request.META.get('HTTP_RANGE'))
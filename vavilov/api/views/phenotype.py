@@ -1,14 +1,19 @@
+from io import BytesIO
+
+from django.http.response import HttpResponse, Http404
 from rest_framework.filters import DjangoObjectPermissionsFilter
 from rest_framework.mixins import CreateModelMixin, DestroyModelMixin
 from rest_framework.viewsets import ModelViewSet, GenericViewSet, ViewSet
 
-from vavilov.api.filters import AssayFilter, PlantFilter
+from vavilov.api.filters import (AssayFilter, PlantFilter,
+                                 ViewPermissionsFilter)
 from vavilov.api.permissions import CustomObjectPermissions, IsStaffOrReadOnly
 from vavilov.api.serializers import (AssaySerializer, PlantSerializer,
                                      AssayPlantSerializer, AssayPropSerializer,
                                      ObservationEntitySerializer)
 from vavilov.models import (Assay, Plant, AssayPlant, AssayProp,
-                            ObservationEntity, Observation, TraitProp)
+                            ObservationEntity, TraitProp, Trait,
+                            keep_only_last_observation, user_can_view)
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from vavilov.db_management.fieldbook import (to_fieldbook_local_time,
@@ -18,6 +23,9 @@ from django.utils.datastructures import MultiValueDictKeyError
 from django.contrib.auth.models import Group
 from rest_framework import status
 from django_filters.rest_framework.backends import DjangoFilterBackend
+from vavilov.utils.matrix import (AGGREGATIONS, filter_matrix_observations,
+                                  observations_to_matrix, write_matrix_npz)
+from vavilov.utils.stats import get_trait_stats
 
 
 class AssayViewSet(ModelViewSet):
@@ -42,7 +50,7 @@ class PlantViewSet(ModelViewSet):
     queryset = Plant.objects.all()
     serializer_class = PlantSerializer
     permission_classes = (CustomObjectPermissions,)
-    filter_backends = (DjangoObjectPermissionsFilter, DjangoFilterBackend)
+    filter_backends = (ViewPermissionsFilter, DjangoFilterBackend)
 
     filter_class = PlantFilter
 
@@ -66,13 +74,13 @@ class AssayPlantViewSet(CreateModelMixin, DestroyModelMixin, GenericViewSet):
 
 
 class FieldBookObservationViewSet(ViewSet):
-    queryset = Observation.objects.all()[:200]
+    queryset = keep_only_last_observation()[:200]
     permission_classes = (IsAuthenticated,)
     base_name = 'fieldbook_observations'
 
     def list(self, request):
 
-        queryset = self.queryset
+        queryset = self.queryset.all()
         data = []
         try:
             for observation in queryset:
@@ -130,3 +138,42 @@ class FieldBookObservationViewSet(ViewSet):
 #         if len(request.data) != 1:
         data = {'msg': 'no data provided'}
         return Response(data=data, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ObservationMatrixViewSet(ViewSet):
+    permission_classes = (IsAuthenticated,)
+    base_name = 'observation_matrix'
+
+    def list(self, request):
+        params = request.query_params
+        aggregation = params.get('aggregation', 'mean')
+        if aggregation not in AGGREGATIONS:
+            msg = 'aggregation must be one of: ' + ', '.join(AGGREGATIONS)
+            return Response(data={'detail': msg},
+                            status=status.HTTP_400_BAD_REQUEST)
+        observations = filter_matrix_observations(request.user,
+                                                  assay=params.get('assay'),
+                                                  traits=params.get('traits'),
+                                                  accessions=params.get('accessions'))
+        accessions, traits, matrix = observations_to_matrix(observations,
+                                                            aggregation=aggregation)
+        fhand = BytesIO()
+        write_matrix_npz(fhand, accessions, traits, matrix)
+        response = HttpResponse(fhand.getvalue(),
+                                content_type='application/octet-stream')
+        response['Content-Disposition'] = 'attachment; filename="observations.npz"'
+        return response
+
+
+class TraitStatsViewSet(ViewSet):
+    permission_classes = (IsAuthenticated,)
+    base_name = 'trait_stats'
+
+    def retrieve(self, request, pk=None):
+        try:
+            trait = Trait.objects.get(trait_id=pk)
+        except (Trait.DoesNotExist, ValueError):
+            raise Http404
+        if not user_can_view(request.user, 'vavilov.view_trait', trait):
+            raise Http404
+        return Response(get_trait_stats(trait, request.user))
@@ -1,4 +1,4 @@
-from vavilov.models import Passport, AccessionTaxa, get_top_taxons
+from vavilov.models import Passport, AccessionTaxa, TaxaClosure
 
 
 def get_passport_data_choices(**kwargs):
@@ -55,18 +55,26 @@ def get_taxons(**kwargs):
     if acc_taxon_len == get_taxons.assaytaxalen and get_taxons.cache:
         return get_taxons.cache
     else:
+        # all the ancestors of the accession taxa in one query
+        closures = TaxaClosure.objects.filter(descendant__accessiontaxa__isnull=False)
+        closures = closures.values_list('descendant', 'ancestor', 'ancestor__name',
+                                        'depth').distinct()
+        ancestors_by_taxa = {}
+        for taxa_id, ancestor_id, ancestor_name, depth in closures:
+            ancestors = ancestors_by_taxa.setdefault(taxa_id, [])
+            ancestors.append((depth, ancestor_id, ancestor_name))
+
         taxons_long = []
-        for acc_taxa in AccessionTaxa.objects.all():
-            taxa = acc_taxa.taxa
-            taxons = get_top_taxons(taxa)[::-1]
+        seen = set()
+        for taxa_id in AccessionTaxa.objects.values_list('taxa', flat=True):
             previous = None
-            for taxon in taxons:
-                name = taxon.name
+            for _, ancestor_id, name in sorted(ancestors_by_taxa.get(taxa_id, []),
+                                               reverse=True):
                 if previous is not None:
                     name = previous + ' ' + name
-                taxa_data = {'label': name, 'value': taxon.taxa_id}
-                if taxa_data not in taxons_long:
-                    taxons_long.append(taxa_data)
+                if (name, ancestor_id) not in seen:
+                    seen.add((name, ancestor_id))
+                    taxons_long.append({'label': name, 'value': ancestor_id})
                 previous = name
         get_taxons.cache = taxons_long
         get_taxons.assaytaxalen = acc_taxon_len
@@ -1,3 +1,6 @@
+from os.path import join
+from tempfile import gettempdir
+
 from django.conf import settings
 from pytz import timezone
 
@@ -19,21 +22,85 @@ APP_LOGGER = getattr(settings, 'VAVILOV_APP_LOGGER', 'vavilov.debug')
 # When filtering observations, do by object
 BY_OBJECT_OBS_PERM = getattr(settings, 'VAVILOV_BY_OBJECT_OBS_PERM', True)
 
+# Plants, observation entities, observations and their images are visible to
+# the users that can view their assay, no per object permission is needed
+OBS_PERM_BY_ASSAY = getattr(settings, 'VAVILOV_OBS_PERM_BY_ASSAY', False)
+
+# Cache alias to keep the ids of the objects that each user can view. It has
+# to be shared by all the server processes (memcached, database...).
+# None disables it
+VISIBLE_IDS_CACHE = getattr(settings, 'VAVILOV_VISIBLE_IDS_CACHE', None)
+
+# The users that can view more objects of a model are not cached, their
+# objects are filtered by the database. memcached does not keep values
+# bigger than 1MB
+VISIBLE_IDS_MAX = getattr(settings, 'VAVILOV_VISIBLE_IDS_MAX', 100000)
+
 # check if the accessions are public
 ACCESSIONS_ARE_PUBLIC = getattr(settings, 'VAVILOV_ACCESSIONS_ARE_PUBLIC', False)
 
 # Max number of photos to show in gallery
 MAX_PHOTO_IN_GALLERY = getattr(settings, 'VAVILOV_MAX_PHOTO_IN_GALLERY', 100)
 
+# Photos sent in each page of the galleries of the detail pages, the next
+# ones are asked by the gallery while it is browsed
+GALLERY_PAGE_SIZE = getattr(settings, 'VAVILOV_GALLERY_PAGE_SIZE', 30)
+
 # Key of the google map API-
 GOOGLEMAPKEY = getattr(settings, 'VAVILOV_GOOGLEMAPKEY', None)
 
 # Limit of observations in a search to convert to excel
-MAX_OBS_TO_EXCEL = getattr(settings, 'VAVILOV_MAX_OBS_TO_EXCEL', 2000)
+MAX_OBS_TO_EXCEL = getattr(settings, 'VAVILOV_MAX_OBS_TO_EXCEL', 300000)
+
+# Dir where the export files are written before being downloaded
+EXPORT_DIR = getattr(settings, 'VAVILOV_EXPORT_DIR',
+                     join(gettempdir(), 'vavilov_exports'))
+
+# The export jobs are run by the run_export_jobs command. If False they are
+# run in a thread of the web process that receives them
+EXPORT_WORKERS = getattr(settings, 'VAVILOV_EXPORT_WORKERS', False)
+
+# Seconds that the result of an export job is reused by identical jobs
+EXPORT_JOB_MAX_AGE = getattr(settings, 'VAVILOV_EXPORT_JOB_MAX_AGE', 3600)
+
+# Seconds without progress after which a running export job is considered
+# failed, its worker has died
+EXPORT_JOB_TIMEOUT = getattr(settings, 'VAVILOV_EXPORT_JOB_TIMEOUT', 600)
+
+# Number of bins of the trait value histograms
+TRAIT_STATS_BINS = getattr(settings, 'VAVILOV_TRAIT_STATS_BINS', 10)
 
 # Phenotype photos dir path
 PHENO_PHOTO_DIR = getattr(settings, 'VAVILOV_PHENO_PHOTO_DIR', None)
 
+# File in the phenotype photos dir with the images already loaded, the
+# add_or_load_observation_images command only reads the new or changed ones
+IMAGE_MANIFEST_FNAME = getattr(settings, 'VAVILOV_IMAGE_MANIFEST_FNAME',
+                               '.image_manifest.tsv')
+
+# The smaller copies of the phenotype photos, by the name of the dir next to
+# the photo where they are written, with their largest side in pixels
+IMAGE_DERIVATIVE_SIZES = getattr(settings, 'VAVILOV_IMAGE_DERIVATIVE_SIZES',
+                                 {'thumbnails': 200, 'gallery': 1024})
+
+# Widths in pixels of the resized images served by the observation image
+# view, the requested ones are taken to the next one of these
+IMAGE_RESIZE_WIDTHS = getattr(settings, 'VAVILOV_IMAGE_RESIZE_WIDTHS',
+                              [200, 400, 800, 1200, 1600])
+# Width of the images of the galleries, the full size one is shown in full
+# screen
+GALLERY_IMAGE_WIDTH = getattr(settings, 'VAVILOV_GALLERY_IMAGE_WIDTH', 1200)
+
+# Dir where the resized images are kept, the least recently used are removed
+# once they take more than IMAGE_CACHE_MAX_SIZE bytes
+IMAGE_CACHE_DIR = getattr(settings, 'VAVILOV_IMAGE_CACHE_DIR',
+                          join(gettempdir(), 'vavilov_image_cache'))
+IMAGE_CACHE_MAX_SIZE = getattr(settings, 'VAVILOV_IMAGE_CACHE_MAX_SIZE',
+                               1024 ** 3)
+
+# Seconds that the browsers keep the resized images without asking again
+IMAGE_CACHE_MAX_AGE = getattr(settings, 'VAVILOV_IMAGE_CACHE_MAX_AGE', 86400)
+
 DEFAULT_ACCESSION_SEARCH_FIELDS = ['accession', 'taxa', 'country', 'region',
                                    'biological_status', 'collecting_source']
 
@@ -56,7 +123,7 @@ OBSERVATION_TABLE_FIELDS = getattr(settings, 'VAVILOV_OBSERVATION_TABLE_FIELDS',
 
 DEFAULT_OBSERVATION_SEARCH_FIELDS = ['accession_number', 'accession_list',
                                     'plant', 'plant_part', 'assay', 'trait',
-                                    'experimental_field']
+                                    'experimental_field', 'value_range']
 OBSERVATION_SEARCH_FIELDS = getattr(settings, 'VAVILOV_OBSERVATION_SEARCH_FIELDS',
                                     DEFAULT_OBSERVATION_SEARCH_FIELDS)
 
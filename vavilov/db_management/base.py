@@ -1,13 +1,17 @@
+from collections import OrderedDict
 import csv
 import datetime
+from decimal import Decimal
+from multiprocessing import Pool
 from os.path import join, dirname
 import re
 
 from django.apps import apps
 from django.contrib.auth.models import User, Group
 from django.core.management import execute_from_command_line
-from django.db import transaction
-from django.db.models import Q
+from django.db import connection, transaction
+from django.db.backends.utils import format_number
+from django.db.models import Q, Max
 from guardian.compat import get_user_model
 from guardian.shortcuts import assign_perm
 
@@ -16,8 +20,10 @@ from vavilov.conf.settings import PUBLIC_GROUP_NAME, ACCESSIONS_ARE_PUBLIC
 from vavilov.latlon import lat_to_deg, lon_to_deg
 from vavilov.models import (Accession, Country, Passport, Location, Cvterm,
                             Cv, Taxa, TaxaRelationship, Person, Db, Dbxref,
-                            AccessionRelationship, AccessionTaxa, AccessionSynonym)
-from vavilov.permissions import add_view_permissions
+                            AccessionRelationship, AccessionTaxa, AccessionSynonym,
+                            get_cvterm, get_bulk_batch_size,
+                            rebuild_accession_groups, update_organism_names)
+from vavilov.permissions import add_view_permissions, bulk_assign_view_perm
 
 INITIAL_DATA_DIR = join(dirname(vavilov.__file__), 'data')
 SHARED_INITIAL_DATA_DIR = join(INITIAL_DATA_DIR, 'shared')
@@ -40,6 +46,11 @@ SHARED_INITIAL_DATA_TO_LOAD = [('cv', join(SHARED_INITIAL_DATA_DIR, 'vavilov_cv.
 NO_REF_TABLES = ['cv', 'db', 'country']
 LAT_LON_DEG_REGEX = re.compile('-?[0-9]{1,3}\.[0-9]{2,8}')
 
+# Rows of the accession files added in each transaction by the bulk loader
+ACCESSION_CHUNK_SIZE = 1000
+# Rows sent at a time to each process that parses the accession files
+ACCESSION_PARSE_CHUNK_SIZE = 200
+
 
 def get_or_create_public_group():
     return Group.objects.get_or_create(name=PUBLIC_GROUP_NAME)[0]
@@ -52,6 +63,25 @@ class comma_dialect(csv.excel):
     lineterminator = '\n'
 
 
+def bulk_create_with_pks(model, objs, batch_size=500):
+    '''bulk_create that also sets the primary keys in the databases that do
+    not return them, like sqlite. There the new rows are read back, it
+    fails if another process has added rows at the same time'''
+    batch_size = get_bulk_batch_size(model, batch_size)
+    if not objs or connection.features.can_return_ids_from_bulk_insert:
+        return model.objects.bulk_create(objs, batch_size=batch_size)
+    pk_name = model._meta.pk.attname
+    last_pk = model.objects.aggregate(last_pk=Max(pk_name))['last_pk'] or 0
+    model.objects.bulk_create(objs, batch_size=batch_size)
+    pks = model.objects.filter(**{pk_name + '__gt': last_pk})
+    pks = list(pks.order_by(pk_name).values_list(pk_name, flat=True))
+    if len(pks) != len(objs):
+        raise RuntimeError('Rows added to {} by another process'.format(model.__name__))
+    for obj, pk in zip(objs, pks):
+        setattr(obj, pk_name, pk)
+    return objs
+
+
 def flush_vavilov_tables():
     # traditom_aap_config = TraditomAppConfig()
     for model in apps.get_app_config('vavilov').get_models():
@@ -85,8 +115,7 @@ def add_or_load_users(fpath):
 def add_or_load_persons(fhand):
     with transaction.atomic():
         for entry in csv.DictReader(fhand, dialect=comma_dialect):
-            cv = Cv.objects.get(name='person_types')
-            type_ = Cvterm.objects.get(cv=cv, name=entry['type'])
+            type_ = get_cvterm('person_types', entry['type'])
             Person.objects.get_or_create(
                 name=entry['name'],
                 description=entry['description'],
@@ -154,7 +183,9 @@ def load_initial_data():
     load_initial_data_from_dict(SHARED_INITIAL_DATA_TO_LOAD)
 
 
-def add_accessions(fhand, silent=True):
+def add_accessions(fhand, silent=True, bulk=False, processes=1):
+    if bulk:
+        return bulk_add_accessions(fhand, silent=silent, processes=processes)
     group = Group.objects.get(name=PUBLIC_GROUP_NAME)
     for accession_data in csv.DictReader(fhand, dialect=comma_dialect):
         accession_data = {
@@ -197,8 +228,7 @@ def _add_main_accession(accession_data, silent, view_perm_group):
     if donor_code and donor_institute:
         donor_accession = add_accession(donor_code, donor_institute)
         assign_perm('view_accession', view_perm_group, donor_accession)
-        is_duplicated_from = Cvterm.objects.get(
-            cv__name='relationship_types', name='is_duplicated_from')
+        is_duplicated_from = get_cvterm('relationship_types', 'is_duplicated_from')
 
         AccessionRelationship.objects.create(
             subject=accession, object=donor_accession, type=is_duplicated_from)
@@ -212,8 +242,7 @@ def _add_main_accession(accession_data, silent, view_perm_group):
     if duplicated_code and duplicated_institute:
         duplicated_acc = add_accession(duplicated_code, duplicated_institute)
         assign_perm('view_accession', view_perm_group, duplicated_acc)
-        is_duplicated_from = Cvterm.objects.get(
-            cv__name='relationship_types', name='is_a_duplicated')
+        is_duplicated_from = get_cvterm('relationship_types', 'is_a_duplicated')
         AccessionRelationship.objects.create(
             subject=accession, object=duplicated_acc, type=is_duplicated_from)
     # collecting_accession is a synonym
@@ -221,8 +250,7 @@ def _add_main_accession(accession_data, silent, view_perm_group):
     collecting_institute = accession_data['Collecting institute code']
     if collecting_code and collecting_institute:
         collecting_inst = Person.objects.get(name=collecting_institute)
-        collecting_type = Cvterm.objects.get(
-            cv__name='synonym_types', name='collecting')
+        collecting_type = get_cvterm('synonym_types', 'collecting')
 
         AccessionSynonym.objects.create(
             accession=accession,
@@ -278,6 +306,317 @@ def _add_main_accession(accession_data, silent, view_perm_group):
         view_perm_group=view_perm_group)
 
 
+def _get_code_and_institute(row, code_header, institute_header):
+    if row[code_header] and row[institute_header]:
+        return row[code_header], row[institute_header]
+    return None
+
+
+def _parse_accession_row(args):
+    '''It reads the values of a row of an accession file. It does not use the
+    db, so the rows can be parsed in other processes'''
+    row_number, row, silent = args
+    row = {key.strip(): value.strip() for key, value in row.items()}
+    accession_number = row['Accession number']
+
+    if row['Subtaxa']:
+        subtaxa_type, subtaxa_name = row['Subtaxa'].split(':')[:2]
+    else:
+        subtaxa_type, subtaxa_name = None, None
+
+    latitude = row['Latitude'] or None
+    if latitude is not None:
+        latitude = _parse_coordinate(latitude, 'NS', lat_to_deg, 'Latitude',
+                                     accession_number, silent)
+    longitude = row['Longitude'] or None
+    if longitude is not None:
+        longitude = _parse_coordinate(longitude, 'EW', lon_to_deg, 'Longitude',
+                                      accession_number, silent)
+    altitude = row['Altitude'] or None
+    if altitude is not None:
+        altitude = altitude.replace('m', '').strip()
+        try:
+            altitude = int(altitude)
+        except ValueError:
+            if not silent:
+                msg = 'Could not convert Altitude data {}: {}'
+                print(msg.format(accession_number, altitude))
+            altitude = None
+
+    acquisition_date = row['Acquisition date'] or None
+    if acquisition_date is not None:
+        acquisition_date = _parse_date(acquisition_date, 'acquisition',
+                                       accession_number, silent)
+    collecting_date = row['Collecting date'] or None
+    if collecting_date is not None:
+        collecting_date = _parse_date(collecting_date, 'collecting_date',
+                                      accession_number, silent)
+
+    return {'row_number': row_number,
+            'accession': (accession_number, row['Istitute code']),
+            'taxonomy': (row['Genus'], row['Species'], subtaxa_name,
+                         subtaxa_type),
+            'donor': _get_code_and_institute(row, 'Donor accession number',
+                                             'Donor Institute code'),
+            'duplicate': _get_code_and_institute(row, 'Code of duplicates in other genebank',
+                                                 'Code of the genebank holder of the duplicate'),
+            'collecting': _get_code_and_institute(row, 'Collecting number',
+                                                  'Collecting institute code'),
+            'location': {'site': row['Collecting site'] or None,
+                         'province': row['Province'] or None,
+                         'region': row['Region'] or None,
+                         'country': row['Country'] or None,
+                         'latitude': latitude, 'longitude': longitude,
+                         'altitude': altitude},
+            'passport': {'local_name': row['Local name'] or None,
+                         'traditional_location': row['Traditional location'] or None,
+                         'biological_status': row['Biological status of accession'] or None,
+                         'collecting_source': row['Collecting source'] or None,
+                         'acquisition_date': acquisition_date,
+                         'collecting_date': collecting_date}}
+
+
+def _parse_accession_rows(fhand, silent, processes):
+    rows = ((row_number, row, silent) for row_number, row in
+            enumerate(csv.DictReader(fhand, dialect=comma_dialect), 2))
+    if processes == 1:
+        return [_parse_accession_row(row) for row in rows]
+    with Pool(processes) as pool:
+        return pool.map(_parse_accession_row, rows,
+                        chunksize=ACCESSION_PARSE_CHUNK_SIZE)
+
+
+def _to_db_decimal(model, field_name, value):
+    'The value as it is stored in a decimal field'
+    if value is None:
+        return None
+    field = model._meta.get_field(field_name)
+    return Decimal(format_number(field.to_python(value), field.max_digits,
+                                 field.decimal_places))
+
+
+def _get_location_key(site, province, region, country_id, latitude,
+                      longitude, altitude):
+    # the fields compared by the get_or_create of add_location
+    return (site, province, region, country_id,
+            _to_db_decimal(Location, 'latitude', latitude),
+            _to_db_decimal(Location, 'longitude', longitude), altitude)
+
+
+def _get_accession_refs():
+    'The objects referenced by the accession files, read once'
+    countries = {}
+    for country_id, name, code3, code2 in Country.objects.values_list('country_id', 'name',
+                                                                      'code3', 'code2'):
+        for key in (code2, code3, name):
+            if key:
+                countries.setdefault(key, country_id)
+    accessions = Accession.objects.values_list('accession_number', 'institute',
+                                               'accession_id')
+    locations = Location.objects.values_list('site', 'province', 'region',
+                                             'country', 'latitude',
+                                             'longitude', 'altitude',
+                                             'location_id')
+    return {'countries': countries,
+            'persons': dict(Person.objects.values_list('name', 'person_id')),
+            'accessions': {(number, institute_id): accession_id
+                           for number, institute_id, accession_id in accessions.iterator()},
+            'with_passport': set(Passport.objects.values_list('accession', flat=True)),
+            'locations': {_get_location_key(*values[:-1]): values[-1]
+                          for values in locations.iterator()},
+            'taxa': {}}
+
+
+def _resolve_accession_row(record, refs):
+    'It changes the names of the row by ids, ValueError if any is missing'
+    for key in ('accession', 'donor', 'duplicate', 'collecting'):
+        if record[key] is None:
+            continue
+        code, institute = record[key]
+        try:
+            record[key] = code, refs['persons'][institute]
+        except KeyError:
+            raise ValueError('{} institute not in db'.format(institute))
+
+    passport = record['passport']
+    for cv_name in ('biological_status', 'collecting_source'):
+        term_name = passport.pop(cv_name)
+        passport[cv_name + '_id'] = None
+        if term_name is None:
+            continue
+        try:
+            passport[cv_name + '_id'] = get_cvterm(cv_name, term_name).cvterm_id
+        except Cvterm.DoesNotExist:
+            raise ValueError('{} not in {} cv'.format(term_name, cv_name))
+
+    location = record['location']
+    country = location.pop('country')
+    location['country_id'] = None
+    if country is not None:
+        try:
+            location['country_id'] = refs['countries'][country]
+        except KeyError:
+            msg = 'Could not find country code {}: {}'
+            print(msg.format(record['accession'][0], country))
+
+
+def _get_taxa_id(taxonomy, taxa):
+    # the new taxa are added one by one, their signals keep the taxa closure
+    if taxonomy not in taxa:
+        taxon = add_taxonomies(*taxonomy)
+        taxa[taxonomy] = None if taxon is None else taxon[0].taxa_id
+    return taxa[taxonomy]
+
+
+def _add_accession_chunk(records, refs, group, batch_size):
+    '''It adds the accessions of the rows and their taxa, relationships,
+    synonyms and passports. It returns True if any relationship is added'''
+    accessions = refs['accessions']
+    # the accessions with passport were loaded from a file before
+    records_by_accession = OrderedDict()
+    for record in records:
+        accession_id = accessions.get(record['accession'])
+        if (accession_id not in refs['with_passport'] and
+                record['accession'] not in records_by_accession):
+            records_by_accession[record['accession']] = record
+    records = list(records_by_accession.values())
+
+    internal_type = get_cvterm('accession_types', 'internal').cvterm_id
+    new_accessions = OrderedDict()
+    for record in records:
+        for key, type_id in ((record['accession'], internal_type),
+                             (record['donor'], None),
+                             (record['duplicate'], None)):
+            if key is not None and key not in accessions and key not in new_accessions:
+                new_accessions[key] = Accession(accession_number=key[0],
+                                                institute_id=key[1],
+                                                type_id=type_id)
+    new_accessions = list(new_accessions.values())
+    bulk_create_with_pks(Accession, new_accessions, batch_size=batch_size)
+    accessions.update(((accession.accession_number, accession.institute_id),
+                       accession.accession_id) for accession in new_accessions)
+    bulk_assign_view_perm('view_accession', group, new_accessions)
+    for record in records:
+        record['accession_id'] = accessions[record['accession']]
+
+    accession_taxa = []
+    for record in records:
+        taxa_id = _get_taxa_id(record['taxonomy'], refs['taxa'])
+        if taxa_id is not None:
+            accession_taxa.append(AccessionTaxa(accession_id=record['accession_id'],
+                                                taxa_id=taxa_id))
+    AccessionTaxa.objects.bulk_create(accession_taxa)
+
+    relationship_types = (('donor', get_cvterm('relationship_types', 'is_duplicated_from')),
+                          ('duplicate', get_cvterm('relationship_types', 'is_a_duplicated')))
+    relationships = [AccessionRelationship(subject_id=record['accession_id'],
+                                           object_id=accessions[record[key]],
+                                           type=type_)
+                     for record in records
+                     for key, type_ in relationship_types if record[key]]
+    AccessionRelationship.objects.bulk_create(relationships)
+
+    collecting_type = get_cvterm('synonym_types', 'collecting')
+    synonyms = [AccessionSynonym(accession_id=record['accession_id'],
+                                 synonym_code=record['collecting'][0],
+                                 synonym_institute_id=record['collecting'][1],
+                                 type=collecting_type)
+                for record in records if record['collecting']]
+    AccessionSynonym.objects.bulk_create(synonyms)
+
+    new_locations = OrderedDict()
+    for record in records:
+        location = record['location']
+        record['location_key'] = None
+        if (location['site'] or location['province'] or location['region'] or
+                location['longitude'] or location['altitude'] or
+                location['country_id']):
+            key = _get_location_key(**location)
+            record['location_key'] = key
+            if key not in refs['locations'] and key not in new_locations:
+                new_locations[key] = Location(**location)
+    bulk_create_with_pks(Location, list(new_locations.values()),
+                         batch_size=batch_size)
+    refs['locations'].update((key, location.location_id)
+                             for key, location in new_locations.items())
+    bulk_assign_view_perm('vavilov.view_location', group,
+                          list(new_locations.values()))
+
+    passports = [Passport(accession_id=record['accession_id'],
+                          location_id=refs['locations'].get(record['location_key']),
+                          **record['passport'])
+                 for record in records]
+    bulk_create_with_pks(Passport, passports, batch_size=batch_size)
+    bulk_assign_view_perm('vavilov.view_passport', group, passports)
+    refs['with_passport'].update(record['accession_id'] for record in records)
+
+    # bulk_create does not send the signal that sets the organism
+    update_organism_names([taxa.accession_id for taxa in accession_taxa])
+    return bool(relationships)
+
+
+def bulk_add_accessions(fhand, silent=True, processes=1,
+                        chunk_size=ACCESSION_CHUNK_SIZE):
+    '''add_accessions for whole genebank catalogs. The rows are parsed in
+    processes, the objects they reference are read once and the new objects
+    are added with bulk_create, each chunk of rows in its own transaction.
+
+    The rows of the accessions that already have a passport are skipped.
+    Nothing is added if any row has an institute or a cvterm not in the db'''
+    group = Group.objects.get(name=PUBLIC_GROUP_NAME)
+    refs = _get_accession_refs()
+    records, errors = [], []
+    for record in _parse_accession_rows(fhand, silent, processes):
+        try:
+            _resolve_accession_row(record, refs)
+        except ValueError as error:
+            errors.append('Row {}: {}'.format(record['row_number'], error))
+            continue
+        records.append(record)
+    if errors:
+        raise ValueError('\n'.join(errors))
+
+    relationships_added = False
+    try:
+        for start in range(0, len(records), chunk_size):
+            with transaction.atomic():
+                chunk = records[start:start + chunk_size]
+                if _add_accession_chunk(chunk, refs, group, chunk_size):
+                    relationships_added = True
+    finally:
+        # bulk_create does not send the signals that keep the accession
+        # groups, they are computed again for the added chunks
+        if relationships_added:
+            with transaction.atomic():
+                rebuild_accession_groups()
+
+
+def _parse_coordinate(value, hemispheres, to_deg, coordinate_name,
+                      accession_number, silent):
+    'It returns the coordinate in degrees, None if it can not be converted'
+    if any(hemisphere in value for hemisphere in hemispheres):
+        try:
+            return to_deg(value)
+        except ValueError:
+            pass
+    elif LAT_LON_DEG_REGEX.match(value):
+        return float(value)
+    if not silent:
+        msg = 'Could not convert {} data {}: {}'
+        print(msg.format(coordinate_name, accession_number, value))
+    return None
+
+
+def _parse_date(value, field_name, accession_number, silent):
+    try:
+        return _strtime_to_date(value)
+    except ValueError:
+        if not silent:
+            msg = 'bad {} time field {}: {}'
+            print(msg.format(field_name, accession_number, value))
+        return None
+
+
 def add_passport_data(accession,
                       local_name=None,
                       traditional_location=None,
@@ -305,66 +644,26 @@ def add_passport_data(accession,
             country = None
 
     if biological_status is not None:
-        biological_status = Cvterm.objects.get(
-            cv__name='biological_status', name=biological_status)
+        biological_status = get_cvterm('biological_status', biological_status)
     if collecting_source is not None:
-        collecting_source = Cvterm.objects.get(
-            cv__name='collecting_source', name=collecting_source)
+        collecting_source = get_cvterm('collecting_source', collecting_source)
 
     if latitude is not None:
-        if 'N' in latitude or 'S' in latitude:
-            try:
-                latitude = lat_to_deg(latitude)
-            except ValueError:
-                if not silent:
-                    msg = 'Could not convert Latitude data {}: {}'
-                    print(msg.format(accession.accession_number, latitude))
-                latitude = None
-        elif LAT_LON_DEG_REGEX.match(latitude):
-            latitude = float(latitude)
-        else:
-            if not silent:
-                msg = 'Could not convert Latitude data {}: {}'
-                print(msg.format(accession.accession_number, latitude))
-            latitude = None
-
+        latitude = _parse_coordinate(latitude, 'NS', lat_to_deg, 'Latitude',
+                                     accession.accession_number, silent)
     if longitude is not None:
-        if 'E' in longitude or 'W' in longitude:
-            try:
-                longitude = lon_to_deg(longitude)
-            except ValueError:
-                if not silent:
-                    msg = 'Could not convert Longitude data {}: {}'
-                    print(msg.format(accession.accession_number, longitude))
-                longitude = None
-
-        elif LAT_LON_DEG_REGEX.match(longitude):
-            longitude = float(longitude)
-        else:
-            if not silent:
-                msg = 'Could not convert Longitude data {}: {}'
-                print(msg.format(accession.accession_number, longitude))
-            longitude = None
+        longitude = _parse_coordinate(longitude, 'EW', lon_to_deg,
+                                      'Longitude', accession.accession_number,
+                                      silent)
     if altitude is not None:
         altitude = str(altitude).replace('m', '').strip()
 
     if acquisition_date is not None:
-        try:
-            acquisition_date = _strtime_to_date(acquisition_date)
-        except ValueError:
-            if not silent:
-                msg = 'bad acquisition time field {}: {}'
-                print(msg.format(accession.accession_number, acquisition_date))
-            acquisition_date = None
-
+        acquisition_date = _parse_date(acquisition_date, 'acquisition',
+                                       accession.accession_number, silent)
     if collecting_date is not None:
-        try:
-            collecting_date = _strtime_to_date(collecting_date)
-        except ValueError:
-            if not silent:
-                msg = 'bad collecting_date time field {}: {}'
-                print(msg.format(accession.accession_number, collecting_date))
-            collecting_date = None
+        collecting_date = _parse_date(collecting_date, 'collecting_date',
+                                      accession.accession_number, silent)
 
     location = add_location(
         site=site,
@@ -415,11 +714,10 @@ def add_location(site=None,
 
 
 def add_taxonomies(genus, species=None, subtaxa=None, subtaxa_type=None):
-    taxo_cv = Cv.objects.get(name='taxonomic_ranks')
     main_taxon = None
     if genus:
         genus = genus[0].upper() + genus[1:].lower()
-        genus_cvterm = Cvterm.objects.get(cv=taxo_cv, name='Genus')
+        genus_cvterm = get_cvterm('taxonomic_ranks', 'Genus')
         genus_tx = Taxa.objects.get_or_create(name=genus, rank=genus_cvterm)[0]
         main_taxon = (genus_tx, None)
 
@@ -436,10 +734,12 @@ def add_taxonomies(genus, species=None, subtaxa=None, subtaxa_type=None):
 
 
 def _add_taxa(taxa_name, taxa_rank_name, parent_taxa):
-    taxo_cv = Cv.objects.get(name='taxonomic_ranks')
-    taxa_rank = Cvterm.objects.get_or_create(
-        cv=taxo_cv, name=taxa_rank_name)[0]
-    is_a = Cvterm.objects.get(cv__name='relationship_types', name='is_a')
+    try:
+        taxa_rank = get_cvterm('taxonomic_ranks', taxa_rank_name)
+    except Cvterm.DoesNotExist:
+        taxo_cv = Cv.objects.get(name='taxonomic_ranks')
+        taxa_rank = Cvterm.objects.create(cv=taxo_cv, name=taxa_rank_name)
+    is_a = get_cvterm('relationship_types', 'is_a')
     try:
         tr = TaxaRelationship.objects.get(
             taxa_subject__name=taxa_name,
@@ -463,8 +763,7 @@ def add_accession(accession, institute_name, acc_type=None, make_link=True):
     dbxref = None
 
     if acc_type is not None:
-        acc_type = Cvterm.objects.get(
-            cv__name='accession_types', name=acc_type)
+        acc_type = get_cvterm('accession_types', acc_type)
 
     institute = Person.objects.get(name=institute_name)
     try:
@@ -1,21 +1,30 @@
+from collections import OrderedDict
 import csv
 import sqlite3
 
-from django.conf import settings as site_settings
 from django.contrib.auth.models import Group
 from django.db import transaction
-from django.db.models import Q
 from django.utils.dateparse import parse_datetime
 from guardian.shortcuts import assign_perm
 
 from vavilov.conf import settings
 from vavilov.conf.settings import OUR_TIMEZONE
-from vavilov.db_management.phenotype import (add_observation,
-                                             suggest_obs_entity_name)
-from vavilov.models import (Assay, Cvterm, Trait, TraitProp, Plant,
+from vavilov.db_management.base import bulk_create_with_pks
+from vavilov.db_management.phenotype import (add_observation, ImportSession,
+                                             BULK_CHUNK_SIZE,
+                                             NOT_ALLOWED_VALUES,
+                                             check_obs_entity,
+                                             create_obs_entities,
+                                             get_value_columns,
+                                             get_values_by_name)
+from vavilov.models import (Assay, Trait, TraitProp, Plant,
                             AssayPlant, Accession, AssayTrait,
                             Observation, ObservationEntity,
-                            ObservationEntityPlant)
+                            ObservationEntityPlant, LatestObservation,
+                            get_cvterm, get_cvterm_ids, MAX_IDS_IN_QUERY,
+                            STRUCTURED_TRAIT_TYPES, observation_content_hash,
+                            observations_bulk_created)
+from vavilov.permissions import assign_view_perm, bulk_assign_view_perm
 
 FIELDBOOK_TO_DB_TYPE_TRANSLATOR = {'categorical': 'text', 'numeric': 'numeric',
                                    'percent': 'percent', 'date': 'date',
@@ -42,8 +51,7 @@ def add_or_load_fieldbook_traits(fpath, assays):
             if name in excluded_traits:
                 continue
             data_type = FIELDBOOK_TO_DB_TYPE_TRANSLATOR[type_]
-            trait_type = Cvterm.objects.get(cv__name=TRAIT_TYPES_CV,
-                                            name=data_type)
+            trait_type = get_cvterm(TRAIT_TYPES_CV, data_type)
             trait, created = Trait.objects.get_or_create(name=name,
                                                          type=trait_type)
             for assay in assays:
@@ -56,7 +64,7 @@ def add_or_load_fieldbook_traits(fpath, assays):
                 # We nedd fielbook trait type to generate fieldbook db with the
                 # observations. This is the only data that we need from fieldbook
                 # traits
-                trait_prop_trait = Cvterm.objects.get(name=FIELBOOK_TRAIT_TYPE)
+                trait_prop_trait = get_cvterm('trait_props', FIELBOOK_TRAIT_TYPE)
                 TraitProp.objects.create(trait=trait,
                                          type=trait_prop_trait,
                                          value=type_)
@@ -103,20 +111,31 @@ def add_or_load_fieldbook_fields(fpath, assay, accession_header,
                                          row=row, column=column,
                                          pot_number=pot_number,
                                          seed_lot=seed_lot)
-            assign_perm('view_plant', group, plant)
+            assign_view_perm('view_plant', group, plant)
             AssayPlant.objects.create(plant=plant, assay=assay)
 
 
 def add_or_load_fielbook_observations(fpath, observer, assays, excluded_traits=None,
-                                      plant_part='plant'):
-    fhand = open(fpath)
+                                      plant_part='plant', bulk=False,
+                                      session=None):
+    if session is None:
+        session = ImportSession()
     if excluded_traits is None:
         excluded_traits = getattr(settings,
                                   'EXCLUDED_FIELDBOOK_TRAITS_TO_LOAD_IN_DB', [])
+    if bulk:
+        return merge_fieldbook_observations(fpath, observer, assays,
+                                            excluded_traits=excluded_traits,
+                                            plant_part=plant_part,
+                                            session=session)
+    fhand = open(fpath)
 
     conn = sqlite3.connect(fhand.name)
     cursor = conn.cursor()
-    group = Group.objects.get(name=assays[0])
+    group = session.get_group(assays[0])
+    if plant_part != 'plant':
+        count = cursor.execute("select count(*) from user_traits").fetchone()[0]
+        session.reserve_obs_entity_names(count)
 
     with transaction.atomic():
         for entry in cursor.execute("select * from user_traits"):
@@ -128,11 +147,173 @@ def add_or_load_fielbook_observations(fpath, observer, assays, excluded_traits=N
                                'person': observer}
             add_fieldbook_observations(fieldbook_entry, plant_part=plant_part,
                                        group=group, assay=assays[0],
-                                       excluded_traits=excluded_traits)
+                                       excluded_traits=excluded_traits,
+                                       session=session)
+
+
+def _read_fieldbook_observations(fpath, observer, excluded_traits):
+    'It reads the user_traits table of a fieldbook db in one query'
+    conn = sqlite3.connect(fpath)
+    try:
+        entries = conn.execute('select * from user_traits').fetchall()
+    finally:
+        conn.close()
+    for entry in entries:
+        # the person of a row is the observer of the next ones
+        if len(entry) > 6:
+            if entry[6] != ' ':
+                observer = entry[6]
+        if excluded_traits and entry[2] in excluded_traits:
+            continue
+        yield {'row_number': entry[0], 'plant': entry[1], 'trait': entry[2],
+               'value': entry[4], 'creation_time': parse_datetime(entry[5]),
+               'observer': observer}
+
+
+def _resolve_fieldbook_observation(record, plants, traits,
+                                   structured_type_ids):
+    'It adds the ids of the related objects, ValueError if any is missing'
+    try:
+        record['accession_id'] = plants[record['plant']][1]
+    except KeyError:
+        raise ValueError('{} plant not in db'.format(record['plant']))
+    try:
+        record['trait_id'], trait_type_id = traits[record['trait']]
+    except KeyError:
+        msg = 'Trait not loaded yet in db: {}:{}'
+        raise ValueError(msg.format(record['trait'], record['assay']))
+    value = record['value']
+    if value in (None, '') or value in NOT_ALLOWED_VALUES:
+        msg = ' No value or value has not allowed characters:{} {} {}'
+        raise ValueError(msg.format(record['plant'], record['assay'],
+                                    record['trait']))
+    record['value_json'], record['value_number'] = get_value_columns(trait_type_id,
+                                                                     value,
+                                                                     structured_type_ids)
+
+
+def _get_existing_hashes(hashes):
+    'The given content hashes that are already in the db'
+    hashes = list(hashes)
+    existing = set()
+    for start in range(0, len(hashes), MAX_IDS_IN_QUERY):
+        query = Observation.objects.filter(content_hash__in=hashes[start:start + MAX_IDS_IN_QUERY])
+        existing.update(query.values_list('content_hash', flat=True))
+    return existing
+
+
+def merge_fieldbook_observations(fpath, observer, assays, excluded_traits=None,
+                                 plant_part='plant', chunk_size=BULK_CHUNK_SIZE,
+                                 session=None):
+    '''add_or_load_fielbook_observations for the whole db of a tablet. The
+    plants, traits and obs entities are read with a query per chunk of rows
+    and the observations already loaded are found by their content hash, so
+    only the new ones are added with bulk_create. A tablet db can be loaded
+    again and again, only its new rows are added.
+
+    The obs entities of the plant parts other than plant get a new name for
+    each row, those rows are never found in the db.
+
+    Nothing is added if any row has a plant or a trait not in the db. It
+    returns the number of added observations'''
+    if session is None:
+        session = ImportSession()
+    if excluded_traits is None:
+        excluded_traits = getattr(settings,
+                                  'EXCLUDED_FIELDBOOK_TRAITS_TO_LOAD_IN_DB', [])
+    records = list(_read_fieldbook_observations(fpath, observer,
+                                                excluded_traits))
+    try:
+        assay = session.get_assay(assays[0])
+    except Assay.DoesNotExist:
+        raise ValueError('Assay not loaded yet in db: {}'.format(assays[0]))
+    group = session.get_group(assays[0])
+    part_id = session.get_plant_part(plant_part).cvterm_id
+
+    plants = get_values_by_name(Plant.objects, 'plant_name',
+                                [record['plant'] for record in records],
+                                ['plant_id', 'accession'])
+    traits = {}
+    trait_names = sorted({record['trait'] for record in records})
+    assay_traits = AssayTrait.objects.filter(assay=assay)
+    for start in range(0, len(trait_names), MAX_IDS_IN_QUERY):
+        query = assay_traits.filter(trait__name__in=trait_names[start:start + MAX_IDS_IN_QUERY])
+        for name, trait_id, type_id in query.values_list('trait__name', 'trait',
+                                                         'trait__type'):
+            traits[name] = trait_id, type_id
+    structured_type_ids = get_cvterm_ids(TRAIT_TYPES_CV, STRUCTURED_TRAIT_TYPES)
+    if plant_part != 'plant':
+        session.reserve_obs_entity_names(len(records))
+
+    errors = []
+    resolved = []
+    for record in records:
+        record.update({'assay': assay.name, 'assay_id': assay.assay_id,
+                       'group': group, 'part_id': part_id,
+                       'existing_entity': False})
+        try:
+            _resolve_fieldbook_observation(record, plants, traits,
+                                           structured_type_ids)
+        except ValueError as error:
+            errors.append('Row {}: {}'.format(record['row_number'], error))
+            continue
+        record['obs_entity_name'] = session.suggest_obs_entity_name(record['plant'],
+                                                                    plant_part)
+        resolved.append(record)
+
+    entities = get_values_by_name(ObservationEntity.objects, 'name',
+                                  [record['obs_entity_name'] for record in resolved],
+                                  ['obs_entity_id', 'part'])
+    new_entities = OrderedDict()
+    for record in resolved:
+        try:
+            check_obs_entity(record, entities, new_entities, plants)
+        except ValueError as error:
+            errors.append('Row {}: {}'.format(record['row_number'], error))
+    if errors:
+        raise ValueError('\n'.join(errors))
+
+    with transaction.atomic():
+        entity_ids = {name: values[0] for name, values in entities.items()}
+        entity_ids.update(create_obs_entities(new_entities, plants,
+                                              chunk_size))
+        new_records = OrderedDict()
+        for record in resolved:
+            record['obs_entity_id'] = entity_ids[record['obs_entity_name']]
+            content_hash = observation_content_hash(record['obs_entity_id'],
+                                                    record['trait_id'],
+                                                    record['creation_time'],
+                                                    record['value'])
+            new_records.setdefault(content_hash, record)
+        # the new entities have no observations
+        existing = _get_existing_hashes(content_hash for content_hash, record in new_records.items()
+                                        if record['obs_entity_name'] in entities)
+        new_records = [(content_hash, record) for content_hash, record in new_records.items()
+                       if content_hash not in existing]
+
+        for start in range(0, len(new_records), chunk_size):
+            chunk = new_records[start:start + chunk_size]
+            observations = [Observation(obs_entity_id=record['obs_entity_id'],
+                                        trait_id=record['trait_id'],
+                                        assay_id=record['assay_id'],
+                                        value=record['value'],
+                                        creation_time=record['creation_time'],
+                                        observer=record['observer'],
+                                        value_json=record['value_json'],
+                                        value_number=record['value_number'],
+                                        content_hash=content_hash)
+                            for content_hash, record in chunk]
+            bulk_create_with_pks(Observation, observations,
+                                 batch_size=chunk_size)
+            bulk_assign_view_perm('view_observation', group, observations)
+        if new_records:
+            observations_bulk_created([record['obs_entity_id'] for _, record in new_records],
+                                      [(record['trait_id'], record['assay_id']) for _, record in new_records])
+    return len(new_records)
 
 
 def add_fieldbook_observations(entry, plant_part, assay, group=None,
-                               excluded_traits=None):
+                               excluded_traits=None, session=None):
 
     plant_name = entry['rid']
     trait = entry['parent']
@@ -141,26 +322,27 @@ def add_fieldbook_observations(entry, plant_part, assay, group=None,
     value = entry['userValue']
     creation_time = parse_datetime(entry['timeTaken'])
     observer = entry['person']
-    obs_entity_name = suggest_obs_entity_name(plant_name, plant_part)
+    if session is None:
+        session = ImportSession()
+    obs_entity_name = session.suggest_obs_entity_name(plant_name, plant_part)
 
-    plant = Plant.objects.get(plant_name=plant_name)
-    plant_part_cv = Cvterm.objects.get(cv__name='plant_parts',
-                                       name=plant_part)
+    plant = session.get_plant(plant_name)
+    plant_part_cv = session.get_plant_part(plant_part)
     obs_entity, created = ObservationEntity.objects.get_or_create(name=obs_entity_name,
                                                                   part=plant_part_cv)
 
-    Assay.objects.get(name=assay)
+    session.get_assay(assay)
     if group is None:
-        group = Group.objects.get(name=assay)
+        group = session.get_group(assay)
     if created:
         ObservationEntityPlant.objects.create(obs_entity=obs_entity,
                                               plant=plant)
-        assign_perm('view_obs_entity', group, obs_entity)
+        assign_view_perm('view_obs_entity', group, obs_entity)
 
     observation = add_observation(obs_entity, trait, assay, value, creation_time,
-                                  observer, force=False)
+                                  observer, force=False, session=session)
 
-    assign_perm('view_observation', group, observation)
+    assign_view_perm('view_observation', group, observation)
     return observation, created
 
 
@@ -178,27 +360,6 @@ def _create_empty_fieldbook_db(fhand):
     con.commit()
 
 
-def _get_db_engine():
-    return site_settings.DATABASES['default']['ENGINE'].split('.')[-1]
-
-
-SQLITE3_QUERY = '''
-SELECT * FROM vavilov_observation AS o
-INNER JOIN vavilov_observation_entity AS oe
-WHERE o.obs_entity_id=oe.obs_entity_id and oe.obs_entity_id IN {}
-    AND (o.creation_time = (SELECT MAX(creation_time)
-                            FROM vavilov_observation AS o2
-                            WHERE o.obs_entity_id=o2.obs_entity_id AND o.trait_id=o2.trait_id))'''
-
-POSTGRES_QUERY = '''
-SELECT * FROM vavilov_observation AS o
-INNER JOIN vavilov_observation_entity AS oe
-ON o.obs_entity_id=oe.obs_entity_id and oe.obs_entity_id IN {}
-    AND (o.creation_time = (SELECT MAX(creation_time)
-                            FROM vavilov_observation AS o2
-                            WHERE o.obs_entity_id=o2.obs_entity_id AND o.trait_id=o2.trait_id))'''
-
-
 def to_fieldbook_local_time(utf_datetime):
     local_datetimetime = OUR_TIMEZONE.normalize(utf_datetime.astimezone(OUR_TIMEZONE))
     return local_datetimetime.strftime('%Y-%m-%d %H:%M:%S%z')
@@ -213,31 +374,16 @@ def to_fieldbook_local_time(utf_datetime):
 #     return sqlized_plant_ids
 
 
-def _encode_obs_entity_id_for_sql(plants, plant_part):
-    query = Q(observationentityplant__plant__plant_name__in=plants) & Q(part__name=plant_part)
-    plantpartquery = ObservationEntity.objects.filter(query).values('obs_entity_id')
-    obs_entity_ids = [plant_part['obs_entity_id'] for plant_part in plantpartquery]
-    if len(obs_entity_ids) == 1:
-        sqlized_obs_entity_ids = '({})'.format(obs_entity_ids[0])
-    else:
-        sqlized_obs_entity_ids = str(tuple(obs_entity_ids))
-    return sqlized_obs_entity_ids
-
-
 def insert_newest_observations(fhand, plants, excluded_traits=None,
                                plant_part='plant'):
     _create_empty_fieldbook_db(fhand)
-    engine = _get_db_engine()
     con = sqlite3.connect(fhand.name)
     cur = con.cursor()
-    query = Observation.objects
-
-    if engine == 'sqlite3':
-        query = query.raw(SQLITE3_QUERY.format(_encode_obs_entity_id_for_sql(plants, plant_part)))
-    elif engine == 'postgresql_psycopg2':
-        query = query.raw(POSTGRES_QUERY.format(_encode_obs_entity_id_for_sql(plants, plant_part)))
-    else:
-        raise NotImplementedError('This raw query is not implemented yet using this engine')
+    obs_entities = ObservationEntity.objects.filter(observationentityplant__plant__plant_name__in=plants,
+                                                    part__name=plant_part)
+    latests = LatestObservation.objects.filter(obs_entity__in=obs_entities)
+    query = Observation.objects.filter(observation_id__in=latests.values('observation'))
+    query = query.select_related('trait')
 
     for index, observation in enumerate(query):
         if excluded_traits and observation.trait.name in excluded_traits:
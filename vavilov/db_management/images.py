@@ -1,17 +1,20 @@
+import csv
 import datetime
+from multiprocessing import Pool
 import os
 
-from django.contrib.auth.models import Group
-from django.core.files.uploadedfile import SimpleUploadedFile
-from guardian.shortcuts import assign_perm
-
 from imagetools.exif import get_exif_comments, get_exif_metadata
 from imagetools.utils import get_image_format, get_all_image_fpaths
-from vavilov.conf.settings import OUR_TIMEZONE
-from vavilov.db_management.phenotype import suggest_obs_entity_name
+from vavilov.conf.settings import OUR_TIMEZONE, IMAGE_DERIVATIVE_SIZES
+from vavilov.db_management.phenotype import ImportSession
 from vavilov.models import (Plant, Assay, Trait, ObservationImages,
                             Accession, Cvterm, ObservationEntity,
-                            ObservationEntityPlant, Observation)
+                            ObservationEntityPlant, Observation,
+                            get_cvterm)
+from vavilov.permissions import assign_view_perm
+from vavilov.utils.image_derivatives import (THUMBNAILS_DIR,
+                                             get_derivative_path,
+                                             make_image_derivatives)
 
 
 PLANT_PART = 'plant_part'
@@ -21,30 +24,61 @@ MAGIC_NUMBERS_BY_FORMAT = {'jpg': [b'\xFF\xD8\xFF\xE0', b'\xFF\xD8\xFF\xDB',
                            'gif': [b'\x47\x49\x46\x38\x39\x61',
                                    b'\x47\x49\x46\x38\x37\x61'],
                            'png': [b'\x89\x50\x4E\x47\x0D\x0A\x1A\x0A']}
+# Images sent to each process of the pool at once
+IMAGE_SCAN_CHUNK_SIZE = 50
 
 
 def get_thumbnail_path(photo_path, image_format):
-    photo_dir, fname = os.path.split(photo_path)
-    thumbnail_dir = os.path.join(photo_dir, 'thumbnails')
-    return os.path.join(thumbnail_dir, fname)
+    return get_derivative_path(photo_path, THUMBNAILS_DIR)
 
 
-def add_or_load_image_to_db(image_fpath, view_perm_group=None,
-                            create_plant=False,
-                            use_image_id_as_plant_id=False):
-    image_format = get_image_format(image_fpath)
-    thumb_fpath = get_thumbnail_path(image_fpath, image_format)
+def get_photo_fpaths(pheno_photo_dir):
+    'The photos of the dir, without their derivatives'
+    derivative_dirs = set(IMAGE_DERIVATIVE_SIZES) | {THUMBNAILS_DIR}
+    for fpath in get_all_image_fpaths(pheno_photo_dir, thumbnails=False):
+        if os.path.basename(os.path.dirname(fpath)) not in derivative_dirs:
+            yield fpath
 
-    exif = get_exif_metadata(image_fpath)
 
+def read_image_metadata(image_fpath):
+    '''It reads the exif of the image. It does not use the db, so the images
+    can be read in other processes'''
+    exif = get_exif_metadata(image_fpath)
     try:
         creation_time = exif.get_date_time()
-        creation_time = OUR_TIMEZONE.localize(creation_time, is_dst=True)
     except (KeyError, ValueError):
+        creation_time = None
+    return {'format': get_image_format(image_fpath),
+            'creation_time': creation_time,
+            'comments': get_exif_comments(image_fpath)}
+
+
+def _get_stored_name(obs_image, field_name, fpath):
+    # the name the storage gives to the file, it only keeps the path so the
+    # file is not read
+    field = ObservationImages._meta.get_field(field_name)
+    return field.generate_filename(obs_image, os.path.basename(fpath))
+
+
+def add_or_load_image_to_db(image_fpath, view_perm_group=None,
+                            create_plant=False,
+                            use_image_id_as_plant_id=False, metadata=None,
+                            make_derivatives=False, session=None):
+    if session is None:
+        session = ImportSession()
+    if make_derivatives:
+        make_image_derivatives(image_fpath)
+    if metadata is None:
+        metadata = read_image_metadata(image_fpath)
+    image_format = metadata['format']
+    thumb_fpath = get_thumbnail_path(image_fpath, image_format)
+
+    creation_time = metadata['creation_time']
+    if creation_time is None:
         creation_time = datetime.datetime.now()
-        creation_time = OUR_TIMEZONE.localize(creation_time, is_dst=True)
+    creation_time = OUR_TIMEZONE.localize(creation_time, is_dst=True)
 
-    exif_data = get_exif_comments(image_fpath)
+    exif_data = metadata['comments']
     try:
         image_id = exif_data['image_id']
     except KeyError:
@@ -71,51 +105,51 @@ def add_or_load_image_to_db(image_fpath, view_perm_group=None,
         raise ValueError('Assay information not in exif')
 
     try:
-        assay = Assay.objects.get(name=assay)
+        assay = session.get_assay(assay)
     except Assay.DoesNotExist:
         raise ValueError('Assay not loaded to db yet: {}'.format(assay))
 
     if view_perm_group is None:
         view_perm_group = assay.name
-    group = Group.objects.get(name=view_perm_group)
+    group = session.get_group(view_perm_group)
     if create_plant:
         try:
             accession_number = exif_data['Accession']
         except KeyError:
             accession_number = exif_data['accession']
         try:
-            accession = Accession.objects.get(accession_number=accession_number)
+            accession = session.get_accession(accession_number)
         except Accession.DoesNotExist:
             print(accession_number, image_fpath)
             return
         plant = Plant.objects.get_or_create(accession=accession,
                                             plant_name=plant_id)[0]
-        assign_perm('view_plant', group, plant)
+        assign_view_perm('view_plant', group, plant)
     else:
         try:
-            plant = Plant.objects.get(plant_name=plant_id)
+            plant = session.get_plant(plant_id)
         except Plant.DoesNotExist:
             raise ValueError('Plant from image not loaded to db yet: {}'.format(plant_id))
 
     part_name = exif_data[PLANT_PART].lower()
     try:
-        part_type = Cvterm.objects.get(cv__name='plant_parts', name=part_name)
+        part_type = get_cvterm('plant_parts', part_name)
     except Cvterm.DoesNotExist:
         print('{} plant part not in db'.format(part_name))
         raise
 
-    obs_entity_name = suggest_obs_entity_name(plant_id, part_name)
+    obs_entity_name = session.suggest_obs_entity_name(plant_id, part_name)
     obs_entity, created = ObservationEntity.objects.get_or_create(name=obs_entity_name,
                                                                   part=part_type)
     if created:
-        assign_perm('vavilov.view_obs_entity', group, obs_entity)
+        assign_view_perm('vavilov.view_obs_entity', group, obs_entity)
         ObservationEntityPlant.objects.create(obs_entity=obs_entity,
                                               plant=plant)
 
     trait_name = 'image_{}'.format(part_name)
 
     try:
-        trait = Trait.objects.get(name=trait_name, assaytrait__assay=assay)
+        trait = session.get_trait(trait_name, assay)
     except Trait.DoesNotExist:
         msg = 'Trait not loaded to db yet: {}, assay {}'
         raise ValueError(msg.format(trait_name, assay))
@@ -124,28 +158,91 @@ def add_or_load_image_to_db(image_fpath, view_perm_group=None,
                                              assay=assay,
                                              trait=trait,
                                              creation_time=creation_time)
-    assign_perm('vavilov.view_observation', group, observation)
-    content_type = 'image/{}'.format(image_format)
-
-    image_suf = SimpleUploadedFile(os.path.basename(image_fpath),
-                                   open(image_fpath, 'rb').read(),
-                                   content_type=content_type)
-
-    thumb_suf = SimpleUploadedFile(os.path.basename(thumb_fpath),
-                                   open(thumb_fpath, 'rb').read(),
-                                   content_type=content_type)
-    obs_image = ObservationImages.objects.create(observation=observation,
-                                                 observation_image_uid=image_id,
-                                                 image=image_suf,
-                                                 thumbnail=thumb_suf)
-
-    assign_perm('vavilov.view_observation_images', group, obs_image)
+    assign_view_perm('vavilov.view_observation', group, observation)
+    if not os.path.exists(thumb_fpath):
+        raise FileNotFoundError('Thumbnail not found: {}'.format(thumb_fpath))
+    obs_image = ObservationImages(observation=observation,
+                                  observation_image_uid=image_id)
+    obs_image.image = _get_stored_name(obs_image, 'image', image_fpath)
+    obs_image.thumbnail = _get_stored_name(obs_image, 'thumbnail', thumb_fpath)
+    obs_image.save()
+
+    assign_view_perm('vavilov.view_observation_images', group, obs_image)
     return obs_image
 
 
+def _read_manifest(manifest_fpath):
+    'The size, modification time and image_id of the loaded images by path'
+    if manifest_fpath is None or not os.path.exists(manifest_fpath):
+        return {}
+    with open(manifest_fpath, newline='') as fhand:
+        return {row[0]: (int(row[1]), int(row[2]), row[3])
+                for row in csv.reader(fhand, dialect='excel-tab')}
+
+
+def _write_manifest(manifest_fpath, manifest):
+    # it is written in a part file and renamed, a failed write does not
+    # spoil the previous one
+    part_fpath = manifest_fpath + '.part'
+    with open(part_fpath, 'w', newline='') as fhand:
+        writer = csv.writer(fhand, dialect='excel-tab')
+        for path, values in sorted(manifest.items()):
+            writer.writerow((path,) + values)
+    os.rename(part_fpath, manifest_fpath)
+
+
+def _read_image(args):
+    image_fpath, make_derivatives = args
+    if make_derivatives:
+        make_image_derivatives(image_fpath)
+    return read_image_metadata(image_fpath)
+
+
+def _read_images(image_fpaths, make_derivatives, processes):
+    args = ((image_fpath, make_derivatives) for image_fpath in image_fpaths)
+    if processes == 1:
+        yield from map(_read_image, args)
+        return
+    with Pool(processes) as pool:
+        yield from pool.imap(_read_image, args,
+                             chunksize=IMAGE_SCAN_CHUNK_SIZE)
+
+
 def add_or_load_images(pheno_photo_dir, view_perm_group=None,
-                       create_plant=False, use_image_id_as_plant_id=False):
-    for image_path in get_all_image_fpaths(pheno_photo_dir, thumbnails=False):
-        add_or_load_image_to_db(image_path, view_perm_group=view_perm_group,
-                                create_plant=create_plant,
-                                use_image_id_as_plant_id=use_image_id_as_plant_id)
+                       create_plant=False, use_image_id_as_plant_id=False,
+                       manifest_fpath=None, make_derivatives=False,
+                       processes=1):
+    '''It adds the images of the dir. The exif of the images is read in
+    processes, and their thumbnails and other derivatives are made in them
+    if make_derivatives.
+
+    The manifest keeps the size, modification time and image_id of the
+    loaded images, the images that have not changed since they were loaded
+    are not read again'''
+    session = ImportSession()
+    manifest = _read_manifest(manifest_fpath)
+    loaded, to_read = {}, []
+    for image_fpath in get_photo_fpaths(pheno_photo_dir):
+        path = os.path.relpath(image_fpath, pheno_photo_dir)
+        stat = os.stat(image_fpath)
+        file_key = (stat.st_size, stat.st_mtime_ns)
+        if path in manifest and manifest[path][:2] == file_key:
+            loaded[path] = manifest[path]
+        else:
+            to_read.append((image_fpath, path, file_key))
+
+    try:
+        metadatas = _read_images([image_fpath for image_fpath, _, _ in to_read],
+                                 make_derivatives, processes)
+        for (image_fpath, path, file_key), metadata in zip(to_read, metadatas):
+            obs_image = add_or_load_image_to_db(image_fpath,
+                                                view_perm_group=view_perm_group,
+                                                create_plant=create_plant,
+                                                use_image_id_as_plant_id=use_image_id_as_plant_id,
+                                                metadata=metadata,
+                                                session=session)
+            if obs_image is not None:
+                loaded[path] = file_key + (obs_image.observation_image_uid,)
+    finally:
+        if manifest_fpath is not None:
+            _write_manifest(manifest_fpath, loaded)
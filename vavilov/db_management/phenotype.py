@@ -1,7 +1,7 @@
+from collections import OrderedDict
 import csv
 import datetime
-import os
-from random import Random
+from itertools import chain
 import sys
 import json
 
@@ -11,13 +11,20 @@ from django.db.utils import DataError
 from guardian.shortcuts import assign_perm
 
 from vavilov.conf.settings import OUR_TIMEZONE
-from vavilov.db_management.base import comma_dialect
+from vavilov.db_management.base import comma_dialect, bulk_create_with_pks
 from vavilov.db_management.excel import excel_dict_reader
 from vavilov.models import (Observation, Trait, Assay, AssayPlant,
                             Cvterm, TraitProp, AssayTrait, AssayProp, Plant,
                             Accession, ObservationEntity,
                             ObservationEntityPlant, ObservationImages,
-                            ObservationRelationship)
+                            ObservationRelationship, get_cvterm,
+                            get_cvterm_ids, parse_observation_value,
+                            STRUCTURED_TRAIT_TYPES, MAX_IDS_IN_QUERY,
+                            observation_content_hash,
+                            observation_value_to_number,
+                            observations_bulk_created,
+                            reserve_sequence_values)
+from vavilov.permissions import assign_view_perm, bulk_assign_view_perm
 
 NOT_ALLOWED_VALUES = ('.',)
 TRAIT_PROPS_CV = 'trait_props'
@@ -30,6 +37,9 @@ PLANT_HEADER = 'Plant_name'
 ACCESSION_HEADER = 'Accession'
 PHOTO_HEADER = 'Photo id'
 
+# Rows inserted in each bulk_create
+BULK_CHUNK_SIZE = 1000
+
 
 def add_or_load_assays(fpath):
     fhand = open(fpath)
@@ -65,8 +75,7 @@ def add_or_load_assays(fpath):
             assay = Assay.objects.create(**assay_data)
 
             for key, value in props.items():
-                type_ = Cvterm.objects.get(cv__name='assay_props',
-                                           name=key)
+                type_ = get_cvterm('assay_props', key)
                 AssayProp.objects.create(assay=assay, type=type_,
                                          value=value)
             group = Group.objects.get_or_create(name=assay.name)[0]
@@ -74,14 +83,24 @@ def add_or_load_assays(fpath):
             group.user_set.add(owner)
 
 
+def get_value_columns(trait_type_id, value, structured_type_ids):
+    'It returns the value_json and value_number of an observation value'
+    value_json = None
+    if trait_type_id in structured_type_ids:
+        value_json = json.dumps(parse_observation_value(value))
+    return value_json, observation_value_to_number(value)
+
+
 def add_observation(obs_entity, trait_name, assay_name, value, creation_time,
-                    observer=None, force=True):
+                    observer=None, force=True, session=None):
+    if session is None:
+        session = ImportSession()
     try:
-        assay = Assay.objects.get(name=assay_name)
+        assay = session.get_assay(assay_name)
     except Assay.DoesNotExist:
         raise ValueError('Assay not loaded yet in db: {}'.format(assay_name))
     try:
-        trait = Trait.objects.get(name=trait_name, assaytrait__assay=assay)
+        trait = session.get_trait(trait_name, assay)
     except Trait.DoesNotExist:
         raise ValueError('Trait not loaded yet in db: {}:{}'.format(trait_name,
                                                                     assay_name))
@@ -98,18 +117,31 @@ def add_observation(obs_entity, trait_name, assay_name, value, creation_time,
         msg = msg.format(obs_entity.accession.accession_number, assay.name,
                          trait.name)
         raise ValueError(msg)
+    structured_type_ids = get_cvterm_ids(TRAIT_TYPES_CV, STRUCTURED_TRAIT_TYPES)
+    value_json, value_number = get_value_columns(trait.type_id, value,
+                                                 structured_type_ids)
     try:
         if force:
             obs = Observation.objects.create(obs_entity=obs_entity, trait=trait,
                                              assay=assay, value=value,
                                              creation_time=creation_time,
-                                             observer=observer)
+                                             observer=observer,
+                                             value_json=value_json,
+                                             value_number=value_number)
         else:
-            obs = Observation.objects.get_or_create(obs_entity=obs_entity,
-                                                    trait=trait, assay=assay,
-                                                    value=value,
-                                                    creation_time=creation_time,
-                                                    observer=observer)[0]
+            # the same content is not added twice
+            content_hash = observation_content_hash(obs_entity.obs_entity_id,
+                                                    trait.trait_id,
+                                                    creation_time, value)
+            obs = Observation.objects.get_or_create(content_hash=content_hash,
+                                                    defaults={'obs_entity': obs_entity,
+                                                              'trait': trait,
+                                                              'assay': assay,
+                                                              'value': value,
+                                                              'creation_time': creation_time,
+                                                              'observer': observer,
+                                                              'value_json': value_json,
+                                                              'value_number': value_number})[0]
     except DataError:
         print(value, observer)
         raise
@@ -123,7 +155,7 @@ def add_or_load_excel_traits(fpath, assays):
             type_ = row.pop('type')
             #description = row.get('description', None)
             try:
-                type_ = Cvterm.objects.get(name=type_, cv__name=TRAIT_TYPES_CV)
+                type_ = get_cvterm(TRAIT_TYPES_CV, type_)
             except Cvterm.DoesNotExist:
                 msg = 'Trait type not loaded yet in db: {}'.format(type_)
                 raise RuntimeError(msg)
@@ -145,8 +177,7 @@ def add_or_load_excel_traits(fpath, assays):
                     if not prop_value:
                         continue
                     try:
-                        prop_type = Cvterm.objects.get(cv__name=TRAIT_PROPS_CV,
-                                                       name=prop)
+                        prop_type = get_cvterm(TRAIT_PROPS_CV, prop)
                     except Cvterm.DoesNotExist:
                         print('#{}#'.format(prop))
                         raise
@@ -194,71 +225,119 @@ def add_or_load_plants(fpath, assay, experimental_field_header=None,
                                              row=row, column=column,
                                              pot_number=pot_number)
 
-                assign_perm('view_plant', group, plant)
+                assign_view_perm('view_plant', group, plant)
             AssayPlant.objects.get_or_create(assay=assay, plant=plant)
 
 
-class RandomNameSequence:
-    """An instance of _RandomNameSequence generates an endless
-    sequence of unpredictable strings which can safely be incorporated
-    into file names.  Each string is six characters long.  Multiple
-    threads can safely use the same instance at the same time.
+OBS_ENTITY_NAME_SEQUENCE = 'obs_entity_name'
+# the blocks of obs entity numbers reserved by a session double up to this
+# size, a single name takes a single number
+MAX_OBS_ENTITY_NAME_BLOCK = 1024
 
-    _RandomNameSequence is an iterator."""
 
-    characters = "abcdefghijklmnopqrstuvwxyz0123456789"
+def _format_obs_entity_name(plant_name, plant_part, number):
+    # the upper case N keeps them apart from the names with a random lower
+    # case suffix given before
+    return '{}_{}_N{}'.format(plant_name, plant_part, number)
 
-    @property
-    def rng(self):
-        cur_pid = os.getpid()
-        if cur_pid != getattr(self, '_rng_pid', None):
-            self._rng = Random()
-            self._rng_pid = cur_pid
-        return self._rng
 
-    def __iter__(self):
-        return self
+class ImportSession:
+    '''It memoizes the objects looked up while loading data, the loaders that
+    share a session resolve each plant part, accession, assay, group, trait
+    and plant once for the whole run.
 
-    def __next__(self):
-        c = self.characters
-        choose = self.rng.choice
-        letters = [choose(c) for dummy in range(8)]
-        return ''.join(letters)
+    The obs entity names are numbered from a sequence, the session reserves
+    the numbers in blocks so no name has to be checked in the db. The
+    reservation locks the sequence until its transaction ends, the loaders
+    reserve the names of a file before the transaction that loads it'''
 
+    def __init__(self):
+        self._accessions = {}
+        self._assays = {}
+        self._groups = {}
+        self._traits = {}
+        self._plants = {}
+        self._entity_numbers = iter(())
+        self._entity_name_block = 1
 
-NAMER = RandomNameSequence()
-
+    def get_plant_part(self, plant_part):
+        try:
+            return get_cvterm('plant_parts', plant_part)
+        except Cvterm.DoesNotExist:
+            msg = '{} plant part not in cvterm table'.format(plant_part)
+            raise ValueError(msg)
 
-def suggest_obs_entity_name(plant_name, plant_part):
-    if plant_part == 'plant':
-        return '{}_{}'.format(plant_name, plant_part)
-    obs_ent_name = '{}_{}_{}'.format(plant_name, plant_part, next(NAMER))
-    try:
-        ObservationEntity.objects.get(name=obs_ent_name)
-    except ObservationEntity.DoesNotExist:
-        return obs_ent_name
-    else:
-        return suggest_obs_entity_name(plant_name, plant_part)
+    # only the found objects are memoized, a missing one keeps raising
+    # DoesNotExist and the callers report it with their own message
+    def get_accession(self, accession_number):
+        if accession_number not in self._accessions:
+            accession = Accession.objects.get(accession_number=accession_number)
+            self._accessions[accession_number] = accession
+        return self._accessions[accession_number]
+
+    def get_assay(self, assay_name):
+        if assay_name not in self._assays:
+            self._assays[assay_name] = Assay.objects.get(name=assay_name)
+        return self._assays[assay_name]
+
+    def get_group(self, group_name):
+        if group_name not in self._groups:
+            self._groups[group_name] = Group.objects.get(name=group_name)
+        return self._groups[group_name]
+
+    def get_trait(self, trait_name, assay):
+        key = (trait_name, assay.assay_id)
+        if key not in self._traits:
+            self._traits[key] = Trait.objects.get(name=trait_name,
+                                                  assaytrait__assay=assay)
+        return self._traits[key]
+
+    def get_plant(self, plant_name):
+        if plant_name not in self._plants:
+            self._plants[plant_name] = Plant.objects.get(plant_name=plant_name)
+        return self._plants[plant_name]
+
+    def reserve_obs_entity_names(self, count):
+        'It reserves the numbers of the next count names in one query'
+        if not count:
+            return
+        numbers = reserve_sequence_values(OBS_ENTITY_NAME_SEQUENCE, count)
+        self._entity_numbers = chain(self._entity_numbers, numbers)
+
+    def suggest_obs_entity_name(self, plant_name, plant_part):
+        if plant_part == 'plant':
+            return '{}_{}'.format(plant_name, plant_part)
+        number = next(self._entity_numbers, None)
+        if number is None:
+            self.reserve_obs_entity_names(self._entity_name_block)
+            self._entity_name_block = min(self._entity_name_block * 2,
+                                          MAX_OBS_ENTITY_NAME_BLOCK)
+            number = next(self._entity_numbers)
+        return _format_obs_entity_name(plant_name, plant_part, number)
+
+
+def suggest_obs_entity_name(plant_name, plant_part, session=None):
+    if session is None:
+        session = ImportSession()
+    return session.suggest_obs_entity_name(plant_name, plant_part)
 
 
 def get_or_create_obs_entity(accession_number, assay_name, plant_part,
                              plant_name=None, obs_entity_name=None,
                              plant_number=None, perm_gr=None,
-                             one_part_per_plant=False, photo_uuid=None):
-    try:
-        plant_part_type = Cvterm.objects.get(cv__name='plant_parts',
-                                             name=plant_part)
-    except Cvterm.DoesNotExist:
-        msg = '{} plant part not in cvterm table'.format(plant_part)
-        raise ValueError(msg)
+                             one_part_per_plant=False, photo_uuid=None,
+                             session=None):
+    if session is None:
+        session = ImportSession()
+    plant_part_type = session.get_plant_part(plant_part)
 
     try:
-        accession = Accession.objects.get(accession_number=accession_number)
+        accession = session.get_accession(accession_number)
     except Accession.DoesNotExist:
         msg = '{} accession not in db'.format(accession_number)
         raise ValueError(msg)
     try:
-        assay = Assay.objects.get(name=assay_name)
+        assay = session.get_assay(assay_name)
     except Assay.DoesNotExist:
         msg = '{} assay not in db'.format(assay_name)
         raise ValueError(msg)
@@ -278,31 +357,32 @@ def get_or_create_obs_entity(accession_number, assay_name, plant_part,
         obs_ent, created = ObservationEntity.objects.get_or_create(name=obs_entity_name,
                                                                    part=plant_part_type)
         if created:
-            assign_perm('view_obs_entity', perm_gr, obs_ent)
+            assign_view_perm('view_obs_entity', perm_gr, obs_ent)
             plant, p_creat = Plant.objects.get_or_create(plant_name=plant_name,
                                                          accession=accession)
             ObservationEntityPlant.objects.get_or_create(obs_entity=obs_ent,
                                                          plant=plant)
             if p_creat:
-                assign_perm('view_plant', perm_gr, plant)
+                assign_view_perm('view_plant', perm_gr, plant)
 
                 AssayPlant.objects.create(plant=plant, assay=assay)
     elif plant_name:
         if not one_part_per_plant:
-            obs_entity_name = suggest_obs_entity_name(plant_name, plant_part)
+            obs_entity_name = session.suggest_obs_entity_name(plant_name,
+                                                              plant_part)
         else:
             obs_entity_name = '{}_{}'.format(plant_name, plant_part)
         obs_ent, created = ObservationEntity.objects.get_or_create(name=obs_entity_name,
                                                                    part=plant_part_type)
 
         if created:
-            assign_perm('view_obs_entity', perm_gr, obs_ent)
+            assign_view_perm('view_obs_entity', perm_gr, obs_ent)
             plant, p_creat = Plant.objects.get_or_create(plant_name=plant_name,
                                                          accession=accession)
             ObservationEntityPlant.objects.get_or_create(obs_entity=obs_ent,
                                                          plant=plant)
             if p_creat:
-                assign_perm('view_plant', perm_gr, plant)
+                assign_view_perm('view_plant', perm_gr, plant)
                 AssayPlant.objects.create(plant=plant, assay=assay)
 
     elif plant_number:
@@ -312,7 +392,7 @@ def get_or_create_obs_entity(accession_number, assay_name, plant_part,
         obs_ent, created = ObservationEntity.objects.get_or_create(name=obs_entity_name,
                                                                    part=plant_part_type)
         if created:
-            assign_perm('view_obs_entity', perm_gr, obs_ent)
+            assign_view_perm('view_obs_entity', perm_gr, obs_ent)
             plant_name = '{}_{}_{}'.format(accession.accession_number,
                                            assay.name, plant_number)
             plant, p_creat = Plant.objects.get_or_create(plant_name=plant_name,
@@ -320,7 +400,7 @@ def get_or_create_obs_entity(accession_number, assay_name, plant_part,
             ObservationEntityPlant.objects.get_or_create(obs_entity=obs_ent,
                                                          plant=plant)
             if p_creat:
-                assign_perm('view_plant', perm_gr, plant)
+                assign_view_perm('view_plant', perm_gr, plant)
 
                 AssayPlant.objects.create(plant=plant, assay=assay)
     else:
@@ -332,7 +412,7 @@ def get_or_create_obs_entity(accession_number, assay_name, plant_part,
         obs_ent, created = ObservationEntity.objects.get_or_create(name=obs_entity_name,
                                                                    part=plant_part_type)
         if created:
-            assign_perm('view_obs_entity', perm_gr, obs_ent)
+            assign_view_perm('view_obs_entity', perm_gr, obs_ent)
             plants = Plant.objects.filter(accession=accession,
                                           assayplant__assay=assay)
             if not plants:
@@ -372,9 +452,29 @@ def add_excel_observations(fpath, observer=None, assay=None,
                            trait_header='trait',
                            view_perm_group=None,
                            raise_on_error=True,
-                           qualitative_translator=None):
+                           qualitative_translator=None,
+                           bulk=False, session=None):
+    if session is None:
+        session = ImportSession()
+    if bulk:
+        headers = {'accession': accession_header, 'value': value_header,
+                   'date': date_header, 'observer': observer_header,
+                   'assay': assay_header, 'plant_part': plant_part_header,
+                   'obs_uid': obs_uid_header, 'plant_name': plant_name_header,
+                   'plant_number': plant_number_header,
+                   'trait': trait_header}
+        return bulk_add_excel_observations(fpath, headers, observer=observer,
+                                           assay=assay, plant_part=plant_part,
+                                           view_perm_group=view_perm_group,
+                                           raise_on_error=raise_on_error,
+                                           qualitative_translator=qualitative_translator,
+                                           session=session)
+    rows = list(excel_dict_reader(fpath))
+    session.reserve_obs_entity_names(len([row for row in rows
+                                          if (not row.get(obs_uid_header) and
+                                              row.get(plant_part_header, plant_part) != 'plant')]))
     with transaction.atomic():
-        for row in excel_dict_reader(fpath):
+        for row in rows:
             value = row.get(value_header, None)
             if value is None or value == 'nd':
                 continue
@@ -388,7 +488,7 @@ def add_excel_observations(fpath, observer=None, assay=None,
 
             if view_perm_group is None:
                 view_perm_group = assayname
-            perm_gr = Group.objects.get(name=view_perm_group)
+            perm_gr = session.get_group(view_perm_group)
             try:
                 obs_entity = get_or_create_obs_entity(accession_number=accession,
                                                       assay_name=assayname,
@@ -396,7 +496,8 @@ def add_excel_observations(fpath, observer=None, assay=None,
                                                       plant_name=plant_name,
                                                       obs_entity_name=obs_entity_name,
                                                       plant_number=plant_number,
-                                                      perm_gr=perm_gr)
+                                                      perm_gr=perm_gr,
+                                                      session=session)
             except ValueError as error:
                 if raise_on_error:
                     raise
@@ -425,8 +526,9 @@ def add_excel_observations(fpath, observer=None, assay=None,
 
             try:
                 obs = add_observation(obs_entity, trait_name, assayname,
-                                      value, creation_time, observer)
-                assign_perm('view_observation', perm_gr, obs)
+                                      value, creation_time, observer,
+                                      session=session)
+                assign_view_perm('view_observation', perm_gr, obs)
             except ValueError as error:
                 if raise_on_error:
                     raise
@@ -435,6 +537,292 @@ def add_excel_observations(fpath, observer=None, assay=None,
                     continue
 
 
+def _read_excel_observations(fpath, headers, observer, assay, plant_part,
+                             view_perm_group, qualitative_translator, errors):
+    for row_number, row in enumerate(excel_dict_reader(fpath), 2):
+        value = row.get(headers['value'], None)
+        if value is None or value == 'nd':
+            continue
+        assay_name = row.get(headers['assay'], assay)
+        if view_perm_group is None:
+            view_perm_group = assay_name
+        trait_name = row.get(headers['trait'])
+
+        if qualitative_translator:
+            try:
+                value = qualitative_translator[trait_name][str(value)]
+            except KeyError:
+                msg = 'Qualitative trait "{}" has no {} value in translator'
+                errors.append((row_number, msg.format(trait_name, value)))
+                continue
+
+        creation_time = row.get(headers['date'])
+        if creation_time is None:
+            creation_time = datetime.datetime.now()
+        creation_time = OUR_TIMEZONE.localize(creation_time, is_dst=True)
+        yield {'row_number': row_number,
+               'accession': row.get(headers['accession'], None),
+               'assay': assay_name,
+               'plant_part': row.get(headers['plant_part'], plant_part),
+               'plant_name': row.get(headers['plant_name'], None),
+               'obs_entity_name': row.get(headers['obs_uid'], None),
+               'plant_number': row.get(headers['plant_number'], None),
+               'group': view_perm_group,
+               'trait': trait_name,
+               'value': value,
+               'creation_time': creation_time,
+               'observer': row.get(headers['observer'], observer)}
+
+
+def get_values_by_name(queryset, name_field, names, fields):
+    'It returns the fields of the objects with the given names in chunks'
+    names = [name for name in set(names) if name is not None]
+    values_by_name = {}
+    for start in range(0, len(names), MAX_IDS_IN_QUERY):
+        chunk = names[start:start + MAX_IDS_IN_QUERY]
+        query = queryset.filter(**{name_field + '__in': chunk})
+        for values in query.values_list(name_field, *fields):
+            values_by_name[values[0]] = values[1:]
+    return values_by_name
+
+
+def _resolve_excel_observation(record, groups, accessions, assays, traits,
+                               structured_type_ids, session):
+    'It adds the ids of the related objects, ValueError if any is missing'
+    try:
+        record['group'] = groups[record['group']]
+    except KeyError:
+        raise ValueError('{} group not in db'.format(record['group']))
+    plant_part = record['plant_part']
+    record['part_id'] = session.get_plant_part(plant_part).cvterm_id
+    accession_number = record['accession']
+    try:
+        record['accession_id'] = accessions[accession_number][0]
+    except KeyError:
+        raise ValueError('{} accession not in db'.format(accession_number))
+    assay_name = record['assay']
+    try:
+        record['assay_id'] = assays[assay_name][0]
+    except KeyError:
+        raise ValueError('{} assay not in db'.format(assay_name))
+    try:
+        trait_id, trait_type_id = traits[(record['trait'], record['assay_id'])]
+    except KeyError:
+        msg = 'Trait not loaded yet in db: {}:{}'
+        raise ValueError(msg.format(record['trait'], assay_name))
+    record['trait_id'] = trait_id
+
+    value = record['value']
+    if value == '' or value in NOT_ALLOWED_VALUES:
+        msg = ' No value or value has not allowed characters:{} {} {}'
+        raise ValueError(msg.format(accession_number, assay_name,
+                                    record['trait']))
+    record['value_json'], record['value_number'] = get_value_columns(trait_type_id,
+                                                                     value,
+                                                                     structured_type_ids)
+
+    # the same obs entity names than get_or_create_obs_entity
+    record['plant'] = None
+    record['existing_entity'] = bool(record['obs_entity_name'])
+    if record['existing_entity']:
+        return
+    if record['plant_name']:
+        record['plant'] = record['plant_name']
+        record['obs_entity_name'] = session.suggest_obs_entity_name(record['plant_name'],
+                                                                    plant_part)
+    elif record['plant_number']:
+        record['obs_entity_name'] = '{}_{}_{}_{}'.format(accession_number,
+                                                         assay_name, plant_part,
+                                                         record['plant_number'])
+        record['plant'] = '{}_{}_{}'.format(accession_number, assay_name,
+                                            record['plant_number'])
+    else:
+        record['obs_entity_name'] = '{}_{}_{}'.format(accession_number,
+                                                      assay_name, plant_part)
+
+
+def check_obs_entity(record, entities, new_entities, plants):
+    'It checks the obs entity of the record and the plant of a new one'
+    name = record['obs_entity_name']
+    if name in entities:
+        if entities[name][1] != record['part_id']:
+            raise ValueError('{} obs_entity has another plant part'.format(name))
+        return
+    if record['existing_entity']:
+        raise ValueError('{} obs_entity'.format(name))
+    if name in new_entities:
+        if new_entities[name]['part_id'] != record['part_id']:
+            raise ValueError('{} obs_entity has another plant part'.format(name))
+        return
+    plant = record['plant']
+    if plant in plants and plants[plant][1] != record['accession_id']:
+        raise ValueError('{} plant belongs to another accession'.format(plant))
+    new_entities[name] = record
+
+
+def _assign_view_perm_by_group(perm, objs, groups):
+    objs_by_group = OrderedDict()
+    for obj, group in zip(objs, groups):
+        objs_by_group.setdefault(group, []).append(obj)
+    for group, group_objs in objs_by_group.items():
+        bulk_assign_view_perm(perm, group, group_objs)
+
+
+def create_obs_entities(new_entities, plants, chunk_size):
+    'It creates the new entities and their plants like get_or_create_obs_entity'
+    entities = [ObservationEntity(name=name, part_id=record['part_id'])
+                for name, record in new_entities.items()]
+    bulk_create_with_pks(ObservationEntity, entities, batch_size=chunk_size)
+    records = list(new_entities.values())
+    _assign_view_perm_by_group('view_obs_entity', entities,
+                               [record['group'] for record in records])
+
+    # the entities of a whole accession take all its plants in the assay
+    accession_records = [record for record in records if record['plant'] is None]
+    assay_plants = {}
+    accession_ids = sorted({record['accession_id'] for record in accession_records})
+    assay_ids = {record['assay_id'] for record in accession_records}
+    for start in range(0, len(accession_ids), MAX_IDS_IN_QUERY):
+        query = Plant.objects.filter(accession_id__in=accession_ids[start:start + MAX_IDS_IN_QUERY],
+                                     assayplant__assay_id__in=assay_ids)
+        for plant_id, accession_id, assay_id in query.values_list('plant_id', 'accession',
+                                                                  'assayplant__assay'):
+            assay_plants.setdefault((accession_id, assay_id), []).append(plant_id)
+
+    new_plants, new_plant_records = OrderedDict(), []
+    for record in records:
+        key = (record['accession_id'], record['assay_id'])
+        if record['plant'] is None:
+            if key in assay_plants:
+                continue
+            # a plant for the entity, without permissions nor assay
+            record['plant'] = record['obs_entity_name']
+        elif record['plant'] not in plants and record['plant'] not in new_plants:
+            new_plant_records.append(record)
+        if record['plant'] not in plants and record['plant'] not in new_plants:
+            new_plants[record['plant']] = Plant(plant_name=record['plant'],
+                                                accession_id=record['accession_id'])
+    bulk_create_with_pks(Plant, list(new_plants.values()), batch_size=chunk_size)
+    plants = dict(plants)
+    plants.update((name, (plant.plant_id, plant.accession_id))
+                  for name, plant in new_plants.items())
+    _assign_view_perm_by_group('view_plant',
+                               [new_plants[record['plant']] for record in new_plant_records],
+                               [record['group'] for record in new_plant_records])
+    AssayPlant.objects.bulk_create([AssayPlant(plant=new_plants[record['plant']],
+                                               assay_id=record['assay_id'])
+                                    for record in new_plant_records])
+
+    entity_plants = []
+    for entity, record in zip(entities, records):
+        key = (record['accession_id'], record['assay_id'])
+        if record['plant'] is None:
+            plant_ids = assay_plants[key]
+        else:
+            plant_ids = [plants[record['plant']][0]]
+        entity_plants.extend(ObservationEntityPlant(obs_entity=entity,
+                                                    plant_id=plant_id)
+                             for plant_id in plant_ids)
+    ObservationEntityPlant.objects.bulk_create(entity_plants)
+    return {entity.name: entity.obs_entity_id for entity in entities}
+
+
+def bulk_add_excel_observations(fpath, headers, observer=None, assay=None,
+                                plant_part=None, view_perm_group=None,
+                                raise_on_error=True,
+                                qualitative_translator=None,
+                                chunk_size=BULK_CHUNK_SIZE, session=None):
+    '''add_excel_observations with the related objects resolved with a few
+    queries for the whole sheet and the new rows added with bulk_create.
+
+    The rows with errors are reported with their row number, nothing is
+    added if raise_on_error'''
+    if session is None:
+        session = ImportSession()
+    errors = []
+    records = list(_read_excel_observations(fpath, headers, observer, assay,
+                                            plant_part, view_perm_group,
+                                            qualitative_translator, errors))
+
+    groups = {group.name: group for group in
+              Group.objects.filter(name__in={record['group'] for record in records})}
+    accessions = get_values_by_name(Accession.objects, 'accession_number',
+                                    [record['accession'] for record in records],
+                                    ['accession_id'])
+    assays = get_values_by_name(Assay.objects, 'name',
+                                [record['assay'] for record in records],
+                                ['assay_id'])
+    traits = {}
+    trait_names = sorted({record['trait'] for record in records} - {None})
+    assay_traits = AssayTrait.objects.filter(assay_id__in=[values[0] for values in assays.values()])
+    for start in range(0, len(trait_names), MAX_IDS_IN_QUERY):
+        query = assay_traits.filter(trait__name__in=trait_names[start:start + MAX_IDS_IN_QUERY])
+        for name, assay_id, trait_id, type_id in query.values_list('trait__name', 'assay',
+                                                                   'trait', 'trait__type'):
+            traits[(name, assay_id)] = trait_id, type_id
+    structured_type_ids = get_cvterm_ids(TRAIT_TYPES_CV, STRUCTURED_TRAIT_TYPES)
+    # the numbers of the new obs entity names in one query
+    session.reserve_obs_entity_names(len([record for record in records
+                                          if (record['plant_name'] and not record['obs_entity_name'] and
+                                              record['plant_part'] != 'plant')]))
+
+    resolved = []
+    for record in records:
+        try:
+            _resolve_excel_observation(record, groups, accessions, assays,
+                                       traits, structured_type_ids, session)
+        except ValueError as error:
+            errors.append((record['row_number'], str(error)))
+            continue
+        resolved.append(record)
+
+    entities = get_values_by_name(ObservationEntity.objects, 'name',
+                                  [record['obs_entity_name'] for record in resolved],
+                                  ['obs_entity_id', 'part'])
+    plants = get_values_by_name(Plant.objects, 'plant_name',
+                                [record['plant'] or record['obs_entity_name'] for record in resolved],
+                                ['plant_id', 'accession'])
+    new_entities = OrderedDict()
+    valid = []
+    for record in resolved:
+        try:
+            check_obs_entity(record, entities, new_entities, plants)
+        except ValueError as error:
+            errors.append((record['row_number'], str(error)))
+            continue
+        valid.append(record)
+
+    if errors:
+        errors = ['Row {}: {}'.format(row_number, msg)
+                  for row_number, msg in sorted(errors)]
+        if raise_on_error:
+            raise ValueError('\n'.join(errors))
+        for error in errors:
+            sys.stderr.write(error + '\n')
+
+    with transaction.atomic():
+        entity_ids = {name: values[0] for name, values in entities.items()}
+        entity_ids.update(create_obs_entities(new_entities, plants,
+                                              chunk_size))
+        for start in range(0, len(valid), chunk_size):
+            chunk = valid[start:start + chunk_size]
+            observations = [Observation(obs_entity_id=entity_ids[record['obs_entity_name']],
+                                        trait_id=record['trait_id'],
+                                        assay_id=record['assay_id'],
+                                        value=record['value'],
+                                        creation_time=record['creation_time'],
+                                        observer=record['observer'],
+                                        value_json=record['value_json'],
+                                        value_number=record['value_number'])
+                            for record in chunk]
+            bulk_create_with_pks(Observation, observations,
+                                 batch_size=chunk_size)
+            _assign_view_perm_by_group('view_observation', observations,
+                                       [record['group'] for record in chunk])
+        observations_bulk_created([entity_ids[record['obs_entity_name']] for record in valid],
+                                  [(record['trait_id'], record['assay_id']) for record in valid])
+
+
 NOT_USED_OBSERVATION_FILE_FIELDS = ('remarks', COLNUMBER_HEADER, 'Remarks',
                                     'Mean_petal_length', 'Mean_petal_width',
                                     'Mean_sepal_length', 'mean_sepal_width',
@@ -537,12 +925,16 @@ def add_excel_related_observations(fpath, assay_header=ASSAY_HEADER,
                                    photo_header=PHOTO_HEADER,
                                    perm_gr=None,
                                    one_part_per_plant=False,
-                                   qual_translator=None):
-
-    rel_type = Cvterm.objects.get(cv__name='relationship_types',
-                                  name='obtained_from')
+                                   qual_translator=None,
+                                   session=None):
+    if session is None:
+        session = ImportSession()
+    rel_type = get_cvterm('relationship_types', 'obtained_from')
+    entries = list(excel_dict_reader(fpath))
+    session.reserve_obs_entity_names(len([entry for entry in entries
+                                          if entry[plant_part_header] != 'plant']))
     with transaction.atomic():
-        for entry in excel_dict_reader(fpath):
+        for entry in entries:
             plant_name = entry.pop(plant_header)
             accession_number = entry.pop(accession_header)
             plant_part = entry.pop(plant_part_header)
@@ -550,7 +942,7 @@ def add_excel_related_observations(fpath, assay_header=ASSAY_HEADER,
 
             if perm_gr is None:
                 perm_gr = assay_name
-            perm_gr = Group.objects.get(name=perm_gr)
+            perm_gr = session.get_group(perm_gr)
 
             try:
                 photo_id = entry.pop(photo_header)
@@ -583,7 +975,8 @@ def add_excel_related_observations(fpath, assay_header=ASSAY_HEADER,
                                                   plant_name=plant_name,
                                                   perm_gr=perm_gr,
                                                   photo_uuid=photo_uuid,
-                                                  one_part_per_plant=one_part_per_plant)
+                                                  one_part_per_plant=one_part_per_plant,
+                                                  session=session)
             # print(obs_entity)
             observation_pairs = _parse_trait_values(entry)
             # print(entry)
@@ -601,7 +994,8 @@ def add_excel_related_observations(fpath, assay_header=ASSAY_HEADER,
                                               trait_name=trait_name,
                                               assay_name=assay_name, value=value,
                                               creation_time=creation_time,
-                                              observer=observer)
+                                              observer=observer,
+                                              session=session)
 
                 if obs_image:
                     ObservationRelationship.objects.create(subject=observation,
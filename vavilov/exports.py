@@ -0,0 +1,257 @@
+import csv
+from datetime import timedelta
+from hashlib import sha256
+import json
+import logging
+from os import makedirs, remove, rename
+from os.path import exists, join
+from threading import Thread
+
+from django.db import connection, transaction
+from django.http.request import QueryDict
+from django.http.response import HttpResponse
+from django.utils import timezone
+
+from guardian.models import UserObjectPermission
+from guardian.utils import get_anonymous_user
+
+from vavilov.conf.settings import (APP_LOGGER, EXPORT_DIR, EXPORT_WORKERS,
+                                   EXPORT_JOB_MAX_AGE, EXPORT_JOB_TIMEOUT)
+from vavilov.models import ExportJob
+from vavilov.utils.column_format import queryset_to_columns
+from vavilov.utils.csv_export import get_export_rows
+from vavilov.utils.streams import (create_workbook_from_queryset,
+                                   return_file_response)
+
+logger = logging.getLogger(APP_LOGGER)
+
+EXPORT_KINDS = ('observations', 'accessions')
+
+# format: (extension, content type)
+EXPORT_FORMATS = {'excel': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+                  'csv': ('.csv', 'text/csv'),
+                  'csv_by_trait_columns': ('.csv', 'text/csv')}
+
+PROGRESS_STEP = 1000
+
+EXPORT_RUNNING_MSG = '''<html><head><meta http-equiv="refresh" content="5"></head>
+<body>The file is being generated ({} of {} rows), the download will start when it is ready.</body></html>'''
+
+
+def _get_search_view(kind):
+    # the views use the streams, they can not be imported at module level
+    from vavilov.views.accession import AccessionList
+    from vavilov.views.observation import ObservationList
+    return {'observations': ObservationList, 'accessions': AccessionList}[kind]
+
+
+def _get_job_user(user):
+    return user if user.is_authenticated() else get_anonymous_user()
+
+
+def get_permissions_key(user):
+    '''Users with the same key see the same objects, so they can share the
+    exported files'''
+    if user.is_superuser:
+        return 'superuser'
+    group_ids = sorted(user.groups.values_list('pk', flat=True))
+    key = 'groups:' + ','.join(str(group_id) for group_id in group_ids)
+    key += ';perms:' + ','.join(sorted(user.get_all_permissions()))
+    if UserObjectPermission.objects.filter(user=user).exists():
+        key += ';user:{}'.format(user.pk)
+    return key
+
+
+def _get_job_key(kind, format_, criteria, permissions_key):
+    key = '\t'.join([kind, format_, criteria, permissions_key])
+    return sha256(key.encode()).hexdigest()
+
+
+def _get_stale_jobs():
+    '''The running jobs without progress in the timeout, their worker has
+    died'''
+    min_heartbeat_time = timezone.now() - timedelta(seconds=EXPORT_JOB_TIMEOUT)
+    return ExportJob.objects.filter(status=ExportJob.RUNNING,
+                                    heartbeat_time__lt=min_heartbeat_time)
+
+
+def fail_stale_export_jobs():
+    '''It marks the stale running jobs as failed'''
+    return _get_stale_jobs().update(status=ExportJob.FAILED,
+                                    error='The export worker stopped',
+                                    end_time=timezone.now())
+
+
+def remove_expired_export_jobs():
+    '''It removes the finished jobs older than the max age and their files'''
+    fail_stale_export_jobs()
+    max_end_time = timezone.now() - timedelta(seconds=EXPORT_JOB_MAX_AGE)
+    jobs = ExportJob.objects.filter(status__in=(ExportJob.DONE,
+                                                ExportJob.FAILED),
+                                    end_time__lt=max_end_time)
+    removed = 0
+    for job in jobs.iterator():
+        if job.fpath and exists(job.fpath):
+            remove(job.fpath)
+        job.delete()
+        removed += 1
+    return removed
+
+
+def submit_export_job(user, kind, format_, criteria):
+    '''It returns an export job for the search, a recent job of another user
+    with the same permissions is reused.
+
+    criteria is a dict with a list of values for each search form field'''
+    if kind not in EXPORT_KINDS:
+        raise ValueError('Export kind must be one of: ' + ', '.join(EXPORT_KINDS))
+    if format_ not in EXPORT_FORMATS:
+        raise ValueError('Export format must be one of: ' + ', '.join(sorted(EXPORT_FORMATS)))
+    if format_ == 'csv_by_trait_columns' and kind != 'observations':
+        raise ValueError('Only observations can be exported by trait columns')
+
+    user = _get_job_user(user)
+    criteria = json.dumps(criteria, sort_keys=True)
+    job_key = _get_job_key(kind, format_, criteria, get_permissions_key(user))
+
+    min_creation_time = timezone.now() - timedelta(seconds=EXPORT_JOB_MAX_AGE)
+    jobs = ExportJob.objects.filter(job_key=job_key,
+                                    creation_time__gte=min_creation_time,
+                                    status__in=(ExportJob.PENDING,
+                                                ExportJob.RUNNING,
+                                                ExportJob.DONE))
+    jobs = jobs.exclude(pk__in=_get_stale_jobs())
+    for job in jobs.order_by('-creation_time'):
+        if job.status != ExportJob.DONE or exists(job.fpath):
+            return job
+
+    job = ExportJob.objects.create(user=user, kind=kind, format=format_,
+                                   criteria=criteria, job_key=job_key)
+    if not EXPORT_WORKERS:
+        # there is no worker command to clean them
+        remove_expired_export_jobs()
+        # the thread has to see the job in the database
+        transaction.on_commit(lambda: _start_export_thread(job.export_job_id))
+    return job
+
+
+def _run_export_job_in_thread(export_job_id):
+    try:
+        job = claim_export_job(export_job_id)
+        if job is not None:
+            run_export_job(job)
+    finally:
+        connection.close()
+
+
+def _start_export_thread(export_job_id):
+    thread = Thread(target=_run_export_job_in_thread, args=(export_job_id,))
+    thread.daemon = True
+    thread.start()
+
+
+def claim_export_job(export_job_id=None):
+    '''It marks a pending job as running and returns it. The update only
+    succeeds in one worker, so each job is run once'''
+    jobs = ExportJob.objects.filter(status=ExportJob.PENDING)
+    if export_job_id is not None:
+        jobs = jobs.filter(export_job_id=export_job_id)
+    for job in jobs.order_by('export_job_id')[:10]:
+        claimed = ExportJob.objects.filter(export_job_id=job.export_job_id,
+                                           status=ExportJob.PENDING)
+        now = timezone.now()
+        if claimed.update(status=ExportJob.RUNNING, heartbeat_time=now):
+            job.status = ExportJob.RUNNING
+            job.heartbeat_time = now
+            return job
+    return None
+
+
+def get_export_queryset(job):
+    view_class = _get_search_view(job.kind)
+    data = QueryDict(mutable=True)
+    for key, values in json.loads(job.criteria).items():
+        data.setlist(key, values)
+    form = view_class.form_class(data)
+    if not form.is_valid():
+        return view_class.model.objects.none()
+    search_criteria = dict([(key, value) for key, value in
+                            form.cleaned_data.items() if value])
+    return view_class().get_queryset(search_criteria=search_criteria,
+                                     user=job.user)
+
+
+def _track_progress(job, rows):
+    for index, row in enumerate(rows):
+        if index and not index % PROGRESS_STEP:
+            ExportJob.objects.filter(pk=job.pk).update(progress=index,
+                                                       heartbeat_time=timezone.now())
+        yield row
+
+
+def _write_export(job, queryset, fpath):
+    if job.format == 'csv_by_trait_columns':
+        rows = queryset_to_columns(queryset)
+    else:
+        rows = get_export_rows(job.kind, queryset)
+    rows = _track_progress(job, rows)
+    if job.format == 'excel':
+        create_workbook_from_queryset(rows).save(fpath)
+    else:
+        with open(fpath, 'w', newline='') as fhand:
+            writer = csv.writer(fhand, delimiter=',',
+                                quoting=csv.QUOTE_MINIMAL)
+            writer.writerows(rows)
+
+
+def run_export_job(job):
+    '''It writes the file of the job in the export dir'''
+    fpath = join(EXPORT_DIR, str(job.export_job_id) + EXPORT_FORMATS[job.format][0])
+    # the file is written in a part file, it is renamed once finished
+    part_fpath = fpath + '.part'
+    try:
+        queryset = get_export_queryset(job)
+        job.total = queryset.count()
+        job.save(update_fields=['total'])
+        makedirs(EXPORT_DIR, exist_ok=True)
+        _write_export(job, queryset, part_fpath)
+        rename(part_fpath, fpath)
+        job.fpath = fpath
+        job.progress = job.total
+        job.status = ExportJob.DONE
+    except Exception as error:
+        logger.exception('Export job {} failed'.format(job.export_job_id))
+        if exists(part_fpath):
+            remove(part_fpath)
+        job.error = str(error)
+        job.status = ExportJob.FAILED
+    job.end_time = timezone.now()
+    job.save(update_fields=['progress', 'fpath', 'status', 'error',
+                            'end_time'])
+    return job
+
+
+def can_download(user, job):
+    '''A job can be downloaded by the users with the permissions of the
+    user that submitted it'''
+    user = _get_job_user(user)
+    if job.user_id == user.pk:
+        return True
+    job_key = _get_job_key(job.kind, job.format, job.criteria,
+                           get_permissions_key(user))
+    return job_key == job.job_key
+
+
+def return_export_response(job, range_header=None):
+    '''The file if the job is done, a 202 page with the progress while it is
+    running'''
+    if job.status == ExportJob.DONE and exists(job.fpath):
+        extension, content_type = EXPORT_FORMATS[job.format]
+        return return_file_response(job.fpath, content_type,
+                                    'search_result' + extension, range_header)
+    if job.status == ExportJob.RUNNING and _get_stale_jobs().filter(pk=job.pk).exists():
+        return HttpResponse('The file could not be generated', status=500)
+    if job.status in (ExportJob.PENDING, ExportJob.RUNNING):
+        msg = EXPORT_RUNNING_MSG.format(job.progress, job.total or '?')
+        return HttpResponse(msg, status=202)
+    return HttpResponse('The file could not be generated', status=500)
@@ -45,6 +45,9 @@ class SearchObservationForm(forms.Form):
     if 'experimental_field' in OBSERVATION_SEARCH_FIELDS:
         experimental_field = forms.CharField(required=False,
                                              label='Experimental field')
+    if 'value_range' in OBSERVATION_SEARCH_FIELDS:
+        value_min = forms.FloatField(required=False, label='Value from')
+        value_max = forms.FloatField(required=False, label='Value to')
     if OBSERVATIONS_HAVE_TIME:
         all_label = 'Check this if you just last values, not all data'
         only_last_data = forms.BooleanField(required=False, label=all_label)
@@ -11,8 +11,13 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('infhand', type=argparse.FileType('r'))
         parser.add_argument('-s', '--silent', action='store_true')
+        parser.add_argument('--bulk', action='store_true',
+                            help='Add all the rows with a few bulk inserts')
+        parser.add_argument('-p', '--processes', type=int, default=1,
+                            help='Processes that parse the rows in bulk mode')
 
     def handle(self, *args, **options):
         fhand = options['infhand']
         silent = options['silent']
-        add_accessions(fhand, silent)
+        add_accessions(fhand, silent, bulk=options['bulk'],
+                       processes=options['processes'])
@@ -49,6 +49,8 @@ class Command(BaseCommand):
         parser.add_argument('--qualitative_translator',
                             type=argparse.FileType('rt'),
                             help='file with the qualitative translations')
+        parser.add_argument('--bulk', action='store_true',
+                            help='Add all the rows with a few bulk inserts')
 
     def handle(self, *args, **options):
         fhand = options['infhand']
@@ -88,4 +90,5 @@ class Command(BaseCommand):
                                        view_perm_group=view_perm_gr,
                                        obs_uid_header=obs_uid_header,
                                        raise_on_error=raise_on_error,
-                                       qualitative_translator=qual_translator)
+                                       qualitative_translator=qual_translator,
+                                       bulk=options['bulk'])
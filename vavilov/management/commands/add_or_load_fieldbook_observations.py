@@ -16,6 +16,8 @@ class Command(BaseCommand):
         parser.add_argument('-e', '--excluded', nargs='*',
                             help='exclude traits to load in db',
                             default=EXCLUDED_FIELDBOOK_TRAITS_TO_LOAD_IN_DB)
+        parser.add_argument('--bulk', action='store_true',
+                            help='Add only the new rows with a few bulk inserts')
 
     def handle(self, *args, **options):
         fhand = options['infhand']
@@ -23,4 +25,5 @@ class Command(BaseCommand):
         assays = options['assay']
         excluded_traits = options['excluded']
         add_or_load_fielbook_observations(fhand.name, observer, assays,
-                                          excluded_traits=excluded_traits)
+                                          excluded_traits=excluded_traits,
+                                          bulk=options['bulk'])
@@ -4,7 +4,7 @@ from django.conf import settings as site_settings
 from django.core.exceptions import ImproperlyConfigured
 from django.core.management.base import BaseCommand
 
-from vavilov.conf.settings import PHENO_PHOTO_DIR
+from vavilov.conf.settings import PHENO_PHOTO_DIR, IMAGE_MANIFEST_FNAME
 from vavilov.db_management.images import add_or_load_images
 
 
@@ -25,6 +25,12 @@ with PHENO_MANAGER_PHENE_PHOTOS
         parser.add_argument('-s', '--use_image_id_as_plant_id',
                             action='store_true',
                             help='If no plant id use image id as plant id')
+        parser.add_argument('-p', '--processes', type=int, default=1,
+                            help='Processes that read the exif of the images')
+        parser.add_argument('--full_scan', action='store_true',
+                            help='Read again the images already loaded')
+        parser.add_argument('-d', '--make_derivatives', action='store_true',
+                            help='Make the thumbnails of the new images')
 
     def handle(self, *args, **options):
         view_perm_group = options['view_perm_group']
@@ -38,6 +44,12 @@ with PHENO_MANAGER_PHENE_PHOTOS
 
         pheno_photo_dir = os.path.join(site_settings.MEDIA_ROOT,
                                        PHENO_PHOTO_DIR)
+        manifest_fpath = os.path.join(pheno_photo_dir, IMAGE_MANIFEST_FNAME)
+        if options['full_scan'] and os.path.exists(manifest_fpath):
+            os.remove(manifest_fpath)
         add_or_load_images(pheno_photo_dir, view_perm_group=view_perm_group,
                            create_plant=create_plant,
-                           use_image_id_as_plant_id=use_image_id_as_plant_id)
+                           use_image_id_as_plant_id=use_image_id_as_plant_id,
+                           manifest_fpath=manifest_fpath,
+                           make_derivatives=options['make_derivatives'],
+                           processes=options['processes'])
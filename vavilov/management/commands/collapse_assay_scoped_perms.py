@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from vavilov.conf.settings import OBS_PERM_BY_ASSAY
+from vavilov.permissions import collapse_assay_scoped_perms
+
+
+class Command(BaseCommand):
+    help = 'Replace the observation per object grants by the assay grants'
+
+    def handle(self, *args, **options):
+        # without it the users would stop seeing their observations
+        if not OBS_PERM_BY_ASSAY:
+            raise CommandError('The grants can only be collapsed with VAVILOV_OBS_PERM_BY_ASSAY')
+        with transaction.atomic():
+            deleted = collapse_assay_scoped_perms()
+        self.stdout.write('{} object permissions removed'.format(deleted))
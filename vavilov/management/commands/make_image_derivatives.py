@@ -0,0 +1,33 @@
+import os
+
+from django.conf import settings as site_settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand
+
+from vavilov.conf.settings import PHENO_PHOTO_DIR
+from vavilov.db_management.images import get_photo_fpaths
+from vavilov.utils.image_derivatives import make_images_derivatives
+
+
+class Command(BaseCommand):
+    help = '''It makes the thumbnails and the other smaller copies of the
+phenotype photos configured in VAVILOV_IMAGE_DERIVATIVE_SIZES. The ones up to
+date are skipped'''
+
+    def add_arguments(self, parser):
+        parser.add_argument('-p', '--processes', type=int, default=1,
+                            help='Processes that resize the photos')
+
+    def handle(self, *args, **options):
+        if PHENO_PHOTO_DIR is None:
+            msg = 'PHENO_MANAGER_PHENO_PHOTOS is not configured'
+            raise ImproperlyConfigured(msg)
+
+        pheno_photo_dir = os.path.join(site_settings.MEDIA_ROOT,
+                                       PHENO_PHOTO_DIR)
+        n_photos = 0
+        for _, size_names in make_images_derivatives(get_photo_fpaths(pheno_photo_dir),
+                                                     processes=options['processes']):
+            if size_names:
+                n_photos += 1
+        self.stdout.write('{} photos resized'.format(n_photos))
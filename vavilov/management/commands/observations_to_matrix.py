@@ -0,0 +1,32 @@
+import argparse
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from vavilov.utils.matrix import (AGGREGATIONS, filter_matrix_observations,
+                                  observations_to_matrix, write_matrix_npz)
+
+
+class Command(BaseCommand):
+    help = 'Write an accession x trait matrix of the observations in a npz file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-o', '--out_file', type=argparse.FileType('wb'),
+                            required=True)
+        parser.add_argument('-s', '--assay', help='Assay')
+        parser.add_argument('-t', '--traits', help='traits, separated by commas')
+        parser.add_argument('-a', '--accessions',
+                            help='accessions, separated by commas')
+        parser.add_argument('-g', '--aggregation', choices=AGGREGATIONS,
+                            default='mean',
+                            help='How to aggregate the replicates')
+
+    def handle(self, *args, **options):
+        user = User.objects.get(username='admin')
+        observations = filter_matrix_observations(user,
+                                                  assay=options['assay'],
+                                                  traits=options['traits'],
+                                                  accessions=options['accessions'])
+        accessions, traits, matrix = observations_to_matrix(observations,
+                                                            aggregation=options['aggregation'])
+        write_matrix_npz(options['out_file'], accessions, traits, matrix)
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from vavilov.models import rebuild_accession_groups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the accession groups from the accession relationships'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild_accession_groups()
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from vavilov.models import rebuild_latest_observations
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the latest observation of every observation entity and trait'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild_latest_observations()
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from vavilov.models import rebuild_taxa_closure
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the taxa ancestor/descendant closure table'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild_taxa_closure()
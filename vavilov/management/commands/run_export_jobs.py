@@ -0,0 +1,44 @@
+from multiprocessing import Process
+from time import sleep
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from vavilov.exports import (claim_export_job, run_export_job,
+                             remove_expired_export_jobs)
+
+
+def run_worker(once=False, sleep_time=2):
+    while True:
+        job = claim_export_job()
+        if job is not None:
+            run_export_job(job)
+        else:
+            remove_expired_export_jobs()
+            if once:
+                break
+            sleep(sleep_time)
+
+
+class Command(BaseCommand):
+    help = 'Run the pending export jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-p', '--processes', type=int, default=1,
+                            help='Number of worker processes')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit when there are no pending jobs')
+
+    def handle(self, *args, **options):
+        once = options['once']
+        if options['processes'] == 1:
+            run_worker(once=once)
+            return
+        # each process has to open its own connection
+        connection.close()
+        workers = [Process(target=run_worker, kwargs={'once': once})
+                   for _ in range(options['processes'])]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from vavilov.models import Observation, update_observation_hashes
+
+
+class Command(BaseCommand):
+    help = 'Fill the content hash of the observations loaded before it existed'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            n_updated = update_observation_hashes(Observation.objects.all())
+        self.stdout.write('{} observations updated'.format(n_updated))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from vavilov.models import Observation, update_observation_numbers
+
+
+class Command(BaseCommand):
+    help = 'Fill the numeric projection of the observation values'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            n_updated = update_observation_numbers(Observation.objects.all())
+        self.stdout.write('{} observations updated'.format(n_updated))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from vavilov.models import update_trait_values
+
+
+class Command(BaseCommand):
+    help = 'Store the numeric values of every trait and assay used by the trait statistics'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            update_trait_values()
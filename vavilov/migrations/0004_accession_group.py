@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 09:46
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# the models helpers as they were when the migration was written, the
+# migration must not change with them
+ACCESSION_GROUP_RELATIONSHIPS = {
+    'equivalent': ('is',),
+    'duplicated': ('is_a_duplicated',),
+    'duplicated_and_equivalent': ('is', 'is_a_duplicated')}
+
+
+def connected_components(pairs):
+    'It returns a dict with the smallest member of its component for each node'
+    parents = {}
+
+    def find(node):
+        root = node
+        while parents[root] != root:
+            root = parents[root]
+        while parents[node] != root:
+            parents[node], node = root, parents[node]
+        return root
+
+    for node1, node2 in pairs:
+        if node1 == node2:
+            continue
+        parents.setdefault(node1, node1)
+        parents.setdefault(node2, node2)
+        root1, root2 = find(node1), find(node2)
+        if root1 != root2:
+            parents[max(root1, root2)] = min(root1, root2)
+    return {node: find(node) for node in parents}
+
+
+def build_accession_groups(apps, schema_editor):
+    AccessionRelationship = apps.get_model('vavilov', 'AccessionRelationship')
+    AccessionGroup = apps.get_model('vavilov', 'AccessionGroup')
+    # sqlite does not accept more than 999 parameters in an insert
+    batch_size = schema_editor.connection.ops.bulk_batch_size(['accession', 'group_type', 'group'],
+                                                              [None] * 500)
+    for group_type, rel_names in ACCESSION_GROUP_RELATIONSHIPS.items():
+        rels = AccessionRelationship.objects.filter(type__cv__name='relationship_types',
+                                                    type__name__in=rel_names)
+        components = connected_components(rels.values_list('subject', 'object'))
+        AccessionGroup.objects.bulk_create([AccessionGroup(accession_id=accession_id,
+                                                           group_type=group_type,
+                                                           group=group)
+                                            for accession_id, group in components.items()],
+                                           batch_size=batch_size)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vavilov', '0003_auto_20171117_1331'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccessionGroup',
+            fields=[
+                ('accession_group_id', models.AutoField(primary_key=True, serialize=False)),
+                ('group_type', models.CharField(max_length=48)),
+                ('group', models.IntegerField()),
+                ('accession', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='vavilov.Accession')),
+            ],
+            options={
+                'db_table': 'vavilov_accession_group',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='accessiongroup',
+            unique_together=set([('accession', 'group_type')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='accessiongroup',
+            index_together=set([('group_type', 'group')]),
+        ),
+        migrations.RunPython(build_accession_groups,
+                             migrations.RunPython.noop),
+    ]
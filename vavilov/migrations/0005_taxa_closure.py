@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 09:48
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# the models helper as it was when the migration was written, the
+# migration must not change with it
+def taxa_closure_rows(taxa_ids, child_parent_pairs):
+    'It yields the (ancestor, descendant, depth) of the given taxa'
+    parents = dict(child_parent_pairs)
+    for taxa_id in taxa_ids:
+        ancestor = taxa_id
+        depth = 0
+        seen = set()
+        while ancestor is not None and ancestor not in seen:
+            yield ancestor, taxa_id, depth
+            seen.add(ancestor)
+            ancestor = parents.get(ancestor)
+            depth += 1
+
+
+def build_taxa_closure(apps, schema_editor):
+    Taxa = apps.get_model('vavilov', 'Taxa')
+    TaxaRelationship = apps.get_model('vavilov', 'TaxaRelationship')
+    TaxaClosure = apps.get_model('vavilov', 'TaxaClosure')
+    rels = TaxaRelationship.objects.filter(type__cv__name='relationship_types',
+                                           type__name='is_a')
+    # sqlite does not accept more than 999 parameters in an insert
+    batch_size = schema_editor.connection.ops.bulk_batch_size(['ancestor', 'descendant', 'depth'],
+                                                              [None] * 500)
+    rows = taxa_closure_rows(Taxa.objects.values_list('taxa_id', flat=True),
+                             rels.values_list('taxa_subject', 'taxa_object'))
+    TaxaClosure.objects.bulk_create([TaxaClosure(ancestor_id=ancestor,
+                                                 descendant_id=descendant,
+                                                 depth=depth)
+                                     for ancestor, descendant, depth in rows],
+                                    batch_size=batch_size)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vavilov', '0004_accession_group'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaxaClosure',
+            fields=[
+                ('taxa_closure_id', models.AutoField(primary_key=True, serialize=False)),
+                ('depth', models.IntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_closures', to='vavilov.Taxa')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_closures', to='vavilov.Taxa')),
+            ],
+            options={
+                'db_table': 'vavilov_taxa_closure',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='taxaclosure',
+            unique_together=set([('descendant', 'ancestor')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='taxaclosure',
+            index_together=set([('ancestor', 'descendant')]),
+        ),
+        migrations.RunPython(build_taxa_closure,
+                             migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 09:51
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+# the models helper as it was when the migration was written, the
+# migration must not change with it
+def format_organism(taxons):
+    'taxons is a list of (name, rank_name) from the top to the bottom taxon'
+    name, rank = taxons[-1]
+    if rank == 'Genus':
+        return name + ' spp'
+    organism = []
+    for name, rank in taxons:
+        if rank not in ('Genus', 'Species'):
+            name = ', {} {}'.format(rank, name)
+        organism.append(name)
+    return ' '.join(organism)
+
+
+def fill_organism_names(apps, schema_editor):
+    Accession = apps.get_model('vavilov', 'Accession')
+    AccessionTaxa = apps.get_model('vavilov', 'AccessionTaxa')
+    TaxaClosure = apps.get_model('vavilov', 'TaxaClosure')
+    acc_taxa = AccessionTaxa.objects.order_by('accession_organism_id')
+    acc_taxa = dict(acc_taxa.values_list('accession', 'taxa'))
+    closures = TaxaClosure.objects.order_by('descendant', '-depth')
+    chains = {}
+    for taxa_id, name, rank in closures.values_list('descendant', 'ancestor__name',
+                                                    'ancestor__rank__name'):
+        chains.setdefault(taxa_id, []).append((name, rank))
+    for accession_id, taxa_id in acc_taxa.items():
+        if taxa_id in chains:
+            organism = format_organism(chains[taxa_id])
+            Accession.objects.filter(accession_id=accession_id).update(organism_name=organism)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vavilov', '0005_taxa_closure'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accession',
+            name='organism_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.RunPython(fill_organism_names, migrations.RunPython.noop),
+    ]
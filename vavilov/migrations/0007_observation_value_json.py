@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 09:58
+from __future__ import unicode_literals
+
+import ast
+import json
+
+from django.db import migrations, models
+
+# the models helpers as they were when the migration was written, the
+# migration must not change with them
+STRUCTURED_TRAIT_TYPES = ('LAB_color', 'RGB_color', 'morphometric_points')
+
+
+def parse_observation_value(value):
+    'It parses the value of an observation of a structured trait type'
+    if not isinstance(value, str):
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        # old values were stored as python literals
+        try:
+            return ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            raise ValueError('Malformed structured value: {}'.format(value))
+
+
+def parse_structured_values(apps, schema_editor):
+    Observation = apps.get_model('vavilov', 'Observation')
+    observations = Observation.objects.filter(trait__type__cv__name='trait_types',
+                                              trait__type__name__in=STRUCTURED_TRAIT_TYPES)
+    for observation in observations.exclude(value=None).iterator():
+        try:
+            value = parse_observation_value(observation.value)
+        except ValueError:
+            continue
+        observation.value_json = json.dumps(value)
+        observation.save(update_fields=['value_json'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vavilov', '0006_accession_organism_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='observation',
+            name='value_json',
+            field=models.TextField(null=True),
+        ),
+        migrations.RunPython(parse_structured_values, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 09:59
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vavilov', '0007_observation_value_json'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='observation',
+            name='value_number',
+            field=models.FloatField(db_index=True, null=True),
+        ),
+    ]
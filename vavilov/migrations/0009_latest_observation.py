@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 10:01
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.db.models import F
+import django.db.models.deletion
+
+
+# the models helper as it was when the migration was written, the
+# migration must not change with it
+def latest_observation_rows(observations):
+    'It yields (obs_entity, trait, observation) of the newest observations'
+    observations = observations.order_by('obs_entity', 'trait',
+                                         F('creation_time').desc(nulls_last=True),
+                                         '-observation_id')
+    previous = None
+    for row in observations.values_list('obs_entity', 'trait',
+                                        'observation_id').iterator():
+        if row[:2] != previous:
+            previous = row[:2]
+            yield row
+
+
+def build_latest_observations(apps, schema_editor):
+    Observation = apps.get_model('vavilov', 'Observation')
+    LatestObservation = apps.get_model('vavilov', 'LatestObservation')
+    # sqlite does not accept more than 999 parameters in an insert
+    batch_size = schema_editor.connection.ops.bulk_batch_size(['obs_entity', 'trait', 'observation'],
+                                                              [None] * 500)
+    rows = latest_observation_rows(Observation.objects.all())
+    LatestObservation.objects.bulk_create([LatestObservation(obs_entity_id=obs_entity_id,
+                                                             trait_id=trait_id,
+                                                             observation_id=observation_id)
+                                           for obs_entity_id, trait_id, observation_id in rows],
+                                          batch_size=batch_size)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vavilov', '0008_observation_value_number'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LatestObservation',
+            fields=[
+                ('latest_observation_id', models.AutoField(primary_key=True, serialize=False)),
+                ('obs_entity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='vavilov.ObservationEntity')),
+                ('observation', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='vavilov.Observation')),
+                ('trait', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='vavilov.Trait')),
+            ],
+            options={
+                'db_table': 'vavilov_latest_observation',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='latestobservation',
+            unique_together=set([('obs_entity', 'trait')]),
+        ),
+        migrations.RunPython(build_latest_observations, migrations.RunPython.noop),
+    ]
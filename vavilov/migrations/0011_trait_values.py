@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 10:13
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vavilov', '0009_latest_observation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TraitValues',
+            fields=[
+                ('trait_values_id', models.AutoField(primary_key=True, serialize=False)),
+                ('values', models.BinaryField()),
+                ('observation_ids', models.BinaryField()),
+                ('assay', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='vavilov.Assay')),
+                ('trait', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='vavilov.Trait')),
+            ],
+            options={
+                'db_table': 'vavilov_trait_values',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='traitvalues',
+            unique_together=set([('trait', 'assay')]),
+        ),
+    ]
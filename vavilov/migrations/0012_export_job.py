@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 10:17
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('vavilov', '0011_trait_values'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('export_job_id', models.AutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=32)),
+                ('format', models.CharField(max_length=32)),
+                ('criteria', models.TextField()),
+                ('job_key', models.CharField(db_index=True, max_length=64)),
+                ('status', models.CharField(db_index=True, default='pending', max_length=16)),
+                ('progress', models.IntegerField(default=0)),
+                ('total', models.IntegerField(null=True)),
+                ('fpath', models.CharField(max_length=255, null=True)),
+                ('error', models.TextField(null=True)),
+                ('creation_time', models.DateTimeField(auto_now_add=True)),
+                ('end_time', models.DateTimeField(null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'vavilov_export_job',
+            },
+        ),
+    ]
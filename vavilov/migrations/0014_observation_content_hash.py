@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 10:51
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vavilov', '0013_name_sequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='observation',
+            name='content_hash',
+            field=models.CharField(max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -1,19 +1,29 @@
+from array import array
+import ast
+from bisect import bisect_left
 from collections import OrderedDict
-from functools import reduce
-import operator
+from hashlib import sha256
+import json
+import math
 from os.path import join
 import logging
+from threading import local
 from time import time
+from uuid import uuid4
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import caches
 from django.core.urlresolvers import reverse
-from django.db import models
-from django.db.models import Q
+from django.db import connection, models, transaction
+from django.db.models import Q, F, OuterRef, Subquery, Case, When, Value
+from django.utils import timezone
 from guardian.shortcuts import get_objects_for_user
 
 from vavilov.conf.settings import (PHENO_PHOTO_DIR, OBSERVATIONS_HAVE_TIME,
-                                   APP_LOGGER, BY_OBJECT_OBS_PERM)
+                                   APP_LOGGER, BY_OBJECT_OBS_PERM,
+                                   OBS_PERM_BY_ASSAY, VISIBLE_IDS_CACHE,
+                                   VISIBLE_IDS_MAX)
 from vavilov.utils.storage import OnlyScanStorage
 
 logger = logging.getLogger(APP_LOGGER)
@@ -84,6 +94,39 @@ class Cvterm(models.Model):
         return reverse('cvterm-detail', kwargs={'pk': self.cvterm_id})
 
 
+# (cv_name, term_name) -> Cvterm, loaded once per process and cleared by
+# the Cv and Cvterm signals
+_CVTERM_CACHE = {}
+
+
+def get_cvterm(cv_name, term_name):
+    if not _CVTERM_CACHE:
+        cvterms = Cvterm.objects.select_related('cv')
+        _CVTERM_CACHE.update(((cvterm.cv.name, cvterm.name), cvterm)
+                             for cvterm in cvterms)
+    try:
+        return _CVTERM_CACHE[(cv_name, term_name)]
+    except KeyError:
+        cvterm = Cvterm.objects.select_related('cv').get(cv__name=cv_name,
+                                                         name=term_name)
+        _CVTERM_CACHE[(cv_name, term_name)] = cvterm
+        return cvterm
+
+
+def get_cvterm_ids(cv_name, term_names):
+    cvterm_ids = set()
+    for term_name in term_names:
+        try:
+            cvterm_ids.add(get_cvterm(cv_name, term_name).cvterm_id)
+        except Cvterm.DoesNotExist:
+            continue
+    return cvterm_ids
+
+
+def clear_cvterm_cache():
+    _CVTERM_CACHE.clear()
+
+
 class Taxa(models.Model):
     taxa_id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=100, db_index=True)
@@ -104,6 +147,19 @@ class TaxaRelationship(models.Model):
         unique_together = ('taxa_subject', 'taxa_object', 'type')
 
 
+class TaxaClosure(models.Model):
+    # every ancestor of every taxon, the taxon itself included with depth 0
+    taxa_closure_id = models.AutoField(primary_key=True)
+    ancestor = models.ForeignKey(Taxa, related_name='descendant_closures')
+    descendant = models.ForeignKey(Taxa, related_name='ancestor_closures')
+    depth = models.IntegerField()
+
+    class Meta:
+        db_table = 'vavilov_taxa_closure'
+        unique_together = ('descendant', 'ancestor')
+        index_together = ('ancestor', 'descendant')
+
+
 class Person(models.Model):
     person_id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=40, unique=True, db_index=True)
@@ -138,6 +194,38 @@ class Pub(models.Model):
         db_table = 'vavilov_pub'
 
 
+class AccessionQuerySet(models.QuerySet):
+    def with_passport(self):
+        'It annotates the passport data shown in the accession lists'
+        synonyms = AccessionSynonym.objects.filter(accession=OuterRef('accession_id'))
+        synonyms = synonyms.order_by('accession_synonym_id')
+        # an accession can have more than one passport, the first is shown
+        passports = Passport.objects.filter(accession=OuterRef('accession_id'))
+        passports = passports.order_by('passport_id')
+        own_group = AccessionGroup.objects.filter(accession=OuterRef('accession_id'),
+                                                  group_type=EQUIVALENT_GROUP)
+        holders = AccessionGroup.objects.filter(group_type=EQUIVALENT_GROUP,
+                                                group=OuterRef('equivalent_group'))
+        holders = holders.exclude(accession=OuterRef('accession_id'))
+        holders = holders.order_by('accession')
+        query = self.select_related('type').annotate(
+            passport_pk=Subquery(passports.values('passport_id')[:1]),
+            passport_local_name=Subquery(passports.values('local_name')[:1]),
+            passport_collecting_date=Subquery(passports.values('collecting_date')[:1]),
+            passport_province=Subquery(passports.values('location__province')[:1]),
+            passport_region=Subquery(passports.values('location__region')[:1]),
+            passport_country_name=Subquery(passports.values('location__country__name')[:1]),
+            passport_country_code2=Subquery(passports.values('location__country__code2')[:1]),
+            synonym_institute_name=Subquery(synonyms.values('synonym_institute__name')[:1]),
+            synonym_code=Subquery(synonyms.values('synonym_code')[:1]),
+            equivalent_group=Subquery(own_group.values('group')[:1]))
+        return query.annotate(
+            holder_id=Subquery(holders.values('accession')[:1]),
+            holder_number=Subquery(holders.values('accession__accession_number')[:1]),
+            holder_institute_name=Subquery(holders.values('accession__institute__name')[:1]),
+            holder_institute_description=Subquery(holders.values('accession__institute__description')[:1]))
+
+
 class Accession(models.Model):
     accession_id = models.AutoField(primary_key=True)
 
@@ -148,6 +236,10 @@ class Accession(models.Model):
                                   verbose_name='Institute_code', db_index=True)  # COMAV
     type = models.ForeignKey(Cvterm, null=True, db_index=True)
     dbxref = models.ForeignKey(Dbxref, null=True)
+    # denormalized, kept in sync by update_organism_names
+    organism_name = models.CharField(max_length=255, default='', blank=True)
+
+    objects = AccessionQuerySet.as_manager()
 
     class Meta:
         db_table = 'vavilov_accession'
@@ -161,6 +253,14 @@ class Accession(models.Model):
 
     @property
     def holder_accession(self):
+        if hasattr(self, 'holder_number'):
+            if self.holder_number is None or self.type.name != 'internal':
+                return None
+            institute = Person(name=self.holder_institute_name,
+                               description=self.holder_institute_description)
+            return Accession(accession_id=self.holder_id,
+                             accession_number=self.holder_number,
+                             institute=institute)
         if self.type.name == 'internal':
             equivalents = self.equivalent_accessions
             if equivalents:
@@ -168,52 +268,50 @@ class Accession(models.Model):
 
     @property
     def equivalent_accessions(self):
-        cv = Cv.objects.get(name='relationship_types')
-        is_relation = Cvterm.objects.get(cv=cv, name='is')
-
-        return self._get_recursively_related_accessions([self], [is_relation],
-                                                        symetric=True)
+        return self._get_group_accessions(EQUIVALENT_GROUP)
 
     @property
     def duplicated_accessions(self):
-        cv = Cv.objects.get(name='relationship_types')
-        is_duplicated = Cvterm.objects.get(cv=cv, name='is_a_duplicated')
-        equivalents = self.equivalent_accessions + [self]
-        dup_accs = set()
-        for equi_acc in equivalents:
-            dup_accs.update(self._get_recursively_related_accessions([equi_acc],
-                                                                     [is_duplicated],
-                                                                     symetric=True))
-        return list(dup_accs)
+        equivalent_ids = [acc.accession_id for acc in self.equivalent_accessions]
+        equivalent_ids.append(self.accession_id)
+        groups = AccessionGroup.objects.filter(accession__in=equivalent_ids,
+                                               group_type=DUPLICATED_GROUP)
+        dup_accs = Accession.objects.filter(accessiongroup__group_type=DUPLICATED_GROUP,
+                                            accessiongroup__group__in=groups.values('group'))
+        dup_accs = dup_accs.exclude(accession_id__in=equivalent_ids)
+        return list(dup_accs.order_by('accession_id'))
 
     @property
     def duplicated_accessions_and_equivalents(self):
-        cv = Cv.objects.get(name='relationship_types')
-        is_duplicated = Cvterm.objects.get(cv=cv, name='is_a_duplicated')
-        is_relation = Cvterm.objects.get(cv=cv, name='is')
-
-        return self._get_recursively_related_accessions([self],
-                                                        [is_duplicated, is_relation],
-                                                        symetric=True)
+        return self._get_group_accessions(DUPLICATED_AND_EQUIVALENT_GROUP)
 
     @property
     def donor_accession(self):
-        equivalents = self.equivalent_accessions + [self]
-        cv = Cv.objects.get(name='relationship_types')
-        is_duplicated_from = Cvterm.objects.get(cv=cv,
-                                                name='is_duplicated_from')
-        donor_accs = set()
-        for equi_acc in equivalents:
-            for acc_rel in AccessionRelationship.objects.filter(subject=equi_acc,
-                                                                type=is_duplicated_from):
-                donor_accs.add(acc_rel.object)
+        equivalent_ids = [acc.accession_id for acc in self.equivalent_accessions]
+        equivalent_ids.append(self.accession_id)
+        donor_accs = Accession.objects.filter(object__subject__in=equivalent_ids,
+                                              object__type__cv__name='relationship_types',
+                                              object__type__name='is_duplicated_from')
+        donor_accs = list(donor_accs.distinct())
 
         if len(donor_accs) > 1:
             raise RuntimeError('DB relationship is broken. More than one doner for an accession')
-        return list(donor_accs)[0] if donor_accs else None
+        return donor_accs[0] if donor_accs else None
+
+    def _get_group_accessions(self, group_type):
+        group = AccessionGroup.objects.filter(accession=self,
+                                              group_type=group_type)
+        accessions = Accession.objects.filter(accessiongroup__group_type=group_type,
+                                              accessiongroup__group__in=group.values('group'))
+        accessions = accessions.exclude(accession_id=self.accession_id)
+        return list(accessions.order_by('accession_id'))
 
     @property
     def collecting_accession(self):
+        if hasattr(self, 'synonym_code'):
+            if self.synonym_code is None:
+                return None
+            return self.synonym_institute_name, self.synonym_code
         try:
             synonym = AccessionSynonym.objects.get(accession=self)
         except AccessionSynonym.DoesNotExist:
@@ -228,58 +326,11 @@ class Accession(models.Model):
         else:
             return None
 
-    def _get_recursively_related_accessions(self, accessions, relations, symetric=True):
-        if symetric:
-            func = self._get_symetric_related_accessions
-        else:
-            func = self._get_non_symetric_related_accessions
-
-        new_accessions = func(accessions, relations)
-        while len(accessions) != len(new_accessions):
-            new_accessions = self.func(accessions, relations)
-            accessions = new_accessions
-        return accessions[1:]
-
-    def _get_symetric_related_accessions(self, accessions, relations):
-        rel_query = reduce(operator.or_, [Q(type=relation) for relation in relations])
-        for accession in accessions:
-            subject_dups = AccessionRelationship.objects.filter(subject=accession)
-            subject_dups = subject_dups.filter(rel_query)
-
-            for subject_dup in subject_dups:
-                dup_accession = subject_dup.object
-                if dup_accession not in accessions:
-                    accessions.append(dup_accession)
-
-            object_dups = AccessionRelationship.objects.filter(object=accession)
-            object_dups = object_dups.filter(rel_query)
-
-            for object_dup in object_dups:
-                dup_accession = object_dup.subject
-                if dup_accession not in accessions:
-                    accessions.append(dup_accession)
-
-        return accessions
-
-    def _get_non_symetric_related_accessions(self, accessions, relations):
-        rel_query = reduce(operator.or_, [Q(type=relation) for relation in relations])
-        for accession in accessions:
-            subject_dups = AccessionRelationship.objects.filter(subject=accession)
-            subject_dups = subject_dups.filter(rel_query)
-
-            for subject_dup in subject_dups:
-                dup_accession = subject_dup.object
-                if dup_accession not in accessions:
-                    accessions.append(dup_accession)
-        return accessions
-
     @property
     def passport(self):
-        try:
-            passport = Passport.objects.get(accession=self)
-        except Passport.DoesNotExist:
-            passport = None
-        return passport
+        # the first, as in with_passport
+        passports = Passport.objects.filter(accession=self)
+        return passports.order_by('passport_id').first()
 
         equivalents = self.equivalent_accessions + [self]
         passport_datas = []
@@ -300,6 +351,11 @@ class Accession(models.Model):
 
     @property
     def collecting_country(self):
+        if hasattr(self, 'passport_country_name'):
+            if self.passport_country_name is None:
+                return None
+            return str(Country(name=self.passport_country_name,
+                               code2=self.passport_country_code2))
         try:
             return self.passport.location.country
         except AttributeError:
@@ -307,6 +363,8 @@ class Accession(models.Model):
 
     @property
     def collecting_region(self):
+        if hasattr(self, 'passport_region'):
+            return self.passport_region
         try:
             return self.passport.location.region
         except AttributeError:
@@ -314,6 +372,8 @@ class Accession(models.Model):
 
     @property
     def collecting_province(self):
+        if hasattr(self, 'passport_province'):
+            return self.passport_province
         try:
             return self.passport.location.province
         except AttributeError:
@@ -321,6 +381,8 @@ class Accession(models.Model):
 
     @property
     def local_name(self):
+        if hasattr(self, 'passport_local_name'):
+            return self.passport_local_name
         try:
             return self.passport.local_name
         except AttributeError:
@@ -328,6 +390,8 @@ class Accession(models.Model):
 
     @property
     def collecting_date(self):
+        if hasattr(self, 'passport_collecting_date'):
+            return date_to_str(self.passport_collecting_date)
         try:
             return self.passport.collecting_date_str
         except AttributeError:
@@ -335,31 +399,15 @@ class Accession(models.Model):
 
     @property
     def organism(self):
-        accession_taxa = AccessionTaxa.objects.get(accession=self)
-        taxon = accession_taxa.taxa
-        if taxon.rank.name == 'Genus':
-            return taxon.name + ' spp'
-        organism = []
-
-        for taxon in get_top_taxons(taxon)[::-1]:
-            if taxon.rank.name not in ('Genus', 'Species'):
-                name = ', {} {}'.format(taxon.rank.name, taxon.name)
-            else:
-                name = taxon.name
-            organism.append(name)
-        return ' '.join(organism)
+        return self.organism_name or None
 
     def plants(self, user):
         plants = Plant.objects.filter(accession=self)
-        plants = get_objects_for_user(user, 'vavilov.view_plant',
-                                      klass=plants, accept_global_perms=False)
-        return plants
+        return get_visible_objects(user, 'vavilov.view_plant', plants)
 
     def assays(self, user):
         assays = Assay.objects.filter(assayplant__plant__in=self.plants(user)).distinct()
-        assays = get_objects_for_user(user, 'vavilov.view_assay',
-                                      klass=assays, accept_global_perms=False)
-        return assays
+        return get_visible_objects(user, 'vavilov.view_assay', assays)
 
     def observations(self, user):
         return filter_observations({'accession': self.accession_number},
@@ -371,38 +419,125 @@ class Accession(models.Model):
 
 
 def get_top_taxons(taxon):
-    is_a = Cvterm.objects.get(cv__name='relationship_types', name='is_a')
-    taxons = [taxon]
-    while True:
-        try:
-            tax_rel = TaxaRelationship.objects.get(taxa_subject=taxon,
-                                                   type=is_a)
-        except TaxaRelationship.DoesNotExist:
-            break
-        taxon = tax_rel.taxa_object
-        taxons.append(taxon)
-
-    return taxons
-
-
-def _get_bottom_taxons(taxons):
-    is_a = Cvterm.objects.get(cv__name='taxa_relationships', name='is_a')
-    for taxa in taxons:
-        trs = TaxaRelationship.objects.filter(taxa_object=taxa, type=is_a)
-        for tr in trs:
-            taxa_subject = tr.taxa_subject
-            if taxa_subject not in taxons:
-                taxons.append(taxa_subject)
-    return taxons
+    taxons = Taxa.objects.filter(descendant_closures__descendant=taxon)
+    taxons = taxons.select_related('rank')
+    return list(taxons.order_by('descendant_closures__depth'))
 
 
 def get_bottom_taxons(taxons):
-    while True:
-        new_taxons = _get_bottom_taxons(taxons)
-        if new_taxons == taxons:
-            break
-        taxons = new_taxons
-    return taxons
+    bottom_taxons = Taxa.objects.filter(ancestor_closures__ancestor__in=taxons)
+    return list(bottom_taxons.distinct())
+
+
+def format_organism(taxons):
+    'taxons is a list of (name, rank_name) from the top to the bottom taxon'
+    name, rank = taxons[-1]
+    if rank == 'Genus':
+        return name + ' spp'
+    organism = []
+    for name, rank in taxons:
+        if rank not in ('Genus', 'Species'):
+            name = ', {} {}'.format(rank, name)
+        organism.append(name)
+    return ' '.join(organism)
+
+
+def get_organism_names(accessions):
+    'It returns a dict with the organism of every given accession'
+    acc_taxa = AccessionTaxa.objects.filter(accession__in=accessions)
+    acc_taxa = acc_taxa.order_by('accession_organism_id')
+    acc_taxa = dict(acc_taxa.values_list('accession', 'taxa'))
+    closures = TaxaClosure.objects.filter(descendant__in=set(acc_taxa.values()))
+    closures = closures.order_by('descendant', '-depth')
+    chains = {}
+    for taxa_id, name, rank in closures.values_list('descendant', 'ancestor__name',
+                                                    'ancestor__rank__name'):
+        chains.setdefault(taxa_id, []).append((name, rank))
+
+    if isinstance(accessions, models.QuerySet):
+        accessions = accessions.values_list('accession_id', flat=True)
+    organisms = {}
+    for accession_id in accessions:
+        chain = chains.get(acc_taxa.get(accession_id))
+        organisms[accession_id] = format_organism(chain) if chain else None
+    return organisms
+
+
+def update_organism_names(accessions, chunk_size=500):
+    by_organism = {}
+    for accession_id, organism in get_organism_names(accessions).items():
+        by_organism.setdefault(organism or '', []).append(accession_id)
+    for organism, accession_ids in by_organism.items():
+        for index in range(0, len(accession_ids), chunk_size):
+            chunk = accession_ids[index:index + chunk_size]
+            Accession.objects.filter(accession_id__in=chunk).update(organism_name=organism)
+
+
+def update_taxa_organism_names(taxa_id):
+    'It updates the organism of the accessions of the taxa and its descendants'
+    accessions = Accession.objects.filter(accessiontaxa__taxa__ancestor_closures__ancestor=taxa_id)
+    update_organism_names(accessions.distinct())
+
+
+def is_taxa_is_a_relationship(relationship):
+    return relationship.type_id in get_cvterm_ids('relationship_types', ['is_a'])
+
+
+def taxa_closure_rows(taxa_ids, child_parent_pairs):
+    'It yields the (ancestor, descendant, depth) of the given taxa'
+    parents = dict(child_parent_pairs)
+    for taxa_id in taxa_ids:
+        ancestor = taxa_id
+        depth = 0
+        seen = set()
+        while ancestor is not None and ancestor not in seen:
+            yield ancestor, taxa_id, depth
+            seen.add(ancestor)
+            ancestor = parents.get(ancestor)
+            depth += 1
+
+
+def add_taxa_to_closure(taxa):
+    TaxaClosure.objects.get_or_create(ancestor=taxa, descendant=taxa,
+                                      defaults={'depth': 0})
+
+
+def link_taxa_closure(relationship):
+    # every ancestor of the parent is now an ancestor of every descendant
+    # of the child
+    ancestors = TaxaClosure.objects.filter(descendant=relationship.taxa_object_id)
+    ancestors = list(ancestors.values_list('ancestor', 'depth'))
+    descendants = TaxaClosure.objects.filter(ancestor=relationship.taxa_subject_id)
+    descendants = list(descendants.values_list('descendant', 'depth'))
+    existing = TaxaClosure.objects.filter(ancestor__in=[anc for anc, _ in ancestors],
+                                          descendant__in=[desc for desc, _ in descendants])
+    existing = set(existing.values_list('ancestor', 'descendant'))
+    closures = [TaxaClosure(ancestor_id=ancestor, descendant_id=descendant,
+                            depth=anc_depth + desc_depth + 1)
+                for ancestor, anc_depth in ancestors
+                for descendant, desc_depth in descendants
+                if (ancestor, descendant) not in existing]
+    TaxaClosure.objects.bulk_create(closures)
+
+
+def unlink_taxa_closure(relationship):
+    ancestors = TaxaClosure.objects.filter(descendant=relationship.taxa_object_id)
+    descendants = TaxaClosure.objects.filter(ancestor=relationship.taxa_subject_id)
+    TaxaClosure.objects.filter(ancestor__in=list(ancestors.values_list('ancestor', flat=True)),
+                               descendant__in=list(descendants.values_list('descendant', flat=True))).delete()
+
+
+def rebuild_taxa_closure():
+    TaxaClosure.objects.all().delete()
+    rels = TaxaRelationship.objects.filter(type__cv__name='relationship_types',
+                                           type__name='is_a')
+    rows = taxa_closure_rows(Taxa.objects.values_list('taxa_id', flat=True),
+                             rels.values_list('taxa_subject', 'taxa_object'))
+    TaxaClosure.objects.bulk_create([TaxaClosure(ancestor_id=ancestor,
+                                                 descendant_id=descendant,
+                                                 depth=depth)
+                                     for ancestor, descendant, depth in rows],
+                                    batch_size=get_bulk_batch_size(TaxaClosure, 500))
 
 
 class Location(models.Model):
@@ -443,6 +578,13 @@ class Location(models.Model):
             return str(self.country)
 
 
+def date_to_str(date):
+    # dates of which we only know the year are stored as the first of january
+    if date and date.month == 1 and date.day == 1:
+        return date.year
+    return date
+
+
 class Passport(models.Model):
     passport_id = models.AutoField(primary_key=True)
     accession = models.ForeignKey(Accession)
@@ -500,9 +642,7 @@ class Passport(models.Model):
 
     @property
     def collecting_date_str(self):
-        if self.collecting_date and self.collecting_date.month == 1 and self.collecting_date.day == 1:
-            return self.collecting_date.year
-        return self.collecting_date
+        return date_to_str(self.collecting_date)
 
     @property
     def collecting_source_str(self):
@@ -560,6 +700,123 @@ class AccessionRelationship(models.Model):
                         'View Accession Relationship'),)
 
 
+# Accession relationships are symmetric graphs. We store the connected
+# component of every related accession, by relationship type set, so that
+# equivalents and duplicates are a lookup and not a walk over the graph
+EQUIVALENT_GROUP = 'equivalent'
+DUPLICATED_GROUP = 'duplicated'
+DUPLICATED_AND_EQUIVALENT_GROUP = 'duplicated_and_equivalent'
+
+ACCESSION_GROUP_RELATIONSHIPS = {
+    EQUIVALENT_GROUP: ('is',),
+    DUPLICATED_GROUP: ('is_a_duplicated',),
+    DUPLICATED_AND_EQUIVALENT_GROUP: ('is', 'is_a_duplicated')}
+
+
+class AccessionGroup(models.Model):
+    accession_group_id = models.AutoField(primary_key=True)
+    accession = models.ForeignKey(Accession)
+    group_type = models.CharField(max_length=48)
+    # the smallest accession_id of the component
+    group = models.IntegerField()
+
+    class Meta:
+        db_table = 'vavilov_accession_group'
+        unique_together = ('accession', 'group_type')
+        index_together = ('group_type', 'group')
+
+
+def connected_components(pairs):
+    'It returns a dict with the smallest member of its component for each node'
+    parents = {}
+
+    def find(node):
+        root = node
+        while parents[root] != root:
+            root = parents[root]
+        while parents[node] != root:
+            parents[node], node = root, parents[node]
+        return root
+
+    for node1, node2 in pairs:
+        if node1 == node2:
+            continue
+        parents.setdefault(node1, node1)
+        parents.setdefault(node2, node2)
+        root1, root2 = find(node1), find(node2)
+        if root1 != root2:
+            parents[max(root1, root2)] = min(root1, root2)
+    return {node: find(node) for node in parents}
+
+
+def _get_group_types(relationship_type_id):
+    return [group_type for group_type, rel_names in ACCESSION_GROUP_RELATIONSHIPS.items()
+            if relationship_type_id in get_cvterm_ids('relationship_types', rel_names)]
+
+
+def join_accession_groups(relationship):
+    subject_id = relationship.subject_id
+    object_id = relationship.object_id
+    if subject_id == object_id:
+        return
+    for group_type in _get_group_types(relationship.type_id):
+        groups = AccessionGroup.objects.filter(group_type=group_type,
+                                               accession__in=[subject_id, object_id])
+        groups = dict(groups.values_list('accession', 'group'))
+        subject_group = groups.get(subject_id, subject_id)
+        object_group = groups.get(object_id, object_id)
+        new_group = min(subject_group, object_group)
+
+        to_update = AccessionGroup.objects.filter(group_type=group_type,
+                                                  group__in=groups.values())
+        to_update.exclude(group=new_group).update(group=new_group)
+        for accession_id in (subject_id, object_id):
+            if accession_id not in groups:
+                AccessionGroup.objects.create(accession_id=accession_id,
+                                              group_type=group_type,
+                                              group=new_group)
+
+
+def split_accession_groups(relationship):
+    # The component of the relationship could be broken in two. We
+    # recalculate the component with the remaining relationships
+    accession_ids = [relationship.subject_id, relationship.object_id]
+    for group_type in _get_group_types(relationship.type_id):
+        groups = AccessionGroup.objects.filter(group_type=group_type,
+                                               accession__in=accession_ids)
+        groups = set(groups.values_list('group', flat=True))
+        members = AccessionGroup.objects.filter(group_type=group_type,
+                                                group__in=groups)
+        member_ids = list(members.values_list('accession', flat=True))
+        rels = AccessionRelationship.objects.filter(type__cv__name='relationship_types',
+                                                    type__name__in=ACCESSION_GROUP_RELATIONSHIPS[group_type],
+                                                    subject__in=member_ids)
+        components = connected_components(rels.values_list('subject', 'object'))
+
+        # updated in place because the accessions could be being deleted
+        # in a cascade
+        singletons = [acc_id for acc_id in member_ids if acc_id not in components]
+        members.filter(accession__in=singletons).delete()
+        accs_by_group = {}
+        for accession_id, group in components.items():
+            accs_by_group.setdefault(group, []).append(accession_id)
+        for group, group_accession_ids in accs_by_group.items():
+            members.filter(accession__in=group_accession_ids).exclude(group=group).update(group=group)
+
+
+def rebuild_accession_groups():
+    AccessionGroup.objects.all().delete()
+    for group_type, rel_names in ACCESSION_GROUP_RELATIONSHIPS.items():
+        rels = AccessionRelationship.objects.filter(type__cv__name='relationship_types',
+                                                    type__name__in=rel_names)
+        components = connected_components(rels.values_list('subject', 'object'))
+        AccessionGroup.objects.bulk_create([AccessionGroup(accession_id=accession_id,
+                                                           group_type=group_type,
+                                                           group=group)
+                                            for accession_id, group in components.items()],
+                                           batch_size=get_bulk_batch_size(AccessionGroup, 500))
+
+
 class AccessionSynonym(models.Model):
     accession_synonym_id = models.AutoField(primary_key=True)
     accession = models.ForeignKey(Accession)
@@ -594,8 +851,7 @@ class Assay(models.Model):
 
     def traits(self, user):
         traits = Trait.objects.filter(assaytrait__assay=self)
-        return get_objects_for_user(user, 'vavilov.view_trait',
-                                    klass=traits, accept_global_perms=False)
+        return get_visible_objects(user, 'vavilov.view_trait', traits)
 
     @property
     def props(self):
@@ -606,9 +862,7 @@ class Assay(models.Model):
 
     def plants(self, user):
         plants = Plant.objects.filter(assayplant__assay=self).distinct()
-        plants = get_objects_for_user(user, 'vavilov.view_plant',
-                                      klass=plants, accept_global_perms=False)
-        return plants
+        return get_visible_objects(user, 'vavilov.view_plant', plants)
 
     def observations(self, user):
         return filter_observations({'assay': self.name}, user=user)
@@ -655,9 +909,7 @@ class Plant(models.Model):
 
     def assays(self, user):
         assays = Assay.objects.filter(assayplant__plant=self).distinct()
-        assays = get_objects_for_user(user, 'vavilov.view_assay',
-                                      klass=assays, accept_global_perms=False)
-        return assays
+        return get_visible_objects(user, 'vavilov.view_assay', assays)
 
     def observations(self, user):
         return filter_observations({'plant': self.plant_name}, user=user)
@@ -751,8 +1003,7 @@ class ObservationEntity(models.Model):
     def plants(self, user=None):
         plants = Plant.objects.filter(observationentityplant__obs_entity=self)
         if user:
-            plants = get_objects_for_user(user, 'vavilov.view_plant',
-                                          klass=plants, accept_global_perms=False)
+            plants = get_visible_objects(user, 'vavilov.view_plant', plants)
         return plants
 
     def observations(self, user):
@@ -780,6 +1031,31 @@ class ObservationEntityPlant(models.Model):
         db_table = 'vavilov_observation_entity_plant'
 
 
+class NameSequence(models.Model):
+    'A counter that hands out unique numbers to build object names'
+    name_sequence_id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=64, unique=True)
+    last_value = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'vavilov_name_sequence'
+
+
+def reserve_sequence_values(sequence_name, count):
+    '''It returns a range with count values of the sequence that will not
+    be given again.
+
+    The update locks the sequence row until the transaction ends, the
+    values have to be reserved before the long transactions that use them'''
+    sequences = NameSequence.objects.filter(name=sequence_name)
+    with transaction.atomic():
+        if not sequences.update(last_value=F('last_value') + count):
+            NameSequence.objects.get_or_create(name=sequence_name)
+            sequences.update(last_value=F('last_value') + count)
+        last_value = sequences.values_list('last_value', flat=True).get()
+    return range(last_value - count + 1, last_value + 1)
+
+
 class Observation(models.Model):
     observation_id = models.AutoField(primary_key=True)
     obs_entity = models.ForeignKey(ObservationEntity, db_index=True)
@@ -788,6 +1064,13 @@ class Observation(models.Model):
     value = models.TextField(null=True)
     creation_time = models.DateTimeField(null=True)
     observer = models.CharField(max_length=255, null=True)
+    # structured values already parsed, json encoded
+    value_json = models.TextField(null=True)
+    # numeric projection of the value, used to filter and sort
+    value_number = models.FloatField(null=True, db_index=True)
+    # observation_content_hash, set by the loaders that do not add the same
+    # observation twice
+    content_hash = models.CharField(max_length=64, null=True, unique=True)
 
     class Meta:
         db_table = 'vavilov_observation'
@@ -825,37 +1108,345 @@ class Observation(models.Model):
 
     @property
     def value_beauty(self):
-        trait_type = self.trait.type.name
-        if trait_type == 'LAB_color':
-            val = eval(self.value)
-            nums = []
-            for key in ('L', 'a', 'b', 'H', 'C'):
-                num = val.get(key)
-                if num and num not in ('nd', 'ND'):
-                    nums.append('{}:{:.2f}'.format(key, float(num)))
-            return ','.join(nums)
-            # val = ','.join(['{}:{:.2f}'.format(key, value) for key, value in val.items()])
-            # return val
-        elif trait_type == 'RGB_color':
-            val = eval(self.value)
-            nums = []
-            for key in ('R', 'G', 'B', 'lum'):
-                num = val.get(key)
-                if num and num not in ('nd', 'ND'):
-                    nums.append('{}:{:.2f}'.format(key, float(num)))
-            return ','.join(nums)
-        elif trait_type == 'morphometric_points':
-            val = eval(self.value)
-            vals = []
-            for index, data in enumerate(val):
-                pos = index + 1
-                xval = data.get('{}x'.format(pos))
-                yval = data.get('{}y'.format(pos))
-                if xval and yval:
-                    vals.append('{}:{}-{}'.format(pos, xval, yval))
-            return ','.join(vals)
-        else:
+        if self.value_json is None:
             return self.value
+        return format_observation_value(self.trait.type.name,
+                                        json.loads(self.value_json))
+
+
+STRUCTURED_TRAIT_TYPES = ('LAB_color', 'RGB_color', 'morphometric_points')
+
+
+def observation_value_to_number(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(number) or math.isinf(number):
+        return None
+    return number
+
+
+def _iter_observation_values(observations, fields, chunk_size):
+    '''It yields lists of (observation_id, *fields) of the observations by
+    ascending observation_id, a chunk at a time'''
+    observations = observations.order_by('observation_id')
+    chunk = []
+    while True:
+        if chunk:
+            observations = observations.filter(observation_id__gt=chunk[-1][0])
+        chunk = list(observations.values_list('observation_id', *fields)[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+
+
+# the updates take three parameters by observation, sqlite does not accept
+# more than 999
+UPDATE_CHUNK_SIZE = 300
+
+
+def update_observation_numbers(observations, chunk_size=UPDATE_CHUNK_SIZE):
+    'It fills value_number for the given observations. Returns the updated'
+    n_updated = 0
+    for chunk in _iter_observation_values(observations,
+                                          ('value', 'value_number'),
+                                          chunk_size):
+        to_update = []
+        for observation_id, value, number in chunk:
+            new_number = observation_value_to_number(value)
+            if new_number != number:
+                to_update.append((observation_id, new_number))
+        if not to_update:
+            continue
+        value_number = Case(*[When(observation_id=observation_id,
+                                   then=Value(number))
+                              for observation_id, number in to_update],
+                            output_field=models.FloatField())
+        n_updated += Observation.objects.filter(observation_id__in=[observation_id for observation_id, _ in to_update]).update(value_number=value_number)
+    return n_updated
+
+
+def observation_content_hash(obs_entity_id, trait_id, creation_time, value):
+    '''The key of the content of an observation, an observation taken at the
+    same time with the same value for the same entity and trait is the same
+    one'''
+    if creation_time is not None:
+        if timezone.is_naive(creation_time):
+            creation_time = timezone.make_aware(creation_time)
+        creation_time = creation_time.astimezone(timezone.utc).isoformat()
+    key = '\t'.join(['' if item is None else str(item)
+                     for item in (obs_entity_id, trait_id, creation_time, value)])
+    return sha256(key.encode()).hexdigest()
+
+
+def update_observation_hashes(observations, chunk_size=UPDATE_CHUNK_SIZE):
+    '''It fills content_hash for the given observations. Only the first
+    observation with each content gets it. Returns the updated'''
+    n_updated = 0
+    observations = observations.filter(content_hash__isnull=True)
+    for chunk in _iter_observation_values(observations,
+                                          ('obs_entity', 'trait',
+                                           'creation_time', 'value'),
+                                          chunk_size):
+        hashes = OrderedDict()
+        for values in chunk:
+            hashes.setdefault(observation_content_hash(*values[1:]), values[0])
+        # the hashes given in the previous chunks are already in the db, the
+        # unique content_hash keeps them from being given twice
+        existing = Observation.objects.filter(content_hash__in=list(hashes))
+        for content_hash in existing.values_list('content_hash', flat=True):
+            del hashes[content_hash]
+        if not hashes:
+            continue
+        content_hash = Case(*[When(observation_id=observation_id,
+                                   then=Value(content_hash))
+                              for content_hash, observation_id in hashes.items()])
+        n_updated += Observation.objects.filter(observation_id__in=list(hashes.values())).update(content_hash=content_hash)
+    return n_updated
+
+
+def parse_observation_value(value):
+    'It parses the value of an observation of a structured trait type'
+    if not isinstance(value, str):
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        # old values were stored as python literals
+        try:
+            return ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            raise ValueError('Malformed structured value: {}'.format(value))
+
+
+def _format_color(value, keys):
+    nums = []
+    for key in keys:
+        num = value.get(key)
+        if num and num not in ('nd', 'ND'):
+            nums.append('{}:{:.2f}'.format(key, float(num)))
+    return ','.join(nums)
+
+
+def format_observation_value(trait_type, value):
+    if trait_type == 'LAB_color':
+        return _format_color(value, ('L', 'a', 'b', 'H', 'C'))
+    elif trait_type == 'RGB_color':
+        return _format_color(value, ('R', 'G', 'B', 'lum'))
+    elif trait_type == 'morphometric_points':
+        vals = []
+        for index, data in enumerate(value):
+            pos = index + 1
+            xval = data.get('{}x'.format(pos))
+            yval = data.get('{}y'.format(pos))
+            if xval and yval:
+                vals.append('{}:{}-{}'.format(pos, xval, yval))
+        return ','.join(vals)
+    return value
+
+
+class LatestObservation(models.Model):
+    latest_observation_id = models.AutoField(primary_key=True)
+    obs_entity = models.ForeignKey(ObservationEntity)
+    trait = models.ForeignKey(Trait)
+    # without db constraint, the observation deletions repoint it
+    observation = models.ForeignKey(Observation, db_constraint=False,
+                                    on_delete=models.DO_NOTHING,
+                                    related_name='+')
+
+    class Meta:
+        db_table = 'vavilov_latest_observation'
+        unique_together = ('obs_entity', 'trait')
+
+
+def _newest_first(observations):
+    return observations.order_by('obs_entity', 'trait',
+                                 F('creation_time').desc(nulls_last=True),
+                                 '-observation_id')
+
+
+def update_latest_observation(obs_entity_id, trait_id):
+    observations = Observation.objects.filter(obs_entity=obs_entity_id,
+                                              trait=trait_id)
+    latest_id = _newest_first(observations).values_list('observation_id',
+                                                        flat=True).first()
+    latests = LatestObservation.objects.filter(obs_entity=obs_entity_id,
+                                               trait=trait_id)
+    if latest_id is None:
+        latests.delete()
+    elif not latests.update(observation=latest_id):
+        LatestObservation.objects.create(obs_entity_id=obs_entity_id,
+                                         trait_id=trait_id,
+                                         observation_id=latest_id)
+
+
+def latest_observation_rows(observations):
+    'It yields (obs_entity, trait, observation) of the newest observations'
+    previous = None
+    for row in _newest_first(observations).values_list('obs_entity', 'trait',
+                                                       'observation_id').iterator():
+        if row[:2] != previous:
+            previous = row[:2]
+            yield row
+
+
+def _create_latest_observations(observations):
+    rows = latest_observation_rows(observations)
+    LatestObservation.objects.bulk_create([LatestObservation(obs_entity_id=obs_entity_id,
+                                                             trait_id=trait_id,
+                                                             observation_id=observation_id)
+                                           for obs_entity_id, trait_id, observation_id in rows],
+                                          batch_size=get_bulk_batch_size(LatestObservation, 500))
+
+
+def rebuild_latest_observations(obs_entity_ids=None):
+    'It rebuilds all the latest observations or those of the given entities'
+    if obs_entity_ids is None:
+        LatestObservation.objects.all().delete()
+        _create_latest_observations(Observation.objects.all())
+        return
+    obs_entity_ids = sorted(set(obs_entity_ids))
+    for start in range(0, len(obs_entity_ids), MAX_IDS_IN_QUERY):
+        chunk = obs_entity_ids[start:start + MAX_IDS_IN_QUERY]
+        LatestObservation.objects.filter(obs_entity__in=chunk).delete()
+        _create_latest_observations(Observation.objects.filter(obs_entity__in=chunk))
+
+
+class TraitValues(models.Model):
+    trait_values_id = models.AutoField(primary_key=True)
+    trait = models.ForeignKey(Trait)
+    assay = models.ForeignKey(Assay)
+    # sorted numeric values of the trait in the assay as packed doubles
+    values = models.BinaryField()
+    # the ids of the observations of the values, in the same order
+    observation_ids = models.BinaryField()
+
+    class Meta:
+        db_table = 'vavilov_trait_values'
+        unique_together = ('trait', 'assay')
+
+
+# the trait values changed by the transaction of each thread
+_trait_values_state = local()
+
+
+def _update_changed_trait_values():
+    trait_assay_ids = _trait_values_state.changed
+    _trait_values_state.changed = set()
+    update_trait_values(trait_assay_ids)
+
+
+def refresh_trait_values(trait_id, assay_id):
+    '''The values of the trait in the assay are stored again. Inside a
+    transaction they are removed and stored once it commits, once for all its
+    changes'''
+    if not connection.in_atomic_block:
+        update_trait_values([(trait_id, assay_id)])
+        return
+    # the callbacks of the rolled back transactions are discarded
+    if not any(func is _update_changed_trait_values
+               for _, func in connection.run_on_commit):
+        _trait_values_state.changed = set()
+        transaction.on_commit(_update_changed_trait_values)
+    elif (trait_id, assay_id) in _trait_values_state.changed:
+        return
+    TraitValues.objects.filter(trait_id=trait_id, assay_id=assay_id).delete()
+    _trait_values_state.changed.add((trait_id, assay_id))
+
+
+def observations_bulk_created(obs_entity_ids, trait_assay_ids):
+    '''bulk_create does not send the post_save signals, this does what the
+    Observation receivers would do for the created observations. The trait
+    values of the loaded assays are stored again'''
+    rebuild_latest_observations(obs_entity_ids)
+    update_trait_values(trait_assay_ids)
+
+
+def _read_trait_values(trait_id, assay_ids):
+    '''It returns the packed sorted numeric values of the trait and the ids
+    of their observations by assay id, read from the observations'''
+    numbers = {assay_id: [] for assay_id in assay_ids}
+    for index in range(0, len(assay_ids), MAX_IDS_IN_QUERY):
+        observations = Observation.objects.filter(trait_id=trait_id,
+                                                  assay_id__in=assay_ids[index:index + MAX_IDS_IN_QUERY])
+        observations = observations.exclude(value_number=None)
+        for assay_id, number, observation_id in observations.values_list('assay_id', 'value_number',
+                                                                         'observation_id').iterator():
+            numbers[assay_id].append((number, observation_id))
+    values_by_assay = {}
+    for assay_id, assay_numbers in numbers.items():
+        assay_numbers.sort()
+        values_by_assay[assay_id] = (array('d', [number for number, _ in assay_numbers]).tobytes(),
+                                     array('l', [obs_id for _, obs_id in assay_numbers]).tobytes())
+    return values_by_assay
+
+
+def get_trait_values(trait, assays):
+    '''It returns the packed numeric values of the trait and the ids of
+    their observations by assay id.
+
+    The values missing in the TraitValues table are read from the
+    observations, the transactions that change them store them once they
+    commit'''
+    assay_ids = [assay.assay_id for assay in assays]
+    stored = TraitValues.objects.filter(trait=trait, assay_id__in=assay_ids)
+    values_by_assay = {assay_id: (bytes(values), bytes(observation_ids))
+                       for assay_id, values, observation_ids in stored.values_list('assay_id', 'values',
+                                                                                   'observation_ids')}
+    missing = [assay_id for assay_id in assay_ids if assay_id not in values_by_assay]
+    if missing:
+        values_by_assay.update(_read_trait_values(trait.trait_id, missing))
+    return values_by_assay
+
+
+def update_trait_values(trait_assay_ids=None):
+    '''It stores the values of the given (trait_id, assay_id), of all the
+    traits and assays with observations if None'''
+    if trait_assay_ids is None:
+        TraitValues.objects.all().delete()
+        trait_assay_ids = Observation.objects.values_list('trait', 'assay').distinct()
+    assay_ids_by_trait = {}
+    for trait_id, assay_id in set(trait_assay_ids):
+        assay_ids_by_trait.setdefault(trait_id, []).append(assay_id)
+    for trait_id, assay_ids in assay_ids_by_trait.items():
+        assay_ids = sorted(assay_ids)
+        for assay_id, (values, observation_ids) in _read_trait_values(trait_id, assay_ids).items():
+            trait_values = TraitValues.objects.filter(trait_id=trait_id,
+                                                      assay_id=assay_id)
+            # the assays without numbers, or removed, are not kept
+            if not values:
+                trait_values.delete()
+                continue
+            TraitValues.objects.update_or_create(trait_id=trait_id,
+                                                 assay_id=assay_id,
+                                                 defaults={'values': values,
+                                                           'observation_ids': observation_ids})
+
+
+class ExportJob(models.Model):
+    PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+
+    export_job_id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(User)
+    kind = models.CharField(max_length=32)
+    format = models.CharField(max_length=32)
+    # search form data as json
+    criteria = models.TextField()
+    # hash of the kind, format, criteria and permissions to reuse the results
+    job_key = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(max_length=16, default=PENDING, db_index=True)
+    progress = models.IntegerField(default=0)
+    total = models.IntegerField(null=True)
+    fpath = models.CharField(max_length=255, null=True)
+    error = models.TextField(null=True)
+    creation_time = models.DateTimeField(auto_now_add=True)
+    # updated by the worker while the job runs
+    heartbeat_time = models.DateTimeField(null=True)
+    end_time = models.DateTimeField(null=True)
+
+    class Meta:
+        db_table = 'vavilov_export_job'
 
 
 def get_photo_dir(instance, filename):
@@ -913,7 +1504,7 @@ def filter_observations(search_criteria, user, images=False):
         query = Observation.objects
     else:
         if (OBSERVATIONS_HAVE_TIME and
-                'only_last_datadata' in search_criteria and
+                'only_last_data' in search_criteria and
                 search_criteria['only_last_data']):
                 query = keep_only_last_observation()
         else:
@@ -960,6 +1551,12 @@ def filter_observations(search_criteria, user, images=False):
     if 'obs_entity' in search_criteria and search_criteria['obs_entity'] != '':
         query = query.filter(obs_entity__name=search_criteria['obs_entity'])
 
+    if search_criteria.get('value_min') is not None:
+        query = query.filter(value_number__gte=search_criteria['value_min'])
+
+    if search_criteria.get('value_max') is not None:
+        query = query.filter(value_number__lte=search_criteria['value_max'])
+
     # with this we remove observation images
     if images:
         query = query.filter(value=None)
@@ -967,10 +1564,11 @@ def filter_observations(search_criteria, user, images=False):
     else:
         msg = 'Observation: Query: {} secs'
         query = query.exclude(value=None)
+    # the tables show these and value_beauty needs the trait type
+    query = query.select_related('trait__type', 'assay', 'obs_entity__part')
 
     if BY_OBJECT_OBS_PERM:
-        query = get_objects_for_user(user, 'vavilov.view_observation',
-                                     klass=query, accept_global_perms=False)
+        query = get_visible_objects(user, 'vavilov.view_observation', query)
     else:
         if not user.has_perm('vavilov.view_observation'):
             query = query.none()
@@ -978,12 +1576,170 @@ def filter_observations(search_criteria, user, images=False):
     return query
 
 
+# how to reach the assay from the objects whose visibility is given by it
+ASSAY_SCOPED_PERMS = {
+    'vavilov.view_plant': 'assayplant__assay',
+    'vavilov.view_obs_entity': 'observationentityplant__plant__assayplant__assay',
+    'vavilov.view_observation': 'assay',
+    'vavilov.view_observation_images': 'observation__assay'}
+
+
+VISIBLE_IDS_VERSION_KEY = 'vavilov_visible_ids_version'
+
+# sqlite does not accept more than 999 parameters in a query
+MAX_IDS_IN_QUERY = 900
+
+
+def get_bulk_batch_size(model, batch_size):
+    '''The batch_size limited to the rows that the database accepts in an
+    insert, bulk_create does not limit the batch_size it is given'''
+    fields = [field for field in model._meta.concrete_fields
+              if not isinstance(field, models.AutoField)]
+    max_batch_size = connection.ops.bulk_batch_size(fields, [None] * batch_size)
+    return max(min(batch_size, max_batch_size), 1)
+
+
+# the state of the visible ids of the transaction of each thread
+_visible_ids_state = local()
+
+
+def _bump_visible_ids_version():
+    cache = caches[VISIBLE_IDS_CACHE]
+    try:
+        cache.incr(VISIBLE_IDS_VERSION_KEY)
+    except ValueError:
+        # the version is not there, any old entry has to be left behind
+        cache.set(VISIBLE_IDS_VERSION_KEY, int(time() * 1000), None)
+
+
+def _is_visible_ids_bump_pending():
+    # the callbacks of the rolled back transactions are discarded
+    return any(func is _bump_visible_ids_version
+               for _, func in connection.run_on_commit)
+
+
+def clear_visible_ids_cache():
+    '''The visible ids of every user are computed again.
+
+    Inside a transaction the version is changed once, when it commits. Until
+    then the changes are only seen by the transaction, that keeps its own
+    entries'''
+    if VISIBLE_IDS_CACHE is None:
+        return
+    if not connection.in_atomic_block:
+        _bump_visible_ids_version()
+        return
+    if not _is_visible_ids_bump_pending():
+        transaction.on_commit(_bump_visible_ids_version)
+    _visible_ids_state.token = uuid4().hex
+
+
+def _get_visible_ids_key(user, perm):
+    cache = caches[VISIBLE_IDS_CACHE]
+    version = cache.get(VISIBLE_IDS_VERSION_KEY)
+    if version is None:
+        _bump_visible_ids_version()
+        version = cache.get(VISIBLE_IDS_VERSION_KEY)
+    if _is_visible_ids_bump_pending():
+        version = '{}.{}'.format(version, _visible_ids_state.token)
+    return 'vavilov_visible_ids:{}:{}:{}'.format(version,
+                                                 user.pk or 'anonymous', perm)
+
+
+def get_visible_ids(user, perm, model):
+    """It returns the sorted ids of the model objects that the user can view,
+    None if there are more than VISIBLE_IDS_MAX
+
+    The ids are kept in the VAVILOV_VISIBLE_IDS_CACHE cache until a permission
+    or a group membership changes"""
+    cache = caches[VISIBLE_IDS_CACHE]
+    key = _get_visible_ids_key(user, perm)
+    ids = cache.get(key)
+    if ids is None:
+        objs = get_objects_for_user(user, perm, klass=model,
+                                    accept_global_perms=False)
+        objs = objs.order_by('pk').values_list('pk', flat=True)
+        ids = array('l', objs[:VISIBLE_IDS_MAX + 1])
+        if len(ids) > VISIBLE_IDS_MAX:
+            # it is remembered that they are too many
+            ids = False
+        cache.set(key, ids)
+    return None if ids is False else ids
+
+
+def _is_in_sorted(ids, id_):
+    index = bisect_left(ids, id_)
+    return index < len(ids) and ids[index] == id_
+
+
+def _get_pk_candidates(queryset):
+    'The pks of the queryset, None if they do not fit in a query'
+    pks = list(queryset.values_list('pk', flat=True)[:MAX_IDS_IN_QUERY + 1])
+    return pks if len(pks) <= MAX_IDS_IN_QUERY else None
+
+
+def _filter_visible(queryset, lookup, user, perm, model):
+    if VISIBLE_IDS_CACHE is not None:
+        candidates = None
+        if (lookup == 'pk' and
+                caches[VISIBLE_IDS_CACHE].get(_get_visible_ids_key(user, perm)) is None):
+            # the visible ids are not read if they could not be used
+            candidates = _get_pk_candidates(queryset)
+            ids = None if candidates is None else get_visible_ids(user, perm, model)
+        else:
+            ids = get_visible_ids(user, perm, model)
+        if ids is not None:
+            if len(ids) <= MAX_IDS_IN_QUERY:
+                return queryset.filter(**{lookup + '__in': list(ids)})
+            if lookup == 'pk':
+                if candidates is None:
+                    candidates = _get_pk_candidates(queryset)
+                if candidates is not None:
+                    return queryset.filter(pk__in=[pk for pk in candidates
+                                                   if _is_in_sorted(ids, pk)])
+    # too many ids for a query, the permission join is done by the database
+    visibles = get_objects_for_user(user, perm, klass=model,
+                                    accept_global_perms=False)
+    return queryset.filter(**{lookup + '__in': visibles})
+
+
+def get_visible_objects(user, perm, queryset):
+    '''It returns the objects of the queryset that the user can view.
+
+    With OBS_PERM_BY_ASSAY the assay scoped objects are visible if the user
+    can view any of their assays, otherwise the per object permissions are
+    used'''
+    queryset = queryset.all()
+    if user.is_superuser:
+        return queryset
+    if OBS_PERM_BY_ASSAY and perm in ASSAY_SCOPED_PERMS:
+        assay_lookup = ASSAY_SCOPED_PERMS[perm]
+        queryset = _filter_visible(queryset, assay_lookup, user,
+                                   'vavilov.view_assay', Assay)
+        if '__' in assay_lookup:
+            queryset = queryset.distinct()
+        return queryset
+    return _filter_visible(queryset, 'pk', user, perm, queryset.model)
+
+
+def user_can_view(user, perm, obj):
+    if (VISIBLE_IDS_CACHE is not None and not user.is_superuser and
+            not (OBS_PERM_BY_ASSAY and perm in ASSAY_SCOPED_PERMS)):
+        ids = get_visible_ids(user, perm, obj.__class__)
+        if ids is not None:
+            return _is_in_sorted(ids, obj.pk)
+    objs = obj.__class__.objects.filter(pk=obj.pk)
+    return get_visible_objects(user, perm, objs).exists()
+
+
+def annotate_accession_number(observations):
+    # the accession of an observation entity is the one of its first plant
+    accessions = ObservationEntityPlant.objects.filter(obs_entity=OuterRef('obs_entity'))
+    accessions = accessions.order_by('plant_id')
+    accessions = accessions.values('plant__accession__accession_number')[:1]
+    return observations.annotate(accession_number=Subquery(accessions))
+
+
 def keep_only_last_observation():
-    query = Observation.objects
-    RAW_QUERY = """SELECT * FROM vavilov_observation AS o
-                   WHERE o.creation_time = (SELECT MAX(creation_time)
-                   FROM vavilov_observation AS o2
-                   WHERE o.obs_entity_id=o2.obs_entity_id AND o.trait_id=o2.trait_id)"""
-
-    obs_ids = [o.observation_id for o in query.raw(RAW_QUERY)]
-    return query.filter(observation_id__in=obs_ids)
+    latests = LatestObservation.objects.values('observation')
+    return Observation.objects.filter(observation_id__in=latests)
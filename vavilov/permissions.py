@@ -1,12 +1,32 @@
 import copy
 from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
 
 from guardian.conf.settings import ANONYMOUS_USER_NAME
+from guardian.models import GroupObjectPermission, UserObjectPermission
+from guardian.shortcuts import assign_perm
 
-from vavilov.conf.settings import BY_OBJECT_OBS_PERM, ACCESSIONS_ARE_PUBLIC
+from vavilov.conf.settings import (BY_OBJECT_OBS_PERM, ACCESSIONS_ARE_PUBLIC,
+                                   OBS_PERM_BY_ASSAY)
+from vavilov.models import (ASSAY_SCOPED_PERMS, Observation, user_can_view,
+                            clear_visible_ids_cache, get_bulk_batch_size)
 
 if BY_OBJECT_OBS_PERM:
-    from guardian.mixins import PermissionRequiredMixin
+    from guardian.mixins import (PermissionRequiredMixin as
+                                 _ObjectPermissionRequiredMixin)
+
+    class PermissionRequiredMixin(_ObjectPermissionRequiredMixin):
+
+        def check_permissions(self, request):
+            obj = self.get_permission_object()
+            perms = self.get_required_permissions(request)
+            # the view permissions are answered by the visible ids cache
+            if (obj is not None and
+                    all(perm.startswith('vavilov.view_') for perm in perms) and
+                    can_view(request.user, perms, obj)):
+                return None
+            return super(PermissionRequiredMixin,
+                         self).check_permissions(request)
 else:
     from django.contrib.auth.mixins import PermissionRequiredMixin
 
@@ -21,6 +41,78 @@ VIEW_PERMISIONS = PUBLIC_VIEW_PERMISSIONS + ['View Assay', 'View Plant',
                                              'View Observation entity']
 
 
+def are_assay_scoped(perms):
+    return (OBS_PERM_BY_ASSAY and bool(perms) and
+            all(perm in ASSAY_SCOPED_PERMS for perm in perms))
+
+
+def can_view(user, perms, obj):
+    return all(user_can_view(user, perm, obj) for perm in perms)
+
+
+def assign_view_perm(perm, group, obj):
+    '''With OBS_PERM_BY_ASSAY the assay grants give the permission to see the
+    assay scoped objects, so there is no need to add it per object'''
+    full_perm = perm if '.' in perm else 'vavilov.' + perm
+    if are_assay_scoped([full_perm]):
+        return
+    assign_perm(full_perm, group, obj)
+
+
+def bulk_assign_view_perm(perm, group, objs, batch_size=500):
+    '''assign_view_perm for many new objects of the same model with a
+    bulk_create. The objects must not have the permission already'''
+    full_perm = perm if '.' in perm else 'vavilov.' + perm
+    if not objs or are_assay_scoped([full_perm]):
+        return
+    content_type = ContentType.objects.get_for_model(objs[0])
+    permission = Permission.objects.get(content_type=content_type,
+                                        codename=full_perm.split('.')[1])
+    GroupObjectPermission.objects.bulk_create([GroupObjectPermission(permission=permission,
+                                                                     content_type=content_type,
+                                                                     group=group,
+                                                                     object_pk=str(obj.pk))
+                                               for obj in objs],
+                                              batch_size=get_bulk_batch_size(GroupObjectPermission,
+                                                                             batch_size))
+    # bulk_create does not send the signal that clears it
+    clear_visible_ids_cache()
+
+
+def collapse_assay_scoped_perms(chunk_size=500):
+    '''It removes the per object grants made unnecessary by OBS_PERM_BY_ASSAY
+
+    The groups and users that could view observations get the view_assay
+    grant of their assays, so they keep seeing them. The removed grants can
+    not be restored'''
+    view_assay = Permission.objects.get(content_type__app_label='vavilov',
+                                        codename='view_assay')
+    assay_ct = view_assay.content_type
+    scoped_perms = Permission.objects.filter(content_type__app_label='vavilov',
+                                             codename__in=[perm.split('.')[1] for perm in ASSAY_SCOPED_PERMS])
+    deleted = 0
+    for ObjectPermission, holder in ((GroupObjectPermission, 'group_id'),
+                                     (UserObjectPermission, 'user_id')):
+        obs_grants = ObjectPermission.objects.filter(permission__codename='view_observation',
+                                                     permission__content_type__app_label='vavilov')
+        obs_by_holder = {}
+        for holder_id, obs_pk in obs_grants.values_list(holder, 'object_pk').iterator():
+            obs_by_holder.setdefault(holder_id, set()).add(int(obs_pk))
+        for holder_id, obs_pks in obs_by_holder.items():
+            obs_pks = sorted(obs_pks)
+            assay_ids = set()
+            for index in range(0, len(obs_pks), chunk_size):
+                chunk = obs_pks[index:index + chunk_size]
+                assay_ids.update(Observation.objects.filter(observation_id__in=chunk).values_list('assay_id', flat=True))
+            for assay_id in assay_ids:
+                ObjectPermission.objects.get_or_create(permission=view_assay,
+                                                       content_type=assay_ct,
+                                                       object_pk=str(assay_id),
+                                                       **{holder: holder_id})
+        deleted += ObjectPermission.objects.filter(permission__in=scoped_perms).delete()[0]
+    return deleted
+
+
 def add_view_permissions(user, filter_perms=None):
     if user.username == ANONYMOUS_USER_NAME:
         perms = copy.copy(PUBLIC_VIEW_PERMISSIONS)
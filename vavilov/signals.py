@@ -1,7 +1,18 @@
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import (post_save, pre_save, post_delete,
+                                      m2m_changed)
 from django.dispatch import receiver
+from guardian.models import GroupObjectPermission, UserObjectPermission
 from rest_framework.authtoken.models import Token
+from vavilov.models import (AccessionRelationship, join_accession_groups,
+                            split_accession_groups, Taxa, TaxaRelationship,
+                            add_taxa_to_closure, link_taxa_closure,
+                            unlink_taxa_closure, is_taxa_is_a_relationship,
+                            AccessionTaxa, Accession, update_organism_names,
+                            update_taxa_organism_names, Cv, Cvterm,
+                            clear_cvterm_cache, Observation,
+                            update_latest_observation,
+                            clear_visible_ids_cache, refresh_trait_values)
 from vavilov.permissions import add_view_permissions
 from django.contrib.auth.models import Permission, User
 from django.core.exceptions import AppRegistryNotReady
@@ -26,3 +37,128 @@ def add_def_view_perms(sender, instance, **kwargs):
         if str(error) == 'Permission matching query does not exist.':
             raise AppRegistryNotReady('guardian loaded before vavilov loaded')
         raise
+
+
+# The cvterm cache is reloaded after any change in the controlled vocabularies
+@receiver(post_save, sender=Cv)
+@receiver(post_delete, sender=Cv)
+@receiver(post_save, sender=Cvterm)
+@receiver(post_delete, sender=Cvterm)
+def invalidate_cvterm_cache(sender, **kwargs):
+    clear_cvterm_cache()
+
+
+# The visible ids of every user are computed again when any object
+# permission or group membership changes
+@receiver(post_save, sender=GroupObjectPermission)
+@receiver(post_delete, sender=GroupObjectPermission)
+@receiver(post_save, sender=UserObjectPermission)
+@receiver(post_delete, sender=UserObjectPermission)
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_visible_ids_cache(sender, **kwargs):
+    clear_visible_ids_cache()
+
+
+# Accession groups are kept in sync with the accession relationships
+@receiver(pre_save, sender=AccessionRelationship)
+def keep_previous_accession_relationship(sender, instance, **kwargs):
+    instance._previous_relationship = None
+    if instance.pk is not None:
+        try:
+            previous = AccessionRelationship.objects.get(pk=instance.pk)
+        except AccessionRelationship.DoesNotExist:
+            return
+        instance._previous_relationship = previous
+
+
+@receiver(post_save, sender=AccessionRelationship)
+def update_accession_groups(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_relationship', None)
+    if previous is not None:
+        split_accession_groups(previous)
+    join_accession_groups(instance)
+
+
+@receiver(post_delete, sender=AccessionRelationship)
+def remove_from_accession_groups(sender, instance, **kwargs):
+    split_accession_groups(instance)
+
+
+# Taxa closure is kept in sync with the taxa and their is_a relationships
+@receiver(post_save, sender=Taxa)
+def add_taxa_closure(sender, instance, created, **kwargs):
+    if created:
+        add_taxa_to_closure(instance)
+    else:
+        update_taxa_organism_names(instance.taxa_id)
+
+
+@receiver(pre_save, sender=TaxaRelationship)
+def keep_previous_taxa_relationship(sender, instance, **kwargs):
+    instance._previous_relationship = None
+    if instance.pk is not None:
+        try:
+            previous = TaxaRelationship.objects.get(pk=instance.pk)
+        except TaxaRelationship.DoesNotExist:
+            return
+        instance._previous_relationship = previous
+
+
+@receiver(post_save, sender=TaxaRelationship)
+def update_taxa_closure(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_relationship', None)
+    if previous is not None and is_taxa_is_a_relationship(previous):
+        unlink_taxa_closure(previous)
+    if is_taxa_is_a_relationship(instance):
+        link_taxa_closure(instance)
+    if previous is not None and previous.taxa_subject_id != instance.taxa_subject_id:
+        update_taxa_organism_names(previous.taxa_subject_id)
+    update_taxa_organism_names(instance.taxa_subject_id)
+
+
+@receiver(post_delete, sender=TaxaRelationship)
+def remove_from_taxa_closure(sender, instance, **kwargs):
+    if is_taxa_is_a_relationship(instance):
+        unlink_taxa_closure(instance)
+    update_taxa_organism_names(instance.taxa_subject_id)
+
+
+# The organism shown for each accession is stored in the accession
+@receiver(post_save, sender=AccessionTaxa)
+@receiver(post_delete, sender=AccessionTaxa)
+def update_accession_organism(sender, instance, **kwargs):
+    update_organism_names(Accession.objects.filter(accession_id=instance.accession_id))
+
+
+# The latest observation of each observation entity and trait
+@receiver(pre_save, sender=Observation)
+def keep_previous_observation_key(sender, instance, **kwargs):
+    instance._previous_key = None
+    if instance.pk is not None:
+        previous = Observation.objects.filter(pk=instance.pk)
+        instance._previous_key = previous.values_list('obs_entity', 'trait',
+                                                      'assay').first()
+
+
+@receiver(post_save, sender=Observation)
+def update_latest_observations(sender, instance, **kwargs):
+    key = (instance.obs_entity_id, instance.trait_id)
+    previous = getattr(instance, '_previous_key', None)
+    if previous is not None and previous[:2] != key:
+        update_latest_observation(*previous[:2])
+    update_latest_observation(*key)
+
+
+@receiver(post_delete, sender=Observation)
+def remove_from_latest_observations(sender, instance, **kwargs):
+    update_latest_observation(instance.obs_entity_id, instance.trait_id)
+
+
+# The trait statistics are computed again from the changed observations
+@receiver(post_save, sender=Observation)
+@receiver(post_delete, sender=Observation)
+def update_changed_trait_values(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_key', None)
+    if previous is not None:
+        refresh_trait_values(previous[1], previous[2])
+    refresh_trait_values(instance.trait_id, instance.assay_id)
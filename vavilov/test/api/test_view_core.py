@@ -5,6 +5,7 @@ from rest_framework import status
 from rest_framework.test import APIClient as Client
 
 from vavilov.db_management.tests import load_test_data
+from vavilov.exports import claim_export_job, run_export_job
 from vavilov.models import Cvterm
 
 
@@ -329,4 +330,44 @@ class PersonViewTests(TestCase):
         response = client.get(reverse('api:person-detail', kwargs={'name': 'ESP026'}))
         assert response.status_code == status.HTTP_200_OK
 
+
+class ExportJobViewTests(TestCase):
+    def setUp(self):
+        load_test_data()
+
+    def test_submit_and_download(self):
+        client = Client()
+        data = {'kind': 'observations', 'format': 'csv',
+                'criteria': {'assay': 'NSF1'}}
+        response = client.post(reverse('api:export_job-list'), data,
+                               format='json')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        assert client.login(username='user', password='pass')
+        response = client.post(reverse('api:export_job-list'),
+                               {'kind': 'observations', 'format': 'pdf'},
+                               format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = client.post(reverse('api:export_job-list'), data,
+                               format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['status'] == 'pending'
+        assert response.data['criteria'] == {'assay': ['NSF1']}
+        download_url = response.data['download']
+        assert client.get(download_url).status_code == status.HTTP_202_ACCEPTED
+
+        run_export_job(claim_export_job())
+        detail_url = reverse('api:export_job-detail',
+                             kwargs={'pk': response.data['export_job_id']})
+        response = client.get(detail_url)
+        assert response.data['status'] == 'done'
+        response = client.get(download_url)
+        assert response.status_code == status.HTTP_200_OK
+        rows = b''.join(response.streaming_content).decode().splitlines()
+        assert len(rows) == 15
+
+        response = client.get(reverse('api:export_job-list'))
+        assert len(response.data) == 1
+
 # TODO, person tests, taxa tests
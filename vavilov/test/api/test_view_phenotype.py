@@ -1,18 +1,24 @@
+from io import BytesIO
 from os.path import join, dirname
+from shutil import copyfile
+import sqlite3
+from tempfile import NamedTemporaryFile
 
 from django.contrib.auth.models import User, Group
 from django.core.urlresolvers import reverse
 from django.test import TestCase
 from guardian.shortcuts import remove_perm
+import numpy
 from rest_framework import status
 from rest_framework.test import APIClient as Client
 
 import vavilov
 from vavilov.db_management.tests import load_test_data
-from vavilov.models import Assay, Plant, Cvterm, AssayProp
+from vavilov.models import Assay, Plant, Cvterm, AssayProp, Observation
 from vavilov.db_management.fieldbook import (add_or_load_fieldbook_fields,
                                              add_or_load_fieldbook_traits,
-                                             add_or_load_fielbook_observations)
+                                             add_or_load_fielbook_observations,
+                                             merge_fieldbook_observations)
 
 TEST_DATA_DIR = join(dirname(vavilov.__file__), 'test', 'data')
 NSF1_PLANTS = join(TEST_DATA_DIR, 'fieldbook_field.csv')
@@ -278,6 +284,41 @@ class FieldbookObservationTest(TestCase):
         response = client.get(reverse('api:fieldbook_observation-list'))
         assert len(response.data) == 8
 
+    def test_merge(self):
+        # the rows added one by one are found by their content hash
+        n_observations = Observation.objects.count()
+        assert add_or_load_fielbook_observations(OBSERVATIONS_FPATH, 'test',
+                                                 ['assay1'], bulk=True) == 0
+        assert Observation.objects.count() == n_observations
+
+        with NamedTemporaryFile(suffix='.db') as fhand:
+            copyfile(OBSERVATIONS_FPATH, fhand.name)
+            conn = sqlite3.connect(fhand.name)
+            conn.execute("insert into user_traits (rid, parent, trait, userValue, timeTaken, person) values ('0F16NSF1CN02F01M001', 'Area2', 'numeric', '23', '2017-05-25 14:56:08+0200', ' ')")
+            conn.commit()
+            conn.close()
+            assert merge_fieldbook_observations(fhand.name, 'test',
+                                                ['assay1']) == 1
+            assert merge_fieldbook_observations(fhand.name, 'test',
+                                                ['assay1']) == 0
+        assert Observation.objects.count() == n_observations + 1
+        observation = Observation.objects.get(trait__name='Area2',
+                                              obs_entity__name='0F16NSF1CN02F01M001_plant')
+        assert observation.value_number == 23
+        assert observation.content_hash
+
+        with NamedTemporaryFile(suffix='.db') as fhand:
+            copyfile(OBSERVATIONS_FPATH, fhand.name)
+            conn = sqlite3.connect(fhand.name)
+            conn.execute("insert into user_traits (rid, parent, trait, userValue, timeTaken, person) values ('no_plant', 'Area2', 'numeric', '23', '2017-05-25 14:56:08+0200', ' ')")
+            conn.commit()
+            conn.close()
+            try:
+                merge_fieldbook_observations(fhand.name, 'test', ['assay1'])
+                self.fail('ValueError expected')
+            except ValueError as error:
+                assert str(error) == 'Row 9: no_plant plant not in db'
+
     def test_create(self):
         client = Client()
         assert client.login(username='admin', password='pass')
@@ -326,6 +367,36 @@ class FieldbookObservationTest(TestCase):
 
         assert response.status_code == 400
 
+
+class ObservationMatrixTest(TestCase):
+    def setUp(self):
+        load_test_data()
+
+    def test_matrix(self):
+        client = Client()
+        response = client.get(reverse('api:observation_matrix-list'))
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        assert client.login(username='admin', password='pass')
+        response = client.get(reverse('api:observation_matrix-list'),
+                              {'accessions': 'BGV000917,BGV000928',
+                               'aggregation': 'count'})
+        assert response.status_code == status.HTTP_200_OK
+        npz = numpy.load(BytesIO(response.content))
+        assert list(npz['accessions']) == ['BGV000917', 'BGV000928']
+        assert list(npz['traits']) == ['Area', 'Growth habit']
+        assert npz['matrix'].tolist() == [[7, 0], [6, 1]]
+
+        response = client.get(reverse('api:observation_matrix-list'),
+                              {'traits': 'Area', 'aggregation': 'median'})
+        npz = numpy.load(BytesIO(response.content))
+        assert npz['matrix'].tolist() == [[18], [18]]
+
+        response = client.get(reverse('api:observation_matrix-list'),
+                              {'aggregation': 'max'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
 # class PlantPartViewTest(TestCase):
 #     def setUp(self):
 #         load_test_data()
@@ -1,17 +1,30 @@
+import csv
+from io import StringIO
+import os
 from os.path import join
+from tempfile import NamedTemporaryFile, TemporaryDirectory
 from django.conf import settings as site_settings
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 from django.test.utils import override_settings
 
 from vavilov.conf import settings
-from vavilov.db_management.images import add_or_load_image_to_db
-from vavilov.db_management.tests import load_test_data, TEST_DATA_DIR
+from vavilov.db_management.base import (load_initial_data, INITIAL_DATA_DIR,
+                                        add_or_load_persons, add_accessions)
+from vavilov.db_management.images import (add_or_load_image_to_db,
+                                          add_or_load_images)
+from vavilov.db_management.tests import (load_test_data, TEST_DATA_DIR,
+                                         create_test_users)
 from vavilov.models import (Cv, Cvterm, Accession, Observation,
-                            ObservationRelationship)
+                            ObservationRelationship, Passport, AccessionGroup,
+                            ObservationImages)
 from vavilov.db_management.phenotype import (add_excel_related_observations,
                                              add_or_load_excel_traits,
                                              parse_qual_translator)
 from django.core.management import execute_from_command_line
+from PIL import Image
+
+from vavilov.utils.image_derivatives import (get_derivative_path,
+                                             make_image_derivatives)
 
 TRAITS2_FPATH = join(TEST_DATA_DIR, 'traits2.xlsx')
 QUAL_TRASLATOR_FPATH = join(TEST_DATA_DIR, 'qualitative_translator.csv')
@@ -34,6 +47,38 @@ class FixturesTest(TestCase):
         assert acc.passport.location.country
 
 
+class BulkAccessionTests(TestCase):
+
+    def setUp(self):
+        load_initial_data()
+        create_test_users()
+        add_or_load_persons(open(join(INITIAL_DATA_DIR, 'vavilov_person.csv')))
+
+    def test_bulk_add_accessions(self):
+        fpath = join(TEST_DATA_DIR, 'accessions.csv')
+        content = open(fpath).read()
+        wrong_content = content.replace('\nESP026,BGV000917,', '\nNO_INST,BGV000917,')
+        try:
+            add_accessions(StringIO(wrong_content), bulk=True)
+            self.fail('ValueError expected')
+        except ValueError as error:
+            assert str(error) == 'Row 2: NO_INST institute not in db'
+        assert not Accession.objects.exists()
+
+        add_accessions(open(fpath), bulk=True, processes=2)
+        assert Accession.objects.count() == 10
+        assert Passport.objects.count() == 8
+        acc = Accession.objects.get(accession_number='BGV000934')
+        assert acc.passport.location.country
+        assert acc.organism_name
+        assert AccessionGroup.objects.count() == 8
+
+        # the accessions with passport are not added again
+        add_accessions(open(fpath), bulk=True)
+        assert Accession.objects.count() == 10
+        assert Passport.objects.count() == 8
+
+
 class ImageTests(TestCase):
 
     def setUp(self):
@@ -81,6 +126,57 @@ class ImageTests(TestCase):
                                      image_fname)
         assert obs_image.observation.obs_entity.part.name == 'leaf'
 
+    def test_image_manifest(self):
+        pheno_photo_dir = join(TEST_DATA_DIR, 'media', settings.PHENO_PHOTO_DIR)
+        with NamedTemporaryFile(suffix='.tsv') as manifest:
+            add_or_load_images(pheno_photo_dir, view_perm_group='NSF1',
+                               create_plant=True,
+                               use_image_id_as_plant_id=True,
+                               manifest_fpath=manifest.name, processes=2)
+            rows = list(csv.reader(open(manifest.name), dialect='excel-tab'))
+            uids = ObservationImages.objects.values_list('observation_image_uid',
+                                                         flat=True)
+            assert sorted(row[3] for row in rows) == sorted(uids)
+
+            # the images in the manifest are not read again
+            n_images = ObservationImages.objects.count()
+            add_or_load_images(pheno_photo_dir, view_perm_group='NSF1',
+                               create_plant=True,
+                               use_image_id_as_plant_id=True,
+                               manifest_fpath=manifest.name)
+            assert ObservationImages.objects.count() == n_images
+            assert list(csv.reader(open(manifest.name), dialect='excel-tab')) == rows
+
+
+class ImageDerivativesTest(SimpleTestCase):
+    def test_make_image_derivatives(self):
+        sizes = {'thumbnails': 20, 'gallery': 50}
+        with TemporaryDirectory() as tmp_dir:
+            photo_path = join(tmp_dir, 'photo.jpg')
+            Image.new('RGB', (400, 300), 'red').save(photo_path)
+            assert make_image_derivatives(photo_path, sizes) == ['gallery',
+                                                                 'thumbnails']
+            with Image.open(get_derivative_path(photo_path, 'gallery')) as image:
+                assert max(image.size) == 50
+            with Image.open(join(tmp_dir, 'thumbnails', 'photo.jpg')) as image:
+                assert max(image.size) == 20
+
+            assert make_image_derivatives(photo_path, sizes) == []
+
+            # a touched photo has the same content
+            stat = os.stat(photo_path)
+            os.utime(photo_path, ns=(stat.st_atime_ns,
+                                     stat.st_mtime_ns + 10 ** 9))
+            assert make_image_derivatives(photo_path, sizes) == []
+
+            Image.new('RGB', (400, 300), 'blue').save(photo_path)
+            os.utime(photo_path, ns=(stat.st_atime_ns,
+                                     stat.st_mtime_ns + 2 * 10 ** 9))
+            assert make_image_derivatives(photo_path, sizes) == ['gallery',
+                                                                 'thumbnails']
+            with Image.open(get_derivative_path(photo_path, 'thumbnails')) as image:
+                assert image.getpixel((0, 0))[2] > 200
+
 
 class RelatedObservationsTest(TestCase):
 
@@ -1,8 +1,10 @@
 from os.path import join
 import tempfile
 
+from django.db import connection
 from django.test import TestCase
-from openpyxl import load_workbook
+from django.test.utils import CaptureQueriesContext
+from openpyxl import Workbook, load_workbook
 
 from vavilov.db_management.base import (load_initial_data, INITIAL_DATA_DIR,
                                         add_or_load_persons, add_accessions)
@@ -10,11 +12,12 @@ from vavilov.db_management.excel import (write_excel_observations_skeleton,)
 from vavilov.db_management.fieldbook import (OUR_TIMEZONE)
 from vavilov.db_management.phenotype import (add_excel_observations,
                                              add_or_load_excel_traits,
+                                             ImportSession,
                                              add_or_load_assays,
                                              add_or_load_plants)
 from vavilov.db_management.tests import (TEST_DATA_DIR, create_test_users,
                                          load_test_data)
-from vavilov.models import Trait, Observation
+from vavilov.models import Trait, Observation, LatestObservation
 
 TRAITS_FIELDBOOK = join(TEST_DATA_DIR, 'traits.fieldbook.trt')
 PLANT_FIELDBOOK = join(TEST_DATA_DIR, 'plant_fields.csv')
@@ -55,6 +58,82 @@ class ExcelLoadTests(TestCase):
         obs = Observation.objects.all()
         assert obs.count() == 24
 
+    def test_bulk_add_excel_observations(self):
+        add_or_load_excel_traits(join(TEST_DATA_DIR, 'traits.xlsx'),
+                                 assays=['NSF1', 'NSF2'])
+        fpath = join(TEST_DATA_DIR, 'observations1.xlsx')
+        try:
+            add_excel_observations(fpath, view_perm_group='no_group',
+                                   bulk=True)
+            self.fail('ValueError expected')
+        except ValueError as error:
+            assert str(error).startswith('Row 2: no_group group not in db')
+        assert Observation.objects.count() == 0
+
+        with CaptureQueriesContext(connection) as queries:
+            add_excel_observations(fpath, bulk=True)
+        # the row by row load takes around 200
+        assert len(queries.captured_queries) < 50
+        obs = Observation.objects.all()
+        assert obs.count() == 12
+        assert str(obs[0].creation_time).startswith("2016-06-07 11:34:")
+        assert LatestObservation.objects.count() == 11
+
+        add_excel_observations(fpath, bulk=True)
+        assert Observation.objects.count() == 24
+        assert LatestObservation.objects.count() == 11
+
+    def test_import_session(self):
+        add_or_load_excel_traits(join(TEST_DATA_DIR, 'traits.xlsx'),
+                                 assays=['NSF1', 'NSF2'])
+        fpath = join(TEST_DATA_DIR, 'observations1.xlsx')
+        session = ImportSession()
+        add_excel_observations(fpath, session=session)
+        with CaptureQueriesContext(connection) as queries:
+            add_excel_observations(fpath, session=session)
+        # the accessions, assays, groups and traits are already resolved
+        for table in ('vavilov_accession', 'vavilov_assay', 'auth_group',
+                      'vavilov_trait'):
+            assert not [query for query in queries.captured_queries
+                        if 'FROM "{}"'.format(table) in query['sql']]
+        assert Observation.objects.count() == 24
+
+        # the names are reserved before the file is loaded, the sequence is
+        # not locked while it loads
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['assay', 'plant_part', 'trait', 'accession',
+                      'plant_name', 'value'])
+        for value in (3, 4):
+            sheet.append(['NSF1', 'leaf', 'Area', 'BGV000917',
+                          'BGV000917_plant', value])
+        with tempfile.NamedTemporaryFile(suffix='.xlsx') as leaf_fhand:
+            workbook.save(leaf_fhand.name)
+            with CaptureQueriesContext(connection) as queries:
+                add_excel_observations(leaf_fhand.name, session=session)
+        sqls = [query['sql'] for query in queries.captured_queries]
+        sequence_queries = [index for index, sql in enumerate(sqls)
+                            if 'vavilov_name_sequence' in sql]
+        assert sequence_queries
+        assert max(sequence_queries) < min(index for index, sql in enumerate(sqls)
+                                           if 'vavilov_observation' in sql)
+        assert Observation.objects.count() == 26
+
+        session.reserve_obs_entity_names(20)
+        with self.assertNumQueries(0):
+            names = [session.suggest_obs_entity_name('plant1', 'leaf')
+                     for _ in range(20)]
+            plant_name = session.suggest_obs_entity_name('plant2', 'plant')
+        assert len(set(names)) == 20
+        assert all(name.startswith('plant1_leaf_N') for name in names)
+        assert plant_name == 'plant2_plant'
+
+        # the names given by other sessions do not collide
+        other_session = ImportSession()
+        other_names = [other_session.suggest_obs_entity_name('plant1', 'leaf')
+                       for _ in range(5)]
+        assert not set(names).intersection(other_names)
+
 
 class ExcelCreateTest(TestCase):
 
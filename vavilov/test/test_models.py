@@ -1,9 +1,33 @@
-from django.contrib.auth.models import User
+from datetime import timedelta
+import json
+from unittest import mock
+
+from django.contrib.auth.models import Group, User
+from django.core.cache import caches
 from django.test import TestCase
+from guardian.shortcuts import assign_perm, remove_perm
 
+from vavilov.db_management.phenotype import add_observation
 from vavilov.db_management.tests import load_test_data
+import vavilov.models
+import vavilov.permissions
+import vavilov.utils.stats
 from vavilov.models import (Accession, AccessionRelationship, Cvterm, Assay,
-                            Trait, Plant, ObservationEntity, Observation)
+                            Trait, Plant, ObservationEntity, Observation,
+                            AccessionGroup, EQUIVALENT_GROUP,
+                            rebuild_accession_groups, Taxa, TaxaClosure,
+                            TaxaRelationship, get_top_taxons,
+                            get_bottom_taxons, rebuild_taxa_closure,
+                            AccessionTaxa, get_organism_names, get_cvterm,
+                            AssayTrait, filter_observations,
+                            update_observation_numbers, LatestObservation,
+                            update_observation_hashes,
+                            keep_only_last_observation,
+                            rebuild_latest_observations, Passport,
+                            TraitValues, update_trait_values,
+                            get_visible_ids, VISIBLE_IDS_VERSION_KEY)
+from vavilov.permissions import collapse_assay_scoped_perms, can_view
+from vavilov.utils.stats import get_trait_stats
 
 
 class AccessionTest(TestCase):
@@ -31,6 +55,34 @@ class AccessionTest(TestCase):
         assert len(acc.duplicated_accessions_and_equivalents) == 1
         assert acc.duplicated_accessions_and_equivalents[0].accession_number == 'IVALSA 38'
 
+    def test_accession_groups(self):
+        is_rel = Cvterm.objects.get(cv__name='relationship_types', name='is')
+        acc1 = Accession.objects.get(accession_number='BGV000932')
+        acc2 = Accession.objects.get(accession_number='BGV000933')
+        acc3 = Accession.objects.get(accession_number='BGV000934')
+        assert not acc1.equivalent_accessions
+
+        rel1 = AccessionRelationship.objects.create(subject=acc1, object=acc2,
+                                                    type=is_rel)
+        AccessionRelationship.objects.create(subject=acc3, object=acc2,
+                                             type=is_rel)
+        assert acc1.equivalent_accessions == [acc2, acc3]
+        assert acc3.equivalent_accessions == [acc1, acc2]
+        dup_and_equi = acc1.duplicated_accessions_and_equivalents
+        assert [acc.accession_number for acc in dup_and_equi] == ['BGV000928', 'IVALSA 38',
+                                                                  'BGV000933', 'BGV000934']
+        dups = acc3.duplicated_accessions
+        assert [acc.accession_number for acc in dups] == ['BGV000928', 'IVALSA 38']
+
+        rel1.delete()
+        assert not acc1.equivalent_accessions
+        assert acc3.equivalent_accessions == [acc2]
+        assert not AccessionGroup.objects.filter(accession=acc1,
+                                                 group_type=EQUIVALENT_GROUP)
+        groups = list(AccessionGroup.objects.values_list('accession', 'group_type', 'group'))
+        rebuild_accession_groups()
+        assert sorted(groups) == sorted(AccessionGroup.objects.values_list('accession', 'group_type', 'group'))
+
     def test_accession_collecting(self):
         assert not Accession.objects.get(accession_number='BGV000934').collecting_accession
         acc = Accession.objects.get(accession_number='BGV000932')
@@ -57,6 +109,68 @@ class AccessionTest(TestCase):
         acc = Accession.objects.get(accession_number='BGV000933')
         assert acc.organism == 'Capsicum spp'
 
+    def test_organism_names(self):
+        accs = Accession.objects.filter(accession_number__in=['BGV000928', 'BGV000933'])
+        organisms = get_organism_names(accs)
+        assert sorted(organisms.values()) == ['Capsicum annuum , Variety annuum',
+                                              'Capsicum spp']
+
+        capsicum = Taxa.objects.get(name='Capsicum')
+        capsicum.name = 'Capsicum2'
+        capsicum.save()
+        acc = Accession.objects.get(accession_number='BGV000928')
+        assert acc.organism == 'Capsicum2 annuum , Variety annuum'
+
+        AccessionTaxa.objects.filter(accession=acc).delete()
+        acc = Accession.objects.get(accession_number='BGV000928')
+        assert acc.organism is None
+
+    def test_passport_projection(self):
+        fields = ['collecting_accession', 'collecting_number', 'holder_accession',
+                  'collecting_country', 'collecting_region',
+                  'collecting_province', 'local_name', 'collecting_date']
+        accs = Accession.objects.filter(type__name='internal').order_by('accession_id')
+        expected = [[str(getattr(acc, field)) for field in fields] for acc in accs]
+        with self.assertNumQueries(1):
+            rows = [[str(getattr(acc, field)) for field in fields]
+                    for acc in accs.with_passport()]
+        assert rows == expected
+
+        # a second passport does not duplicate the accession
+        acc = Accession.objects.filter(passport__local_name__isnull=False).first()
+        local_name = acc.local_name
+        Passport.objects.create(accession=acc, local_name='second')
+        annotated = Accession.objects.filter(accession_number=acc.accession_number,
+                                             institute=acc.institute).with_passport()
+        assert [annotated_acc.local_name for annotated_acc in annotated] == [local_name]
+        assert acc.local_name == local_name
+
+    def test_cvterm_cache(self):
+        is_a = get_cvterm('relationship_types', 'is_a')
+        with self.assertNumQueries(0):
+            assert get_cvterm('relationship_types', 'is_a') == is_a
+
+        is_a.name = 'is_a2'
+        is_a.save()
+        self.assertRaises(Cvterm.DoesNotExist, get_cvterm,
+                          'relationship_types', 'is_a')
+        assert get_cvterm('relationship_types', 'is_a2') == is_a
+
+    def test_taxa_closure(self):
+        capsicum = Taxa.objects.get(name='Capsicum')
+        variety = Taxa.objects.get(name='annuum', rank__name='Variety')
+        species = get_top_taxons(variety)[1]
+        assert [t.name for t in get_top_taxons(variety)] == ['annuum', 'annuum', 'Capsicum']
+        assert set(get_bottom_taxons([capsicum])) == {capsicum, species, variety}
+
+        closure = sorted(TaxaClosure.objects.values_list('ancestor', 'descendant', 'depth'))
+        rebuild_taxa_closure()
+        assert closure == sorted(TaxaClosure.objects.values_list('ancestor', 'descendant', 'depth'))
+
+        TaxaRelationship.objects.get(taxa_subject=species).delete()
+        assert [t.name for t in get_top_taxons(variety)] == ['annuum', 'annuum']
+        assert get_bottom_taxons([capsicum]) == [capsicum]
+
     def test_assay(self):
         acc = Accession.objects.get(accession_number='BGV000928')
         assert acc.assays(self.user)[0].name == 'NSF1'
@@ -123,3 +237,137 @@ class PhenotypeTest(TestCase):
     def test_observations(self):
         obs = Observation.objects.all().first()
         assert str(obs.accession) == "Comav Gene bank(ESP026): BGV000917"
+
+    def test_observation_structured_values(self):
+        assay = Assay.objects.get(name='NSF1')
+        trait = Trait.objects.create(name='LAB', type=get_cvterm('trait_types', 'LAB_color'))
+        AssayTrait.objects.create(assay=assay, trait=trait)
+        obs_entity = ObservationEntity.objects.all().first()
+        obs = add_observation(obs_entity, 'LAB', 'NSF1',
+                              "{'L': '1', 'a': '2.5', 'b': 'nd'}", None)
+        obs = Observation.objects.get(observation_id=obs.observation_id)
+        assert json.loads(obs.value_json) == {'L': '1', 'a': '2.5', 'b': 'nd'}
+        assert obs.value_beauty == 'L:1.00,a:2.50'
+
+        self.assertRaises(ValueError, add_observation, obs_entity, 'LAB',
+                          'NSF1', "{'L': ", None)
+
+    def test_observation_value_range(self):
+        criteria = {'traits': 'Area', 'value_min': 18, 'value_max': 19}
+        observations = filter_observations(criteria, user=self.admin)
+        assert observations.count() == 10
+
+        Observation.objects.update(value_number=None)
+        assert update_observation_numbers(Observation.objects.all(),
+                                          chunk_size=4) == 14
+        assert filter_observations(criteria, user=self.admin).count() == 10
+        assert update_observation_numbers(Observation.objects.all()) == 0
+
+    def test_update_observation_hashes(self):
+        obs = Observation.objects.first()
+        Observation.objects.create(obs_entity=obs.obs_entity, trait=obs.trait,
+                                   assay=obs.assay, value=obs.value,
+                                   creation_time=obs.creation_time)
+        Observation.objects.update(content_hash=None)
+        # the copy does not get a hash
+        assert update_observation_hashes(Observation.objects.all(),
+                                         chunk_size=4) == 14
+        assert Observation.objects.filter(content_hash=None).count() == 1
+        assert update_observation_hashes(Observation.objects.all()) == 0
+
+    def test_latest_observations(self):
+        latests = sorted(keep_only_last_observation().values_list('observation_id', flat=True))
+        assert len(latests) == 13
+        rebuild_latest_observations()
+        assert latests == sorted(keep_only_last_observation().values_list('observation_id', flat=True))
+
+        obs = Observation.objects.get(observation_id=latests[0])
+        new_obs = Observation.objects.create(obs_entity=obs.obs_entity, trait=obs.trait,
+                                             assay=obs.assay, value='1',
+                                             creation_time=obs.creation_time + timedelta(days=1))
+        latest = LatestObservation.objects.get(obs_entity=obs.obs_entity, trait=obs.trait)
+        assert latest.observation == new_obs
+        new_obs.delete()
+        latest = LatestObservation.objects.get(obs_entity=obs.obs_entity, trait=obs.trait)
+        assert latest.observation == obs
+
+    @mock.patch.object(vavilov.permissions, 'OBS_PERM_BY_ASSAY', True)
+    @mock.patch.object(vavilov.models, 'OBS_PERM_BY_ASSAY', True)
+    def test_assay_scoped_visibility(self):
+        assay = Assay.objects.get(name='NSF1')
+        self.assertEqual(assay.plants(self.user).count(), 25)
+        self.assertEqual(assay.observations(self.user).count(), 14)
+        # user2 sees the plants shared with NSF3, but not NSF1 observations
+        self.assertEqual(assay.plants(self.user2).count(), 14)
+        self.assertEqual(assay.observations(self.user2).count(), 0)
+
+        assert collapse_assay_scoped_perms() > 0
+        self.assertEqual(assay.plants(self.user).count(), 25)
+        self.assertEqual(assay.observations(self.user).count(), 14)
+        self.assertEqual(assay.observations(self.admin).count(), 14)
+
+    @mock.patch.object(vavilov.models, 'VISIBLE_IDS_CACHE', 'default')
+    def test_visible_ids_cache(self):
+        assay = Assay.objects.get(name='NSF1')
+        self.assertEqual(assay.plants(self.user).count(), 25)
+        self.assertEqual(assay.plants(self.user2).count(), 0)
+        self.assertEqual(assay.observations(self.user).count(), 14)
+        with self.assertNumQueries(1):
+            self.assertEqual(assay.plants(self.user).count(), 25)
+
+        plant = Plant.objects.get(plant_name='BGV000917_NSF1_1')
+        assert not can_view(self.user2, ['vavilov.view_plant'], plant)
+        assign_perm('vavilov.view_plant', self.user2, plant)
+        assert can_view(self.user2, ['vavilov.view_plant'], plant)
+        self.assertEqual(assay.plants(self.user2).count(), 1)
+        remove_perm('vavilov.view_plant', self.user2, plant)
+        assert not can_view(self.user2, ['vavilov.view_plant'], plant)
+
+        # inside a transaction the version changes once it is commited
+        cache = caches['default']
+        version = cache.get(VISIBLE_IDS_VERSION_KEY)
+        assign_perm('vavilov.view_plant', self.user2, plant)
+        assert cache.get(VISIBLE_IDS_VERSION_KEY) == version
+        assert can_view(self.user2, ['vavilov.view_plant'], plant)
+
+        # the users that can view too many objects are filtered by the db
+        with mock.patch.object(vavilov.models, 'VISIBLE_IDS_MAX', 10):
+            assert get_visible_ids(self.user, 'vavilov.view_plant', Plant) is None
+            self.assertEqual(assay.plants(self.user).count(), 25)
+            assert can_view(self.user, ['vavilov.view_plant'], plant)
+
+    def test_trait_stats(self):
+        trait = Trait.objects.get(name='Area')
+        update_trait_values()
+        assert TraitValues.objects.filter(trait=trait).count() == 1
+        stats = get_trait_stats(trait, self.admin)
+        assert stats['stats']['count'] == 13
+        assert stats['stats']['min'] == 17
+        assert stats['stats']['quantiles']['50'] == 18
+        assert sum(stats['stats']['histogram']['counts']) == 13
+        assert list(stats['assays'].keys()) == ['NSF1']
+        stats = get_trait_stats(trait, self.user2)
+        assert stats['stats']['count'] == 0
+        assert not stats['assays']
+
+        # the user only gets the observations that can view
+        obs = trait.observations(self.user).exclude(value_number=None).first()
+        with mock.patch.object(vavilov.models, 'VISIBLE_IDS_CACHE', 'default'), \
+                mock.patch.object(vavilov.utils.stats, 'VISIBLE_IDS_CACHE',
+                                  'default'):
+            remove_perm('vavilov.view_observation',
+                        Group.objects.get(name='NSF1'), obs)
+            visible = trait.observations(self.user).exclude(value_number=None)
+            assert visible.count() == 12
+            assert get_trait_stats(trait, self.user)['stats']['count'] == 12
+        assert get_trait_stats(trait, self.user)['stats']['count'] == 12
+
+        # the changed values are stored again when the transaction commits,
+        # the stats do not store them
+        Observation.objects.create(obs_entity=obs.obs_entity, trait=trait,
+                                   assay=obs.assay, value='10',
+                                   value_number=10)
+        stats = get_trait_stats(trait, self.admin)
+        assert stats['stats']['count'] == 14
+        assert stats['stats']['min'] == 10
+        assert not TraitValues.objects.filter(trait=trait).exists()
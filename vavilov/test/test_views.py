@@ -1,9 +1,26 @@
+from datetime import timedelta
+import json
+import os
+from os.path import join, relpath
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from django.contrib.auth.models import User
 from django.core.urlresolvers import reverse
 from django.test import TestCase
 from django.test.client import Client
+from PIL import Image
+
+import vavilov.utils.image_derivatives
+import vavilov.views.observation
 
 from vavilov.db_management.tests import load_test_data
-from vavilov.models import Accession
+from vavilov.exports import (claim_export_job, run_export_job,
+                             remove_expired_export_jobs)
+from vavilov.models import (Accession, filter_observations, Observation,
+                            ObservationImages, only_scan_storage, ExportJob)
+from vavilov.utils.csv_export import observations_to_rows
+from vavilov.views.tables import ObservationsTable
 
 
 class AccessionViewTest(TestCase):
@@ -62,3 +79,163 @@ class ObservationsViewTest(TestCase):
                                {'accession': 'BGV000'})
         assert response.status_code == 200
         assert response.context['table'].as_values()
+
+    def test_observations_by_trait_columns(self):
+        client = Client()
+        assert client.login(username='user', password='pass')
+        response = client.get(reverse('observation-list'),
+                              {'assay': 'NSF1', 'download_search': True,
+                               'format': 'csv_by_trait_columns'})
+        assert response.status_code == 200
+        rows = b''.join(response.streaming_content).decode().splitlines()
+        assert rows[0] == 'Accession,Assay,Observation Entity,Plant Part,Area,Growth habit'
+        assert rows[1] == 'BGV000917,NSF1,BGV000917_NSF1_plant,plant,19,'
+        assert len(rows) == 13
+
+    def test_observations_csv(self):
+        user = User.objects.get(username='user')
+        observations = filter_observations({'assay': 'NSF1'}, user=user)
+        with self.assertNumQueries(1):
+            rows = list(observations_to_rows(observations))
+        table_rows = ObservationsTable(observations).as_values()
+        assert rows == [['' if value is None else value for value in row]
+                        for row in table_rows]
+
+    def test_excel_export(self):
+        client = Client()
+        assert client.login(username='user', password='pass')
+        params = {'download_search': True, 'format': 'excel', 'assay': 'NSF1'}
+        response = client.get(reverse('observation-list'), params)
+        assert response.status_code == 302
+        url = response.url
+        # the job is only run once the transaction is commited
+        assert client.get(url).status_code == 202
+        job = claim_export_job()
+        run_export_job(job)
+        assert job.total == 14
+        response = client.get(url)
+        assert response.status_code == 200
+        content = b''.join(response.streaming_content)
+        assert content.startswith(b'PK')
+
+        # the same search reuses the job
+        response = client.get(reverse('observation-list'), params)
+        assert response.url == url
+
+        response = client.get(url, HTTP_RANGE='bytes=2-9')
+        assert response.status_code == 206
+        assert response['Content-Range'] == 'bytes 2-9/{}'.format(len(content))
+        assert b''.join(response.streaming_content) == content[2:10]
+
+        client.logout()
+        assert client.get(url).status_code == 404
+
+    def test_stale_export_job(self):
+        client = Client()
+        assert client.login(username='user', password='pass')
+        params = {'download_search': True, 'format': 'excel', 'assay': 'NSF1'}
+        url = client.get(reverse('observation-list'), params).url
+        job = claim_export_job()
+        # the worker died long ago
+        long_ago = job.heartbeat_time - timedelta(days=1)
+        ExportJob.objects.filter(pk=job.pk).update(heartbeat_time=long_ago)
+        assert client.get(url).status_code == 500
+        new_url = client.get(reverse('observation-list'), params).url
+        assert new_url != url
+
+        new_job = run_export_job(claim_export_job())
+        assert os.path.exists(new_job.fpath)
+        assert remove_expired_export_jobs() == 0
+        assert ExportJob.objects.get(pk=job.pk).status == ExportJob.FAILED
+        ExportJob.objects.update(end_time=long_ago)
+        assert remove_expired_export_jobs() == 2
+        assert not os.path.exists(new_job.fpath)
+        assert not ExportJob.objects.exists()
+
+
+class ObservationImageViewTest(TestCase):
+    def setUp(self):
+        load_test_data()
+
+    def test_resized_image(self):
+        observation = Observation.objects.first()
+        os.makedirs(only_scan_storage.location, exist_ok=True)
+        with TemporaryDirectory(dir=only_scan_storage.location) as photo_dir, \
+                TemporaryDirectory() as cache_dir, \
+                mock.patch.object(vavilov.utils.image_derivatives,
+                                  'IMAGE_CACHE_DIR', cache_dir):
+            photo_path = join(photo_dir, 'photo.jpg')
+            Image.new('RGB', (1000, 500)).save(photo_path)
+            obs_image = ObservationImages.objects.create(observation=observation,
+                                                         observation_image_uid='photo',
+                                                         image=relpath(photo_path, only_scan_storage.location))
+            url = reverse('observation_image-resized',
+                          kwargs={'observation_image_id': obs_image.pk,
+                                  'width': 300})
+            client = Client()
+            assert client.get(url).status_code == 404
+
+            assert client.login(username='admin', password='pass')
+            response = client.get(url)
+            assert response.status_code == 200
+            assert response['Content-Type'] == 'image/jpeg'
+            assert 'private' in response['Cache-Control']
+            content = b''.join(response.streaming_content)
+            assert int(response['Content-Length']) == len(content)
+            # it is resized to the next width served
+            with TemporaryDirectory() as tmp_dir:
+                resized_path = join(tmp_dir, 'resized.jpg')
+                with open(resized_path, 'wb') as fhand:
+                    fhand.write(content)
+                with Image.open(resized_path) as image:
+                    assert image.size == (400, 200)
+            assert len(os.listdir(cache_dir)) == 1
+
+            # the copy is not needed to answer a conditional request
+            for fname in os.listdir(cache_dir):
+                os.remove(join(cache_dir, fname))
+            response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            assert response.status_code == 304
+            assert not os.listdir(cache_dir)
+
+            corrupt_path = join(photo_dir, 'corrupt.jpg')
+            with open(corrupt_path, 'wb') as fhand:
+                fhand.write(b'not a jpeg')
+            corrupt_image = ObservationImages.objects.create(observation=observation,
+                                                             observation_image_uid='corrupt',
+                                                             image=relpath(corrupt_path, only_scan_storage.location))
+            url = reverse('observation_image-resized',
+                          kwargs={'observation_image_id': corrupt_image.pk,
+                                  'width': 300})
+            assert client.get(url).status_code == 404
+
+    def test_gallery_pages(self):
+        observation = Observation.objects.first()
+        obs_entity = observation.obs_entity
+        for index in range(3):
+            image_obs = Observation.objects.create(obs_entity=obs_entity,
+                                                   assay=observation.assay,
+                                                   trait=observation.trait)
+            ObservationImages.objects.create(observation=image_obs,
+                                             observation_image_uid='photo{}'.format(index),
+                                             image='photos/photo{}.jpg'.format(index))
+        client = Client()
+        assert client.login(username='admin', password='pass')
+        with mock.patch.object(vavilov.views.observation,
+                               'GALLERY_PAGE_SIZE', 2):
+            response = client.get(reverse('obs_entity-detail',
+                                          kwargs={'name': obs_entity.name}))
+            assert response.status_code == 200
+            images = json.loads(response.context['json_images'])
+            assert len(images) == 2
+            assert images[0]['big'].endswith('photos/photo0.jpg')
+            assert images[0]['title'] == 'Assay=' + observation.assay.name
+
+            response = client.get(response.context['gallery_next_url'])
+            page = json.loads(response.content.decode())
+            assert [image['big'].rsplit('/', 1)[-1] for image in page['images']] == ['photo2.jpg']
+            assert page['next_url'] is None
+
+        # the gallery only shows the images of a search
+        response = client.get(reverse('observation_image-gallery'))
+        assert json.loads(response.content.decode())['images'] == []
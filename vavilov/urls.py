@@ -5,12 +5,14 @@ from django.core.exceptions import ImproperlyConfigured
 
 from vavilov.conf import settings
 from vavilov.views.observation import (ObservationImageList, ObservationList,
-                                       ObservationEntityDetail)
+                                       ObservationEntityDetail,
+                                       observation_image, gallery_images)
 from vavilov.views.accession import AccessionList, AccessionDetail
 from vavilov.views.plant import PlantDetail
 from vavilov.views.assay import AssayDetail, AssayList
 from vavilov.views.trait import TraitDetail
 from vavilov.views.api import accession_numbers, taxons, plants, traits
+from vavilov.views.generic import export_download
 
 urlpatterns = [
     url(r'^plant/(?P<plant_name>.+)/$', PlantDetail.as_view(), name='plant-detail'),
@@ -20,6 +22,10 @@ urlpatterns = [
 
     url(r'^obs_entity/(?P<name>.+)/$', ObservationEntityDetail.as_view(), name='obs_entity-detail'),
     url(r'^observation_images/$', ObservationImageList.as_view(), name='observation-listimage'),
+    url(r'^observation_images/(?P<observation_image_id>\d+)/(?P<width>\d+)/$',
+        observation_image, name='observation_image-resized'),
+    url(r'^observation_images/gallery/$', gallery_images,
+        name='observation_image-gallery'),
     url(r'^observations/$', ObservationList.as_view(), name='observation-list'),
 
     url(r'^accessions/(?P<accession_number>.+)/$', AccessionDetail.as_view(),
@@ -30,6 +36,9 @@ urlpatterns = [
     url(r'^apis/taxons/$', taxons, name='api_taxons'),
     url(r'^apis/plants/$', plants, name='api_plants'),
     url(r'^apis/traits/$', traits, name='api_traits'),
+
+    url(r'^exports/(?P<export_job_id>\d+)/$', export_download,
+        name='export-download'),
 ]
 
 
@@ -1,42 +1,54 @@
-TEST_DATA = [['Accession', 'Observation entity', 'Plant part', 'Assay', 'Trait', 'Value'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit weight (g)', '66.1'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Brix/fruit', '4.6'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Perimeter', '17.7504'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Area', '19.3368'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Width Mid-height', '5.334'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Maximum Width', '5.3509'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Height Mid-width', '3.8185'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Maximum Height', '4.3603'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Curved Height', '4.507'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index External I', '0.8149'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index External II', '0.7159'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Curved Fruit Shape Index', '0.8524'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Fruit Blockiness', '0.7857'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Fruit Blockiness', '0.6778'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Triangle', '1.1593'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Ellipsoid', '0.0431'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Circular', '0.0883'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Rectangular', '0.551'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Shoulder Height', '0.0537'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Angle Micro', '253.6'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Angle Macro', '209.3'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Indentation Area', '0.0931'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Angle Micro', '189.8'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Angle Macro', '171.3'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Indentation Area', '0.0191'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal End Protrusion', '0.0162'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Ovoid', '0.1323'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'V, Asymmetry', '0.1384'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'H, Asymmetry,ov', '0.1274'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Width Widest Pos', '0.4702'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Eccentricity', '0.7432'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Eccentricity', '0.9526'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Eccentricity', '0.8863'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index Internal', '0.764'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Eccentricity Area Index', '0.4439'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Average RGB', 'R:148.76,G:95.32,B:74.93,lum:105.27'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Average LAB', 'hue:33.58,A:19.08,B:12.67,L:40.00,chroma:22.90'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long1', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Morphometric points', '1:359-88,2:178-36,3:45-174,4:52-358,5:185-519,6:369-539,7:541-523,8:656-376,9:658-200,10:533-61'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit weight (g)', '50.3'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Brix/fruit', '6.4'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Perimeter', '15.9214'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Area', '15.9289'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Width Mid-height', '4.9953'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Maximum Width', '5.0292'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Height Mid-width', '3.4121'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Maximum Height', '3.9455'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Curved Height', '4.0831'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index External I', '0.7845'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index External II', '0.6831'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Curved Fruit Shape Index', '0.8188'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Fruit Blockiness', '0.8085'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Fruit Blockiness', '0.5966'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Triangle', '1.3551'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Ellipsoid', '0.0499'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Circular', '0.1003'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Rectangular', '0.5486'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Shoulder Height', '0.0847'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Angle Micro', '269.3'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Angle Macro', '229.6'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Indentation Area', '0.1571'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Angle Micro', '174'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Angle Macro', '161.3'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Ovoid', '0.2042'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'V, Asymmetry', '0.0726'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'H, Asymmetry,ov', '0.1899'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Width Widest Pos', '0.4184'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Eccentricity', '0.6925'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Eccentricity', '0.8895'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Eccentricity', '0.8871'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index Internal', '0.694'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Eccentricity Area Index', '0.4719'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Average RGB', 'R:160.13,G:108.84,B:83.41,lum:114.61'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Average LAB', 'hue:39.67,A:17.12,B:14.20,L:44.59,chroma:22.25'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long2', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Morphometric points', '1:314-71,2:153-25,3:21-132,4:25-292,5:147-437,6:308-473,7:468-440,8:588-292,9:592-130,10:466-11'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit weight (g)', '74.78'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Brix/fruit', '3.8'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Perimeter', '19.8394'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Area', '25.5741'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Width Mid-height', '6.0367'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Maximum Width', '6.1214'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Height Mid-width', '4.5466'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Maximum Height', '5.0207'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Curved Height', '5.2247'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index External I', '0.8202'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index External II', '0.7532'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Curved Fruit Shape Index', '0.8643'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Fruit Blockiness', '0.8443'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Fruit Blockiness', '0.6424'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Triangle', '1.3144'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Ellipsoid', '0.0459'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Circular', '0.0781'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Rectangular', '0.5867'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Shoulder Height', '0.0456'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Angle Micro', '256.9'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Angle Macro', '210.1'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Indentation Area', '0.0687'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Angle Micro', '0.7'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Angle Macro', '169.6'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Indentation Area', '0.0048'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal End Protrusion', '0.0047'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Ovoid', '0.2095'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'V, Asymmetry', '0.0348'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'H, Asymmetry,ov', '0.2069'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Width Widest Pos', '0.4351'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Eccentricity', '0.723'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Eccentricity', '0.8898'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Eccentricity', '0.8843'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index Internal', '0.7535'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Eccentricity Area Index', '0.4648'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Average RGB', 'R:159.31,G:109.15,B:85.77,lum:115.33'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Average LAB', 'hue:37.75,A:16.88,B:13.07,L:44.58,chroma:21.35'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long3', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Morphometric points', '1:358-46,2:157-7,3:11-163,4:24-365,5:160-556,6:355-583,7:561-554,8:704-365,9:711-159,10:554-2'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit weight (g)', '83.89'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Brix/fruit', '3.6'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Perimeter', '19.833'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Area', '23.9295'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Width Mid-height', '6.0029'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Maximum Width', '6.0283'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Height Mid-width', '4.2757'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Maximum Height', '5.0038'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Curved Height', '5.0864'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index External I', '0.8301'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index External II', '0.7123'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Curved Fruit Shape Index', '0.8509'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Fruit Blockiness', '0.7377'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Fruit Blockiness', '0.6262'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Triangle', '1.1779'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Ellipsoid', '0.0449'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Circular', '0.0842'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Rectangular', '0.5293'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Shoulder Height', '0.0682'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Angle Micro', '253.9'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Angle Macro', '211.5'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Indentation Area', '0.1217'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Angle Micro', '184.7'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Angle Macro', '169.6'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Indentation Area', '0.0065'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal End Protrusion', '0.0124'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Ovoid', '0.1611'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'V, Asymmetry', '0.1715'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'H, Asymmetry,ov', '0.1668'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Width Widest Pos', '0.4381'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Eccentricity', '0.722'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Eccentricity', '0.9425'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Eccentricity', '0.882'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index Internal', '0.769'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Eccentricity Area Index', '0.4447'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Average RGB', 'R:153.83,G:103.77,B:82.19,lum:111.06'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Average LAB', 'hue:35.67,A:17.31,B:12.43,L:42.61,chroma:21.31'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long4', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Morphometric points', '1:404-102,2:201-26,3:50-192,4:64-407,5:213-586,6:428-599,7:614-551,8:734-388,9:732-203,10:590-67'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit weight (g)', '77.66'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Brix/fruit', '4.7'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Perimeter', '18.7082'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Area', '22.5436'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Width Mid-height', '5.6981'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Maximum Width', '5.7658'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Height Mid-width', '4.1487'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Maximum Height', '4.7413'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Curved Height', '5.0185'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index External I', '0.8223'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index External II', '0.7281'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Curved Fruit Shape Index', '0.875'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Fruit Blockiness', '0.8113'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Fruit Blockiness', '0.6805'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Triangle', '1.1921'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Ellipsoid', '0.0495'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Circular', '0.0857'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Rectangular', '0.5872'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Shoulder Height', '0.0492'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Angle Micro', '275.8'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Angle Macro', '222.3'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Indentation Area', '0.0625'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Angle Micro', '1.2'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Angle Macro', '170'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Indentation Area', '0.0025'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal End Protrusion', '0.0063'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Ovoid', '0.1844'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'V, Asymmetry', '0.0672'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'H, Asymmetry,ov', '0.1736'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Width Widest Pos', '0.4232'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Eccentricity', '0.7013'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Eccentricity', '0.8929'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Eccentricity', '0.8889'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index Internal', '0.7313'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Eccentricity Area Index', '0.4753'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Average RGB', 'R:157.61,G:109.87,B:87.87,lum:115.52'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Average LAB', 'hue:37.20,A:16.21,B:12.30,L:44.61,chroma:20.35'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long5', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Morphometric points', '1:349-68,2:159-2,3:11-157,4:20-354,5:153-536,6:353-555,7:539-523,8:664-346,9:670-160,10:529-19'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit weight (g)', '92.32'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Brix/fruit', '5.2'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Perimeter', '19.4514'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Area', '24.5493'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Width Mid-height', '6.2399'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Maximum Width', '6.2484'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Height Mid-width', '4.191'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Maximum Height', '4.8006'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Curved Height', '4.8398'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index External I', '0.7683'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index External II', '0.6716'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Curved Fruit Shape Index', '0.7829'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Fruit Blockiness', '0.7449'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Fruit Blockiness', '0.692'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Triangle', '1.0765'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Ellipsoid', '0.0458'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Circular', '0.1032'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Rectangular', '0.5566'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Shoulder Height', '0.0701'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Angle Micro', '249.8'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Angle Macro', '206.6'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Indentation Area', '0.0854'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Angle Micro', '3.4'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Angle Macro', '174.9'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Indentation Area', '0.0084'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal End Protrusion', '0.0102'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Obovoid', '0.0888'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'V, Asymmetry', '0.1303'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'H, Asymmetry,ob', '0.1281'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Width Widest Pos', '0.4797'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Eccentricity', '0.6961'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Eccentricity', '0.8894'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Eccentricity', '0.8854'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index Internal', '0.6701'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Eccentricity Area Index', '0.4687'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Average RGB', 'R:153.45,G:97.75,B:78.12,lum:108.97'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Average LAB', 'hue:32.63,A:19.88,B:12.73,L:41.20,chroma:23.61'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long6', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Morphometric points', '1:348-70,2:158-42,3:10-194,4:29-389,5:179-550,6:375-562,7:580-539,8:726-353,9:716-147,10:548-1'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit weight (g)', '89.7'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Brix/fruit', '5.1'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Perimeter', '19.6146'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Area', '23.3604'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Width Mid-height', '6.1299'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Maximum Width', '6.1976'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Height Mid-width', '3.5645'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Maximum Height', '4.5551'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Curved Height', '5.0151'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index External I', '0.735'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index External II', '0.5815'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Curved Fruit Shape Index', '0.8204'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Fruit Blockiness', '0.8522'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Fruit Blockiness', '0.6989'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Triangle', '1.2194'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Ellipsoid', '0.0659'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Circular', '0.1335'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Rectangular', '0.6025'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Shoulder Height', '0.0688'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Angle Micro', '259.7'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Angle Macro', '234.2'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Indentation Area', '0.0632'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Angle Micro', '215'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Angle Macro', '195.6'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Indentation Area', '0.0316'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal End Protrusion', '0.0083'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Ovoid', '0.2171'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'V, Asymmetry', '0.1041'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'H, Asymmetry,ov', '0.1777'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Width Widest Pos', '0.4164'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Eccentricity', '0.6257'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Eccentricity', '0.8889'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Eccentricity', '0.8912'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index Internal', '0.5813'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Eccentricity Area Index', '0.5319'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Average RGB', 'R:159.85,G:115.47,B:88.14,lum:116.70'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Average LAB', 'hue:44.25,A:14.27,B:13.90,L:46.02,chroma:19.92'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long7', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Morphometric points', '1:368-88,2:None-None,3:None-None,4:None-None,5:None-None,6:None-None,7:None-None,8:None-None,9:None-None'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit weight (g)', '79.86'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Brix/fruit', '5'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Perimeter', '18.8834'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Area', '21.6143'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Width Mid-height', '5.8843'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Maximum Width', '5.9436'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Height Mid-width', '3.6915'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Maximum Height', '4.3688'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Curved Height', '4.681'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index External I', '0.735'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index External II', '0.6273'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Curved Fruit Shape Index', '0.7914'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Fruit Blockiness', '0.8317'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Fruit Blockiness', '0.6892'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Triangle', '1.2067'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Ellipsoid', '0.0545'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Circular', '0.1186'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Rectangular', '0.5934'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Shoulder Height', '0.0564'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Angle Micro', '254.3'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Angle Macro', '223.1'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Indentation Area', '0.0683'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Angle Micro', '202.1'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Angle Macro', '188.4'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Indentation Area', '0.0578'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal End Protrusion', '0.0096'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Ovoid', '0.1788'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'V, Asymmetry', '0.0567'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'H, Asymmetry,ov', '0.1487'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Width Widest Pos', '0.4419'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Eccentricity', '0.7029'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Eccentricity', '0.9306'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Eccentricity', '0.8873'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index Internal', '0.6606'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Eccentricity Area Index', '0.4833'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Average RGB', 'R:157.95,G:109.55,B:88.52,lum:115.99'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Average LAB', 'hue:35.61,A:16.60,B:11.89,L:44.46,chroma:20.41'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long8', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Morphometric points', '1:372-92,2:180-30,3:30-166,4:38-362,5:187-523,6:384-527,7:569-527,8:698-357,9:707-172,10:558-35'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit weight (g)', '88.04'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Brix/fruit', '4.5'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Perimeter', '19.1061'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Area', '23.4931'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Width Mid-height', '5.8081'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Maximum Width', '5.8589'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Height Mid-width', '4.4789'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Maximum Height', '4.9276'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Curved Height', '5.031'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index External I', '0.841'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index External II', '0.7711'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Curved Fruit Shape Index', '0.8649'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Fruit Blockiness', '0.7813'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Fruit Blockiness', '0.6224'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Triangle', '1.2553'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Ellipsoid', '0.0394'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Circular', '0.0697'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Rectangular', '0.5457'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Shoulder Height', '0.0332'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Angle Micro', '250.5'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Angle Macro', '204.9'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Indentation Area', '0.0506'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Angle Micro', '195.2'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Angle Macro', '168.1'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Indentation Area', '0.02'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal End Protrusion', '0.0106'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Ovoid', '0.1787'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'V, Asymmetry', '0.0853'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'H, Asymmetry,ov', '0.1616'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Width Widest Pos', '0.4304'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Eccentricity', '0.7263'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Proximal Eccentricity', '0.8941'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Distal Eccentricity', '0.881'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Fruit Shape Index Internal', '0.7757'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Eccentricity Area Index', '0.4498'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Average RGB', 'R:153.93,G:98.16,B:77.77,lum:109.02'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Average LAB', 'hue:33.25,A:19.77,B:12.96,L:41.33,chroma:23.64'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Long9', 'red ripe fruit longitudinal', 'ALCALAX_summer15', 'Morphometric points', '1:374-57,2:176-19,3:27-180,4:44-384,5:193-569,6:397-578,7:581-534,8:696-360,9:695-179,10:555-35'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran1', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit weight (g)', '53.46'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran1', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Locule number', '4'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran1', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Brix/fruit', '6.8'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran1', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F1', '42.6'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran1', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F2', '45.4'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran1', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F average', '44'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran1', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Lobedness Degree', '1.2917'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran1', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Area', '9.0092'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran1', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Area Ratio', '0.44149'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran1', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Thickness', '1.2827'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran1', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Thickness Ratio', '0.201'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran1', 'red ripe fruit transversal', 'ALCALAX_summer15', 'External fruit color LAB', 'A:13.94,B:15.64,L:45.25'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran2', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit weight (g)', '61.03'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran2', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Locule number', '3'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran2', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Brix/fruit', '5.5'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran2', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F1', '65.2'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran2', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F2', '63'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran2', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F average', '64.1'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran2', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Lobedness Degree', '1.5251'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran2', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Area', '9.2304'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran2', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Area Ratio', '0.441381'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran2', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Thickness', '1.2955'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran2', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Thickness Ratio', '0.2022'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran2', 'red ripe fruit transversal', 'ALCALAX_summer15', 'External fruit color LAB', 'A:12.71,B:12.76,L:44.16'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran3', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit weight (g)', '60.55'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran3', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Locule number', '3'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran3', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Brix/fruit', '6'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran3', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F1', '60.3'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran3', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F2', '61.4'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran3', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F average', '60.849999999999994'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran3', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Lobedness Degree', '1.2049'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran3', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Area', '9.7636'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran3', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Area Ratio', '0.485865'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran3', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Thickness', '1.4309'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran3', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Thickness Ratio', '0.1977'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran3', 'red ripe fruit transversal', 'ALCALAX_summer15', 'External fruit color LAB', 'A:16.64,B:10.31,L:35.12'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran4', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit weight (g)', '73.71'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran4', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Locule number', '3'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran4', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Brix/fruit', '4.8'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran4', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F1', '55.2'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran4', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F2', '63.7'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran4', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F average', '59.45'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran4', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Lobedness Degree', '2.0287'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran4', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Area', '10.8986'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran4', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Area Ratio', '0.441043'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran4', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Thickness', '1.3928'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran4', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Thickness Ratio', '0.2015'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran4', 'red ripe fruit transversal', 'ALCALAX_summer15', 'External fruit color LAB', 'A:14.63,B:10.47,L:36.09'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran5', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit weight (g)', '59.43'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran5', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Locule number', '3'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran5', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Brix/fruit', '5.1'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran5', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F1', '51.5'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran5', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F2', '63.8'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran5', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F average', '57.65'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran5', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Lobedness Degree', '1.4017'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran5', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Area', '8.5925'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran5', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Area Ratio', '0.441541'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran5', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Thickness', '1.2319'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran5', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Thickness Ratio', '0.1997'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran5', 'red ripe fruit transversal', 'ALCALAX_summer15', 'External fruit color LAB', 'A:17.94,B:11.70,L:38.23'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran6', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit weight (g)', '59.03'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran6', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Locule number', '3'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran6', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Brix/fruit', '4.3'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran6', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F1', '62.8'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran6', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F2', '62.3'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran6', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F average', '62.55'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran6', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Lobedness Degree', '1.3032'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran6', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Area', '9.5514'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran6', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Area Ratio', '0.441308'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran6', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Thickness', '1.3209'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran6', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Thickness Ratio', '0.2016'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran6', 'red ripe fruit transversal', 'ALCALAX_summer15', 'External fruit color LAB', 'A:21.76,B:14.02,L:40.84'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran7', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit weight (g)', '61.21'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran7', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Locule number', '3'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran7', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Brix/fruit', '5.4'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran7', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F1', '51.2'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran7', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F2', '48.5'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran7', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F average', '49.85'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran7', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Lobedness Degree', '1.1957'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran7', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Area', '9.7055'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran7', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Area Ratio', '0.44114'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran7', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Thickness', '1.3081'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran7', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Thickness Ratio', '0.1997'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran7', 'red ripe fruit transversal', 'ALCALAX_summer15', 'External fruit color LAB', 'A:21.01,B:11.90,L:39.40'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran8', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit weight (g)', '69.83'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran8', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Locule number', '3'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran8', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Brix/fruit', '5.2'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran8', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F1', '55.8'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran8', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F2', '56.7'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran8', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F average', '56.25'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran8', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Lobedness Degree', '1.1099'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran8', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Area', '9.8855'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran8', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Area Ratio', '0.441285'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran8', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Thickness', '1.3547'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran8', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Thickness Ratio', '0.2009'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran8', 'red ripe fruit transversal', 'ALCALAX_summer15', 'External fruit color LAB', 'A:17.31,B:13.31,L:39.86'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran9', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit weight (g)', '75.1'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran9', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Locule number', '3'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran9', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Brix/fruit', '4.8'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran9', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F1', '54.9'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran9', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F2', '60.4'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran9', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Fruit firmness F average', '57.65'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran9', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Lobedness Degree', '1.3576'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran9', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Area', '11.4952'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran9', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Area Ratio', '0.440955'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran9', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Thickness', '1.4436'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran9', 'red ripe fruit transversal', 'ALCALAX_summer15', 'Tomato Pericarp Thickness Ratio', '0.2136'], ['TRBA0310', 'ALCALAX_summer15_TRBA0310_red ripe fruit-Tran9', 'red ripe fruit transversal', 'ALCALAX_summer15', 'External fruit color LAB', 'A:14.35,B:14.25,L:43.24']]
-
-
-def queryset_to_columns(rows):
-    values_by_obs_entity = {}
-    traits = set()
-    #  remove header
-    rows.__next__()
-    for row in rows:
-        accession = row[0]
-        obs_entity = row[1]
-        plant_part = row[2]
-        assay = row[3]
-        trait = row[4]
-        value = row[5]
-        traits.add(trait)
-        if obs_entity not in values_by_obs_entity:
-            values_by_obs_entity[obs_entity] = {'assay': assay,
-                                                'accession': accession,
-                                                'plant_part': plant_part,
-                                                'observations': {}}
-        if trait not in values_by_obs_entity[obs_entity]['observations']:
-            values_by_obs_entity[obs_entity]['observations'][trait] = []
-        values_by_obs_entity[obs_entity]['observations'][trait].append(value)
-
-    traits = sorted(list(traits))
-    header = ['Accession', 'Assay', 'Observation Entity', 'Plant Part'] + traits
-    yield header
-    for obs_entity in sorted(values_by_obs_entity.keys()):
-        data = values_by_obs_entity[obs_entity]
-        row = [data['accession'], data['assay'], obs_entity, data['plant_part']]
-        observations = data['observations']
-        for trait in traits:
-            value = observations.get(trait)
-            value = ':'.join(value) if value else ''
-            row.append(value)
-        yield row
+from itertools import groupby
+import json
+
+from django.db.models import Exists, OuterRef
+from django.utils.html import strip_tags
+
+from vavilov.models import (ObservationImages, annotate_accession_number,
+                            format_observation_value)
+
+COLUMN_HEADER = ['Accession', 'Assay', 'Observation Entity', 'Plant Part']
+
+
+def format_column_value(trait_type, value, value_json, from_image):
+    if value_json is not None:
+        value = format_observation_value(trait_type, json.loads(value_json))
+    value = strip_tags(value) if value else ''
+    if from_image:
+        value += '(image_origen)'
+    return value
 
 
-if __name__ == '__main__':
-    for r in queryset_to_columns(iter(TEST_DATA)):
-        print(r)
+def annotate_from_image(observations):
+    'from_image tells if the observation was taken from an image'
+    images = ObservationImages.objects.filter(observation__object__subject=OuterRef('pk'))
+    return observations.annotate(from_image=Exists(images))
+
+
+def queryset_to_columns(observations):
+    '''It yields a row per observation entity with a column per trait.
+
+    The observations are read ordered by observation entity from the
+    database, so only the observations of one entity are kept in memory'''
+    traits = observations.order_by().values_list('trait__name', flat=True)
+    traits = sorted(set(traits.distinct()))
+    yield COLUMN_HEADER + traits
+
+    observations = annotate_accession_number(observations)
+    observations = annotate_from_image(observations)
+    observations = observations.order_by('obs_entity__name', 'observation_id')
+    observations = observations.values_list('obs_entity__name',
+                                            'accession_number', 'assay__name',
+                                            'obs_entity__part__name',
+                                            'trait__name', 'trait__type__name',
+                                            'value', 'value_json', 'from_image')
+
+    for obs_entity, entity_obs in groupby(observations.iterator(),
+                                          key=lambda obs: obs[0]):
+        values_by_trait = {}
+        for obs in entity_obs:
+            values_by_trait.setdefault(obs[4], []).append(format_column_value(*obs[5:]))
+        row = [obs[1], obs[2], obs_entity, obs[3] or '']
+        for trait in traits:
+            row.append(':'.join(values_by_trait.get(trait, [])))
+        yield row
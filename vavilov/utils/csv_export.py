@@ -0,0 +1,109 @@
+from collections import namedtuple
+
+from vavilov.conf.settings import (ACCESSION_TABLE_FIELDS,
+                                   OBSERVATION_TABLE_FIELDS)
+from vavilov.models import (Country, Person, annotate_accession_number,
+                            date_to_str)
+from vavilov.utils.column_format import (annotate_from_image,
+                                         format_column_value)
+
+# The columns of the csv files, the same ones that the tables of the search
+# views. format takes the values of the paths, it is not required for a
+# single path
+ExportColumn = namedtuple('ExportColumn', ['field', 'header', 'paths',
+                                           'format'])
+
+
+def _format_observation_value(value, trait_type, value_json, from_image):
+    if value in (None, ''):
+        return None
+    return format_column_value(trait_type, value, value_json, from_image)
+
+
+def _format_country(name, code2):
+    if name is None:
+        return None
+    return str(Country(name=name, code2=code2))
+
+
+def _format_holder_accession(type_name, number, institute_name,
+                             institute_description):
+    if number is None or type_name != 'internal':
+        return None
+    institute = Person(name=institute_name, description=institute_description)
+    return '{}: {}'.format(institute, number)
+
+
+OBSERVATION_COLUMNS = [
+    ExportColumn('accession', 'Accession', ['accession_number'], None),
+    ExportColumn('obs_entity', 'Observation entity', ['obs_entity__name'],
+                 None),
+    ExportColumn('plant_part', 'Plant part', ['obs_entity__part__name'], None),
+    ExportColumn('assay', 'Assay', ['assay__name'], None),
+    ExportColumn('trait', 'Trait', ['trait__name'], None),
+    ExportColumn('value', 'Value', ['value', 'trait__type__name', 'value_json',
+                                    'from_image'], _format_observation_value),
+    ExportColumn('observer', 'Observer', ['observer'], None),
+    ExportColumn('creation_time', 'Creation Time', ['creation_time'], None)]
+
+ACCESSION_COLUMNS = [
+    ExportColumn('accession_number', 'Accession', ['accession_number'], None),
+    ExportColumn('collecting_number', 'Collecting number', ['synonym_code'],
+                 None),
+    ExportColumn('holder_number', 'Holder accession',
+                 ['type__name', 'holder_number', 'holder_institute_name',
+                  'holder_institute_description'], _format_holder_accession),
+    ExportColumn('organism', 'Organism', ['organism_name'], None),
+    ExportColumn('country', 'Collecting country',
+                 ['passport_country_name', 'passport_country_code2'],
+                 _format_country),
+    ExportColumn('region', 'Collecting Region', ['passport_region'], None),
+    ExportColumn('province', 'Collecting province', ['passport_province'],
+                 None),
+    ExportColumn('local_name', 'Local Name', ['passport_local_name'], None),
+    ExportColumn('collecting_date', 'Collecting date',
+                 ['passport_collecting_date'], date_to_str)]
+
+
+def queryset_to_rows(queryset, columns, fields):
+    '''It yields the header and a row per object, the values are read
+    with a single query'''
+    columns = [column for column in columns if column.field in fields]
+    yield [column.header for column in columns]
+
+    paths, slices = [], []
+    for column in columns:
+        slices.append(slice(len(paths), len(paths) + len(column.paths)))
+        paths.extend(column.paths)
+
+    for values in queryset.values_list(*paths).iterator():
+        row = []
+        for column, slice_ in zip(columns, slices):
+            if column.format is None:
+                value = values[slice_.start]
+            else:
+                value = column.format(*values[slice_])
+            row.append('' if value is None else value)
+        yield row
+
+
+def observations_to_rows(observations):
+    observations = annotate_accession_number(observations)
+    observations = annotate_from_image(observations)
+    return queryset_to_rows(observations, OBSERVATION_COLUMNS,
+                            OBSERVATION_TABLE_FIELDS)
+
+
+def accessions_to_rows(accessions):
+    if 'passport_pk' not in accessions.query.annotations:
+        accessions = accessions.with_passport()
+    return queryset_to_rows(accessions, ACCESSION_COLUMNS,
+                            ACCESSION_TABLE_FIELDS)
+
+
+def get_export_rows(kind, queryset):
+    if kind == 'observations':
+        return observations_to_rows(queryset)
+    elif kind == 'accessions':
+        return accessions_to_rows(queryset)
+    raise ValueError('No export rows for: ' + kind)
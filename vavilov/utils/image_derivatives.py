@@ -0,0 +1,214 @@
+from hashlib import sha256
+import math
+from multiprocessing import Pool
+import os
+
+from PIL import Image, ImageOps
+
+from vavilov.conf.settings import (IMAGE_DERIVATIVE_SIZES, IMAGE_CACHE_DIR,
+                                   IMAGE_CACHE_MAX_SIZE, IMAGE_RESIZE_WIDTHS)
+
+THUMBNAILS_DIR = 'thumbnails'
+# EXIF ImageDescription, the derivatives keep in it the key of the photo
+# they were made from
+KEY_EXIF_TAG = 0x010E
+ORIENTATION_EXIF_TAG = 0x0112
+# the orientations that turn the photo sideways
+SIDEWAYS_ORIENTATIONS = (5, 6, 7, 8)
+JPEG_QUALITY = 85
+HASH_BLOCK_SIZE = 1024 * 1024
+# Photos sent to each process of the pool at once
+DERIVATIVES_CHUNK_SIZE = 10
+
+
+def get_derivative_path(photo_path, size_name):
+    'The derivatives are written in a dir next to the photo'
+    photo_dir, fname = os.path.split(photo_path)
+    return os.path.join(photo_dir, size_name, fname)
+
+
+def _hash_file(fpath):
+    hash_ = sha256()
+    with open(fpath, 'rb') as fhand:
+        for block in iter(lambda: fhand.read(HASH_BLOCK_SIZE), b''):
+            hash_.update(block)
+    return hash_.hexdigest()
+
+
+def _read_key(fpath):
+    try:
+        with Image.open(fpath) as image:
+            return image.getexif().get(KEY_EXIF_TAG)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_newer(fpath, mtime):
+    try:
+        return os.stat(fpath).st_mtime_ns >= mtime
+    except FileNotFoundError:
+        return False
+
+
+def _save_image(image, format_, fpath, key=None):
+    os.makedirs(os.path.dirname(fpath), exist_ok=True)
+    exif = Image.Exif()
+    if key is not None:
+        exif[KEY_EXIF_TAG] = key
+    if format_ == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    # other processes could be writing it, it is replaced once finished
+    part_fpath = '{}.{}.part'.format(fpath, os.getpid())
+    image.save(part_fpath, format_, quality=JPEG_QUALITY,
+               exif=exif.tobytes())
+    os.replace(part_fpath, fpath)
+
+
+def _draft(image, scale):
+    # the jpegs are decoded at the smallest scale bigger than the given one
+    image.draft('RGB', (math.ceil(image.width * scale),
+                        math.ceil(image.height * scale)))
+
+
+def _write_derivatives(photo_path, derivatives):
+    with Image.open(photo_path) as image:
+        format_ = image.format
+        largest = max(max_size for _, max_size, _ in derivatives.values())
+        _draft(image, largest / max(image.size))
+        image = ImageOps.exif_transpose(image)
+        # each derivative is made from the bigger one
+        for fpath, max_size, key in sorted(derivatives.values(),
+                                           key=lambda values: -values[1]):
+            image = image.copy()
+            image.thumbnail((max_size, max_size), Image.LANCZOS)
+            _save_image(image, format_, fpath, key)
+
+
+def make_image_derivatives(photo_path, sizes=None):
+    '''It writes the smaller copies of the photo, one by size name with the
+    given largest side. It returns the size names written.
+
+    The derivatives newer than the photo are up to date. The older ones keep
+    the hash of the content of the photo they were made from, they are only
+    made again if the content has changed'''
+    if sizes is None:
+        sizes = IMAGE_DERIVATIVE_SIZES
+    photo_mtime = os.stat(photo_path).st_mtime_ns
+    fpaths = {size_name: get_derivative_path(photo_path, size_name)
+              for size_name in sizes}
+    to_check = [size_name for size_name, fpath in sorted(fpaths.items())
+                if not _is_newer(fpath, photo_mtime)]
+    if not to_check:
+        return []
+
+    content_hash = _hash_file(photo_path)
+    derivatives = {}
+    for size_name in to_check:
+        key = '{}:{}'.format(content_hash, sizes[size_name])
+        if _read_key(fpaths[size_name]) == key:
+            # the photo was touched, but not changed
+            os.utime(fpaths[size_name])
+        else:
+            derivatives[size_name] = fpaths[size_name], sizes[size_name], key
+    if derivatives:
+        _write_derivatives(photo_path, derivatives)
+    return sorted(derivatives)
+
+
+def _make_image_derivatives(args):
+    photo_path, sizes = args
+    return photo_path, make_image_derivatives(photo_path, sizes)
+
+
+def make_images_derivatives(photo_paths, sizes=None, processes=1):
+    '''It makes the derivatives of the photos in processes. It yields the
+    photo path and the size names written for each photo'''
+    args = ((photo_path, sizes) for photo_path in photo_paths)
+    if processes == 1:
+        yield from map(_make_image_derivatives, args)
+        return
+    with Pool(processes) as pool:
+        yield from pool.imap_unordered(_make_image_derivatives, args,
+                                       chunksize=DERIVATIVES_CHUNK_SIZE)
+
+
+def write_resized_image(photo_path, fpath, width):
+    '''It writes a copy of the photo with the given width, the narrower
+    photos are not enlarged'''
+    with Image.open(photo_path) as image:
+        format_ = image.format
+        shown_width = image.width
+        if image.getexif().get(ORIENTATION_EXIF_TAG) in SIDEWAYS_ORIENTATIONS:
+            shown_width = image.height
+        _draft(image, width / shown_width)
+        image = ImageOps.exif_transpose(image)
+        if image.width > width:
+            height = max(round(image.height * width / image.width), 1)
+            image = image.resize((width, height), Image.LANCZOS)
+        _save_image(image, format_, fpath)
+
+
+def get_resize_width(width):
+    '''The narrowest of the widths served that is not narrower than the
+    given one, the widest otherwise'''
+    widths = sorted(IMAGE_RESIZE_WIDTHS)
+    for resize_width in widths:
+        if resize_width >= width:
+            return resize_width
+    return widths[-1]
+
+
+def get_resize_key(photo_path, width):
+    '''The key of the copy of the photo with the given width, a hash of the
+    photo path, size, modification time and the width'''
+    stat = os.stat(photo_path)
+    key = '\t'.join([photo_path, str(stat.st_size), str(stat.st_mtime_ns),
+                     str(width)])
+    return sha256(key.encode()).hexdigest()
+
+
+def _evict_resized_images(cache_dir, max_size, keep_fpath):
+    '''It removes the least recently used images until the cache fits in
+    max_size bytes'''
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and not entry.name.endswith('.part'):
+            stat = entry.stat()
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+    size = sum(entry_size for _, entry_size, _ in entries)
+    for _, entry_size, fpath in sorted(entries):
+        if size <= max_size:
+            break
+        if fpath == keep_fpath:
+            continue
+        try:
+            os.remove(fpath)
+        except FileNotFoundError:
+            # removed by another process
+            pass
+        size -= entry_size
+
+
+def get_resized_image(photo_path, width, cache_dir=None, max_size=None):
+    '''It returns an open file with a copy of the photo with the given width
+    and its key.
+
+    The copies are written on first request in a cache dir. It keeps the
+    least recently used ones until it grows bigger than max_size bytes'''
+    if cache_dir is None:
+        cache_dir = IMAGE_CACHE_DIR
+    if max_size is None:
+        max_size = IMAGE_CACHE_MAX_SIZE
+    key = get_resize_key(photo_path, width)
+    fpath = os.path.join(cache_dir, key + os.path.splitext(photo_path)[1].lower())
+    try:
+        # the modification time of a cached copy is its last use
+        os.utime(fpath)
+        # once open, the eviction of other processes does not remove it
+        return open(fpath, 'rb'), key
+    except FileNotFoundError:
+        pass
+    write_resized_image(photo_path, fpath, width)
+    fhand = open(fpath, 'rb')
+    _evict_resized_images(cache_dir, max_size, keep_fpath=fpath)
+    return fhand, key
@@ -0,0 +1,79 @@
+import numpy
+
+from vavilov.models import (ObservationEntity, annotate_accession_number,
+                            filter_observations)
+
+AGGREGATIONS = ('mean', 'median', 'count')
+
+
+def filter_matrix_observations(user, assay=None, traits=None,
+                               accessions=None):
+    '''traits and accessions are comma separated names'''
+    search_criteria = {}
+    if assay:
+        search_criteria['assay'] = assay
+    if traits:
+        search_criteria['traits'] = traits
+    observations = filter_observations(search_criteria, user=user)
+    if accessions:
+        # a subquery, the join with the plants would repeat the observations
+        accession_numbers = [acc.strip() for acc in accessions.split(',')]
+        obs_entities = ObservationEntity.objects.filter(observationentityplant__plant__accession__accession_number__in=accession_numbers)
+        observations = observations.filter(obs_entity__in=obs_entities)
+    return observations
+
+
+def _aggregate(cell_indexes, values, n_cells, aggregation):
+    counts = numpy.bincount(cell_indexes, minlength=n_cells)
+    if aggregation == 'count':
+        return counts.astype(float)
+
+    matrix = numpy.full(n_cells, numpy.nan)
+    filled = counts > 0
+    if aggregation == 'mean':
+        sums = numpy.bincount(cell_indexes, weights=values, minlength=n_cells)
+        matrix[filled] = sums[filled] / counts[filled]
+    else:
+        # median of each cell from its values sorted in the cell
+        order = numpy.lexsort((values, cell_indexes))
+        values = values[order]
+        starts = numpy.cumsum(counts) - counts
+        lows = starts + (counts - 1) // 2
+        highs = starts + counts // 2
+        matrix[filled] = (values[lows[filled]] + values[highs[filled]]) / 2
+    return matrix
+
+
+def observations_to_matrix(observations, aggregation='mean'):
+    '''It returns the accessions, the traits and an accession x trait matrix
+    with the numeric values of the observations aggregated by the given
+    method. The observations without a numeric value are not taken into
+    account and the empty cells are nan'''
+    if aggregation not in AGGREGATIONS:
+        raise ValueError('Aggregation must be one of: ' + ', '.join(AGGREGATIONS))
+
+    observations = annotate_accession_number(observations)
+    observations = observations.exclude(value_number=None).order_by()
+    observations = observations.values_list('accession_number', 'trait__name',
+                                            'value_number')
+    accession_numbers, trait_names, values = [], [], []
+    for accession_number, trait_name, value in observations.iterator():
+        accession_numbers.append(accession_number or '')
+        trait_names.append(trait_name)
+        values.append(value)
+
+    accessions, row_indexes = numpy.unique(numpy.array(accession_numbers,
+                                                       dtype=str),
+                                           return_inverse=True)
+    traits, col_indexes = numpy.unique(numpy.array(trait_names, dtype=str),
+                                       return_inverse=True)
+    n_cells = accessions.size * traits.size
+    cell_indexes = (row_indexes * traits.size + col_indexes).astype(numpy.int64)
+    matrix = _aggregate(cell_indexes, numpy.array(values, dtype=float),
+                        n_cells, aggregation)
+    return accessions, traits, matrix.reshape(accessions.size, traits.size)
+
+
+def write_matrix_npz(fhand, accessions, traits, matrix):
+    # numpy needs a seekable file to write the npz
+    numpy.savez(fhand, matrix=matrix, accessions=accessions, traits=traits)
@@ -0,0 +1,96 @@
+from collections import OrderedDict
+
+import numpy
+
+from vavilov.conf.settings import (TRAIT_STATS_BINS, BY_OBJECT_OBS_PERM,
+                                   OBS_PERM_BY_ASSAY, VISIBLE_IDS_CACHE)
+from vavilov.models import (Assay, Observation, get_trait_values,
+                            get_visible_ids, get_visible_objects)
+
+QUANTILES = (25, 50, 75)
+
+
+def compute_stats(values, bins=TRAIT_STATS_BINS):
+    count = int(values.size)
+    if not count:
+        return {'count': 0, 'mean': None, 'sd': None, 'min': None,
+                'max': None, 'quantiles': None, 'histogram': None}
+    quantiles = numpy.percentile(values, QUANTILES)
+    hist_counts, hist_edges = numpy.histogram(values, bins=bins)
+    return {'count': count,
+            'mean': float(values.mean()),
+            'sd': float(values.std(ddof=1)) if count > 1 else None,
+            'min': float(values[0]),
+            'max': float(values[-1]),
+            'quantiles': OrderedDict((str(quantile), float(value))
+                                     for quantile, value in zip(QUANTILES, quantiles)),
+            'histogram': {'counts': hist_counts.tolist(),
+                          'edges': hist_edges.tolist()}}
+
+
+def _get_fully_visible_assays(trait, user):
+    '''The assays of the trait whose observations the user can all view. None
+    if the observations are viewed one by one'''
+    assays = Assay.objects.filter(observation__trait=trait).distinct()
+    if user.is_superuser:
+        return assays
+    if not BY_OBJECT_OBS_PERM:
+        if user.has_perm('vavilov.view_observation'):
+            return assays
+        return assays.none()
+    if OBS_PERM_BY_ASSAY:
+        return get_visible_objects(user, 'vavilov.view_assay', assays)
+    return None
+
+
+def _get_visible_observation_ids(trait, user):
+    '''The sorted ids of the observations that the user can view. They are
+    taken from the visible ids cache, without it only the ids of the
+    observations of the trait are read'''
+    if VISIBLE_IDS_CACHE is not None:
+        ids = get_visible_ids(user, 'vavilov.view_observation', Observation)
+        if ids is not None:
+            return numpy.frombuffer(ids, dtype='l')
+    observations = get_visible_objects(user, 'vavilov.view_observation',
+                                       Observation.objects.filter(trait=trait))
+    return numpy.sort(numpy.fromiter(observations.values_list('pk', flat=True).iterator(),
+                                     dtype='l'))
+
+
+def _get_values_by_assay(trait, user):
+    '''The stored values of the assays, only the ones of the observations that
+    the user can view if they are viewed one by one'''
+    assays = _get_fully_visible_assays(trait, user)
+    visible_ids = None
+    if assays is None:
+        assays = Assay.objects.filter(observation__trait=trait).distinct()
+        visible_ids = _get_visible_observation_ids(trait, user)
+    assays = list(assays)
+    values_by_assay = {}
+    for assay_id, (values, observation_ids) in get_trait_values(trait, assays).items():
+        values = numpy.frombuffer(values)
+        if visible_ids is not None:
+            observation_ids = numpy.frombuffer(observation_ids, dtype='l')
+            values = values[numpy.isin(observation_ids, visible_ids,
+                                       assume_unique=True)]
+            # the assays of the user are the ones with visible observations
+            if not len(values):
+                continue
+        values_by_assay[assay_id] = values
+    return {assay.name: values_by_assay[assay.assay_id]
+            for assay in assays if assay.assay_id in values_by_assay}
+
+
+def get_trait_stats(trait, user, bins=TRAIT_STATS_BINS):
+    '''The statistics of the numeric values of the trait, for all of the
+    observations that the user can view and by assay'''
+    values_by_assay = _get_values_by_assay(trait, user)
+    stats_by_assay = OrderedDict()
+    all_values = []
+    for assay_name, values in sorted(values_by_assay.items()):
+        all_values.append(values)
+        stats_by_assay[assay_name] = compute_stats(values, bins=bins)
+    all_values = numpy.sort(numpy.concatenate(all_values)) if all_values else numpy.array([])
+    return {'trait': trait.name,
+            'stats': compute_stats(all_values, bins=bins),
+            'assays': stats_by_assay}
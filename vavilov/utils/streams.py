@@ -1,15 +1,20 @@
 import csv
 import logging
+from os.path import getsize
+import re
 from time import time
-from django.http.response import StreamingHttpResponse, HttpResponse
+
+from django.http.response import (StreamingHttpResponse, HttpResponse,
+                                  FileResponse)
 
 from openpyxl import Workbook
 from openpyxl.utils.cell import get_column_letter
 
 from vavilov.conf.settings import MAX_OBS_TO_EXCEL, APP_LOGGER
-from vavilov.utils.column_format import queryset_to_columns
 logger = logging.getLogger(APP_LOGGER)
 
+BYTE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
 
 def calc_duration(action, prev_time):
     now = time()
@@ -33,15 +38,7 @@ MSG = """<script>
 </script>""".format(MAX_OBS_TO_EXCEL)
 
 
-def return_csv_response(queryset, table_class, column_format=False):
-    prev_time = time()
-    if queryset.count() > MAX_OBS_TO_EXCEL:
-        return HttpResponse(MSG, content_type="text/html")
-    prev_time = calc_duration('Csv Query Count', prev_time)
-    rows = table_class(queryset).as_values()
-    if column_format:
-        rows = queryset_to_columns(rows)
-    prev_time = calc_duration('table to rows', prev_time)
+def return_csv_response(rows):
     pseudo_buffer = Echo()
     writer = csv.writer(pseudo_buffer, delimiter=',', quoting=csv.QUOTE_MINIMAL)
     response = StreamingHttpResponse((writer.writerow(row) for row in rows),
@@ -50,25 +47,54 @@ def return_csv_response(queryset, table_class, column_format=False):
     return response
 
 
-def return_excel_response(queryset, table_class, column_length=None):
-    if queryset.count() > MAX_OBS_TO_EXCEL:
-        return HttpResponse(MSG, content_type="text/html")
-
-    content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    response = HttpResponse(content_type=content_type)
-    rows = table_class(queryset).as_values()
-    wb = create_workbook_from_queryset(rows, column_length)
-    response['Content-Disposition'] = 'attachment; filename="somefilename.xlsx"'
-    wb.save(response)
-    return response
-
-
 def create_excel_from_queryset(out_fpath, queryset, table, column_length=None):
     rows = table(queryset).as_values()
     wb = create_workbook_from_queryset(rows, column_length=column_length)
     wb.save(out_fpath)
 
 
+def _read_file_range(fhand, length, block_size=8192):
+    try:
+        while length > 0:
+            block = fhand.read(min(block_size, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+    finally:
+        fhand.close()
+
+
+def return_file_response(fpath, content_type, filename, range_header=None):
+    '''It streams the file, only the requested bytes if a Range header with
+    a single range is given'''
+    size = getsize(fpath)
+    match = BYTE_RANGE.match(range_header or '')
+    if match and any(match.groups()):
+        start, end = match.groups()
+        if not start:
+            start, end = max(size - int(end), 0), size - 1
+        else:
+            start = int(start)
+            end = min(int(end), size - 1) if end else size - 1
+        if start > end:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = 'bytes */{}'.format(size)
+            return response
+        fhand = open(fpath, 'rb')
+        fhand.seek(start)
+        response = StreamingHttpResponse(_read_file_range(fhand, end - start + 1),
+                                         status=206, content_type=content_type)
+        response['Content-Range'] = 'bytes {}-{}/{}'.format(start, end, size)
+        response['Content-Length'] = end - start + 1
+    else:
+        response = FileResponse(open(fpath, 'rb'), content_type=content_type)
+        response['Content-Length'] = size
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = 'attachment; filename="{}"'.format(filename)
+    return response
+
+
 def create_workbook_from_queryset(rows, column_length=None):
     wb = Workbook(write_only=True)
     ws = wb.create_sheet()
@@ -4,16 +4,14 @@ import operator
 from django.db.models import Q
 from django.views.generic.detail import DetailView
 
-from guardian.shortcuts import get_objects_for_user
-
 from vavilov.forms.accession import SearchPassportForm
 from vavilov.models import (Accession, AccessionRelationship, Cvterm, Country,
-                            Taxa, get_bottom_taxons)
+                            Taxa, get_visible_objects)
 
 from vavilov.views.tables import (AccessionsTable, assays_to_table,
                                   plants_to_table, obs_to_table)
 from vavilov.views.generic import SearchListView
-from vavilov.views.observation import observations_to_galleria_json
+from vavilov.views.observation import gallery_context
 from vavilov.permissions import PermissionRequiredMixin
 from vavilov.conf.settings import BY_OBJECT_OBS_PERM
 
@@ -51,12 +49,11 @@ def filter_accessions(search_criteria, user=None):
 
     if 'taxa_result' in search_criteria and search_criteria['taxa_result']:
         taxa = Taxa.objects.get(taxa_id=int(search_criteria['taxa_result']))
-        bottom_taxas = get_bottom_taxons([taxa])
-        query = query.filter(accessiontaxa__taxa__in=bottom_taxas)
+        query = query.filter(accessiontaxa__taxa__ancestor_closures__ancestor=taxa)
+        query = query.distinct()
 
     if BY_OBJECT_OBS_PERM:
-        query = get_objects_for_user(user, 'vavilov.view_accession',
-                                     klass=query, accept_global_perms=False)
+        query = get_visible_objects(user, 'vavilov.view_accession', query)
     else:
         if not user.has_perm('vavilov.view_accession'):
             query = query.none()
@@ -89,9 +86,9 @@ class AccessionDetail(PermissionRequiredMixin, DetailView):
         obs = self.object.observations(user)
         context['observations'] = obs_to_table(obs, self.request) if obs else None
 
-        context['json_images'] = observations_to_galleria_json(self.object.obs_images(user))
         # search_criteria
         context['obs_search_criteria'] = {'accession': self.object.accession_number}
+        context.update(gallery_context(context['obs_search_criteria'], user))
 
         return context
 
@@ -101,10 +98,12 @@ class AccessionList(SearchListView):
     template_name = 'vavilov/accession-list.html'
     form_class = SearchPassportForm
     table = AccessionsTable
+    export_kind = 'accessions'
     redirect_in_one = True
     detail_view_name = 'accession_view'
     permission_required = ['vavilov.view_accession']
 
     def get_queryset(self, **kwargs):
-        return filter_accessions(kwargs['search_criteria'],
-                                 user=kwargs['user'])
+        accessions = filter_accessions(kwargs['search_criteria'],
+                                       user=kwargs['user'])
+        return accessions.with_passport()
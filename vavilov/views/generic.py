@@ -1,14 +1,21 @@
 import logging
 from time import time
 
+from django.core.urlresolvers import reverse
+from django.http.response import Http404, HttpResponse
 from django.shortcuts import redirect, render_to_response
 from django.template.context_processors import csrf
 from django.views.generic.base import View
 
 from django_tables2.config import RequestConfig
 
-from vavilov.utils.streams import (return_excel_response, return_csv_response)
-from vavilov.conf.settings import APP_LOGGER
+from vavilov.exports import (submit_export_job, can_download,
+                             return_export_response)
+from vavilov.models import ExportJob
+from vavilov.utils.column_format import queryset_to_columns
+from vavilov.utils.csv_export import get_export_rows
+from vavilov.utils.streams import return_csv_response, MSG
+from vavilov.conf.settings import APP_LOGGER, MAX_OBS_TO_EXCEL
 
 logger = logging.getLogger(APP_LOGGER)
 
@@ -25,6 +32,16 @@ def search_criteria_to_get_parameters(search_criteria):
     return get_params
 
 
+def export_download(request, export_job_id):
+    try:
+        job = ExportJob.objects.get(export_job_id=export_job_id)
+    except ExportJob.DoesNotExist:
+        raise Http404
+    if not can_download(request.user, job):
+        raise Http404
+    return return_export_response(job, request.META.get('HTTP_RANGE'))
+
+
 def calc_duration(action, prev_time):
     now = time()
     logger.debug('{}: Took {} secs'.format(action, round(now - prev_time, 2)))
@@ -36,6 +53,8 @@ class SearchListView(View):
     template_name = ''
     form_class = None
     table = None
+    # kind of the export jobs of the downloads, None if they are not allowed
+    export_kind = None
     redirect_in_one = True
     detail_view_name = ''
 
@@ -73,13 +92,13 @@ class SearchListView(View):
         download_search = request.GET.get('download_search', False)
         if method == 'get' and download_search:
             format_ = request.GET['format']
-            if format_ == 'csv':
-                return return_csv_response(self.object_list, self.table)
+            if format_ == 'csv' and self.export_kind:
+                rows = get_export_rows(self.export_kind, self.object_list)
+                return return_csv_response(rows)
             elif format_ == 'excel':
-                return return_excel_response(self.object_list, self.table)
+                return self._export(request, format_)
             elif format_ == 'csv_by_trait_columns':
-                return return_csv_response(self.object_list, self.table,
-                                           column_format=True)
+                return return_csv_response(queryset_to_columns(self.object_list))
 
         if self.detail_view_name and self.object_list.count() == 1:
             return redirect(self.object_list.first().get_absolute_url())
@@ -91,6 +110,18 @@ class SearchListView(View):
                                                         getdata=getdata,
                                                         query_made=query_made))
 
+    def _export(self, request, format_):
+        if self.export_kind is None:
+            raise Http404
+        if self.object_list.count() > MAX_OBS_TO_EXCEL:
+            return HttpResponse(MSG, content_type="text/html")
+        criteria = dict([(key, values) for key, values in request.GET.lists()
+                         if key not in ('download_search', 'format')])
+        job = submit_export_job(request.user, self.export_kind, format_,
+                                criteria)
+        return redirect(reverse('export-download',
+                                kwargs={'export_job_id': job.export_job_id}))
+
     def get_context_data(self, form, criteria, search_criteria, getdata,
                          query_made):
         context = {'request': self.request}
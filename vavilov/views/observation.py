@@ -1,16 +1,27 @@
+from mimetypes import guess_type
+import os
 from time import time
 import json
 
+from django.core.urlresolvers import reverse
+from django.http.response import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import urlencode
 from django.views.generic.detail import DetailView
 from django.template.context_processors import csrf
 
 from vavilov.forms.observations import SearchObservationForm
-from vavilov.models import ObservationEntity, filter_observations, Observation
+from vavilov.models import (ObservationEntity, filter_observations, Observation,
+                            ObservationImages, only_scan_storage)
 from vavilov.views.tables import (ObservationsTable, plants_to_table,
                                   obs_to_table)
-from vavilov.conf.settings import MAX_PHOTO_IN_GALLERY
+from vavilov.conf.settings import (MAX_PHOTO_IN_GALLERY, BY_OBJECT_OBS_PERM,
+                                   IMAGE_CACHE_MAX_AGE, IMAGE_RESIZE_WIDTHS,
+                                   GALLERY_IMAGE_WIDTH, GALLERY_PAGE_SIZE)
 from vavilov.views.generic import SearchListView, calc_duration
-from vavilov.permissions import PermissionRequiredMixin
+from vavilov.permissions import PermissionRequiredMixin, can_view
+from vavilov.utils.image_derivatives import (get_resize_width, get_resize_key,
+                                             get_resized_image)
 
 
 class ObservationList(SearchListView):
@@ -18,6 +29,7 @@ class ObservationList(SearchListView):
     template_name = 'vavilov/observation-list.html'
     form_class = SearchObservationForm
     table = ObservationsTable
+    export_kind = 'observations'
     detail_view_name = None
 
     def get_queryset(self, **kwargs):
@@ -25,15 +37,122 @@ class ObservationList(SearchListView):
                                    user=kwargs['user'])
 
 
-def observations_to_galleria_json(obs):
+# the criteria of the galleries of the detail views
+GALLERY_SEARCH_FIELDS = ('accession', 'plant', 'obs_entity', 'assay')
+
+
+def _get_resized_url(observation_image_id, width):
+    return reverse('observation_image-resized',
+                   kwargs={'observation_image_id': observation_image_id,
+                           'width': width})
+
+
+def observations_to_galleria_data(obs, start=0, stop=None):
+    '''The galleria items of the images of the observations, the images,
+    thumbnails and assays are read with a single query'''
+    rows = obs.filter(observationimages__isnull=False)
+    rows = rows.values_list('observationimages__observation_image_id',
+                            'observationimages__image',
+                            'observationimages__thumbnail', 'assay__name')
+    rows = rows.order_by('observationimages__observation_image_id')
+    obs_data = []
+    for image_id, image, thumbnail, assay_name in rows[start:stop]:
+        if thumbnail:
+            thumbnail = only_scan_storage.url(thumbnail)
+        else:
+            thumbnail = _get_resized_url(image_id, min(IMAGE_RESIZE_WIDTHS))
+        obs_data.append({'image': _get_resized_url(image_id, GALLERY_IMAGE_WIDTH),
+                         'big': only_scan_storage.url(image),
+                         'thumb': thumbnail,
+                         'title': 'Assay=' + assay_name})
+    return obs_data
+
+
+def observations_to_galleria_json(obs, start=0, stop=None):
     prev_time = time()
-    obs_data = [{'image': o.image.url, 'thumb': o.thumbnail.url, 'title': 'Assay=' + o.assay.name} for o in obs]
+    obs_data = observations_to_galleria_data(obs, start, stop)
     prev_time = calc_duration('Observation_to_dict_images', prev_time)
     json_data = json.dumps(obs_data)
     prev_time = calc_duration('Dict_images_to_json_images', prev_time)
     return json_data
 
 
+def _can_view_observation(user, observation):
+    # the same check that filter_observations does for the galleries
+    if BY_OBJECT_OBS_PERM:
+        return can_view(user, ['vavilov.view_observation'], observation)
+    return user.has_perm('vavilov.view_observation')
+
+
+def observation_image(request, observation_image_id, width):
+    '''The image resized to the width. The resized images are made on first
+    request and kept in a disk cache'''
+    try:
+        obs_image = ObservationImages.objects.select_related('observation').get(observation_image_id=observation_image_id)
+    except ObservationImages.DoesNotExist:
+        raise Http404
+    if not _can_view_observation(request.user, obs_image.observation):
+        raise Http404
+    photo_path = obs_image.image.path
+    width = get_resize_width(int(width))
+    try:
+        key = get_resize_key(photo_path, width)
+    except FileNotFoundError:
+        raise Http404
+    # the browser copy is checked before the resized copy is open or made
+    response = get_conditional_response(request, etag='"{}"'.format(key))
+    if response is None:
+        try:
+            fhand, key = get_resized_image(photo_path, width)
+        except OSError:
+            # a missing or corrupt photo
+            raise Http404
+        # FileResponse is sent with the file wrapper of the server, sendfile
+        # if it has it
+        response = FileResponse(fhand, content_type=guess_type(fhand.name)[0])
+        response['Content-Length'] = os.fstat(fhand.fileno()).st_size
+    response['ETag'] = '"{}"'.format(key)
+    response['Cache-Control'] = 'private, max-age={}'.format(IMAGE_CACHE_MAX_AGE)
+    return response
+
+
+def _get_gallery_page(search_criteria, user, page):
+    start = (page - 1) * GALLERY_PAGE_SIZE
+    obs = filter_observations(search_criteria, user=user, images=True)
+    # one more to know if there is a next page
+    obs_data = observations_to_galleria_data(obs, start,
+                                             start + GALLERY_PAGE_SIZE + 1)
+    next_url = None
+    if len(obs_data) > GALLERY_PAGE_SIZE:
+        params = dict(search_criteria, page=page + 1)
+        next_url = reverse('observation_image-gallery') + '?' + urlencode(sorted(params.items()))
+    return obs_data[:GALLERY_PAGE_SIZE], next_url
+
+
+def gallery_context(search_criteria, user):
+    '''The first page of the gallery of the images of the search, the rest
+    are asked by the gallery to gallery_images'''
+    obs_data, next_url = _get_gallery_page(search_criteria, user, page=1)
+    return {'json_images': json.dumps(obs_data), 'gallery_next_url': next_url}
+
+
+def gallery_images(request):
+    '''A page of a gallery, json encoded with the url of the next page'''
+    search_criteria = {field: request.GET[field] for field in GALLERY_SEARCH_FIELDS
+                       if request.GET.get(field)}
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    if search_criteria:
+        obs_data, next_url = _get_gallery_page(search_criteria, request.user,
+                                               page)
+    else:
+        obs_data, next_url = [], None
+    return HttpResponse(json.dumps({'images': obs_data, 'next_url': next_url}),
+                        content_type='application/json')
+
+
 class ObservationImageList(SearchListView):
     model = Observation
     template_name = 'vavilov/observation-listimages.html'
@@ -91,5 +210,6 @@ class ObservationEntityDetail(PermissionRequiredMixin, DetailView):
 
             obs = self.object.observations(user)
             context['observations'] = obs_to_table(obs, self.request) if obs else None
-            context['json_images'] = observations_to_galleria_json(self.object.obs_images(user))
+            context.update(gallery_context({'obs_entity': self.object.name},
+                                           user))
         return context
@@ -2,7 +2,7 @@ from django.views.generic.detail import DetailView
 
 from vavilov.models import Plant
 from vavilov.views.tables import assays_to_table, obs_to_table
-from vavilov.views.observation import observations_to_galleria_json
+from vavilov.views.observation import gallery_context
 from vavilov.permissions import PermissionRequiredMixin
 
 
@@ -26,8 +26,8 @@ class PlantDetail(PermissionRequiredMixin, DetailView):
         obs = self.object.observations(user)
         context['observations'] = obs_to_table(obs, self.request) if obs else None
 
-        context['json_images'] = observations_to_galleria_json(self.object.obs_images(user))
         # search_criteria
         context['obs_search_criteria'] = {'plant': self.object.plant_name}
+        context.update(gallery_context(context['obs_search_criteria'], user))
 
         return context
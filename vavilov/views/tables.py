@@ -70,8 +70,8 @@ class AccessionsTable(tables.Table):
                                          default='', orderable=False)
     if 'organism' in search_fields:
         organism = tables.Column('Organism',
-                                 accessor=A('organism'),
-                                 default='', orderable=False)
+                                 accessor=A('organism_name'),
+                                 default='', order_by=('organism_name',))
 
     if 'country' in search_fields:
         country = tables.Column('Collecting country',
@@ -1,6 +1,7 @@
 from django.views.generic.detail import DetailView
 
 from vavilov.models import Trait
+from vavilov.utils.stats import get_trait_stats
 from vavilov.views.tables import obs_to_table
 from vavilov.permissions import PermissionRequiredMixin
 
@@ -22,5 +23,6 @@ class TraitDetail(PermissionRequiredMixin, DetailView):
         obs = self.object.observations(user)
         context['observations'] = obs_to_table(obs, self.request) if obs else None
         context['obs_search_criteria'] = {'traits': self.object.name}
+        context['stats'] = get_trait_stats(self.object, user)
 
         return context